@@ -1,13 +1,17 @@
 """ai_assistant.py
 Lightweight, pluggable AI assistant logic with rule-based intent extraction.
-Designed so a real LLM provider can later be swapped in (OpenAI, Anthropic, etc.).
+A language-model provider can be swapped in through llm_provider.py (OpenAI, Anthropic, etc.);
+these rules remain its fallback.
 """
 from __future__ import annotations
 import datetime as _dt
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, NamedTuple, Optional, Sequence, Tuple
 from dateutil import parser as date_parser
 import re
 
+from schedule_optimizer import PERIODS, free_up
+from task_store import TaskStore
+
 INTENT_ADD = "ADD_TASK"
 INTENT_COMPLETE = "COMPLETE_TASK"
 INTENT_LIST = "LIST_TASKS"
@@ -30,28 +34,128 @@ PRIORITY_KEYWORDS = {
 }
 
 FREE_UP_PAT = re.compile(r"free up|make time|clear (?:my )?(?:day|afternoon|morning)", re.I)
+# Part of the day a FREE_UP targets (schedule_optimizer.PERIODS)
+PERIOD_PAT = re.compile(r"\b(" + '|'.join(PERIODS) + r"|tonight)\b")
+
+# Keyword patterns per intent, in precedence order: the first intent present anywhere in
+# the message wins, like the original chain of substring checks.
+INTENT_PATTERNS = [
+    (INTENT_FREE_UP, FREE_UP_PAT.pattern),
+    (INTENT_ADD, r"add |create|remind me|schedule|new task"),
+    (INTENT_COMPLETE, r"complete|mark done|finish|done with"),
+    (INTENT_LIST, r"list|show|what's due|what is due|tasks for"),
+    (INTENT_SNOOZE, r"snooze|delay"),
+    (INTENT_RESCHEDULE, r"reschedule|move"),
+    (INTENT_DELETE, r"delete|remove"),
+]
+# Entities of the winning intent, searched from its first keyword
+ENTITY_PATTERNS = {
+    INTENT_COMPLETE: re.compile(r'(?:complete|finish|done with) (?P<description>.+)'),
+    INTENT_SNOOZE: re.compile(r'snooze (?P<description>.+?) by (?P<duration>\d+[mhd])'),
+    INTENT_RESCHEDULE: re.compile(r'(?:reschedule|move) (?P<description>.+?) to (?P<newDate>.+)'),
+    INTENT_DELETE: re.compile(r'(?:delete|remove) (?P<description>.+)'),
+}
+_ADD_PREFIX = re.compile(r'^(add|create|schedule|new task)\s+', re.I)
+# dateutil's fuzzy parse only finds a date in text with a digit or a month/weekday name
+_DATEUTIL_HINT = re.compile(r'\d|(?<![a-z])(?:' + '|'.join(sorted(
+    {name.lower() for names in date_parser.parserinfo.MONTHS + date_parser.parserinfo.WEEKDAYS for name in names},
+    key=len, reverse=True)) + r')(?![a-z])', re.I)
 
 class AssistantResult(Dict[str, Any]):
     pass
 
-def _extract_date(text: str) -> Optional[_dt.datetime]:
-    lower = text.lower()
-    now = _dt.datetime.utcnow()
+class IntentMatch(NamedTuple):
+    """What IntentClassifier found in a (lowercased) message.
+
+    `spans` maps 'keyword' (the keyword that decided the intent) and each captured entity
+    ('description', 'duration', 'newDate') to (start, end) offsets in the message.
+    `dates` and `priorities` list every date/priority keyword as (keyword, start, end).
+    """
+    intent: str
+    spans: Dict[str, Tuple[int, int]]
+    dates: List[Tuple[str, int, int]]
+    priorities: List[Tuple[str, int, int]]
+
+class IntentClassifier:
+    """All intent, date and priority keywords compiled into one pattern and found in one scan.
+
+    Each search resumes one character after the previous hit, so overlapping keywords
+    are all seen (e.g. 'move' inside 'remove'), exactly like the old substring tests.
+    No two keywords start with the same text, so one offset never hides another keyword.
+    Only the winning intent's entity pattern runs afterwards, from its first keyword.
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str]] = INTENT_PATTERNS,
+                 entity_patterns: Dict[str, re.Pattern] = ENTITY_PATTERNS):
+        self._intents = [intent for intent, _ in patterns]
+        self._rank = {intent: rank for rank, intent in enumerate(self._intents)}
+        self._entity_patterns = entity_patterns
+        kinds = list(patterns) + [('date', '|'.join(map(re.escape, DATE_KEYWORDS))),
+                                  ('priority', '|'.join(map(re.escape, PRIORITY_KEYWORDS)))]
+        # Plain alternatives (no groups) let sre skip offsets whose first character starts
+        # no keyword; the matched keyword is mapped back to its kind afterwards.
+        self.pattern = re.compile('|'.join(pattern for _, pattern in kinds))
+        self._kind_pattern = re.compile('|'.join(f"(?P<{kind}>{pattern})" for kind, pattern in kinds))
+        self._kind_of: Dict[str, str] = {}
+
+    def _kind(self, keyword: str) -> str:
+        kind = self._kind_of[keyword] = self._kind_pattern.fullmatch(keyword).lastgroup
+        return kind
+
+    def classify(self, lower: str) -> IntentMatch:
+        best = len(self._intents)
+        first: Dict[str, Tuple[int, int]] = {}
+        dates, priorities = [], []
+        search = self.pattern.search
+        m = search(lower)
+        while m is not None:
+            keyword, start = m.group(), m.start()
+            kind = self._kind_of.get(keyword) or self._kind(keyword)
+            if kind == 'date':
+                dates.append((keyword, start, start + len(keyword)))
+            elif kind == 'priority':
+                priorities.append((keyword, start, start + len(keyword)))
+            elif kind not in first:
+                first[kind] = (start, start + len(keyword))
+                best = min(best, self._rank[kind])
+            m = search(lower, start + 1)
+        if best == len(self._intents):
+            return IntentMatch(INTENT_UNKNOWN, {}, dates, priorities)
+        intent = self._intents[best]
+        spans = {'keyword': first[intent]}
+        entity_pattern = self._entity_patterns.get(intent)
+        if entity_pattern is not None:
+            em = entity_pattern.search(lower, first[intent][0])
+            if em is not None:
+                spans.update((name, em.span(name)) for name in entity_pattern.groupindex)
+        return IntentMatch(intent, spans, dates, priorities)
+
+intent_classifier = IntentClassifier()
+
+def _keyword_date(dates: List[Tuple[str, int, int]], start: int = 0,
+                  end: Optional[int] = None) -> Optional[_dt.datetime]:
+    """Date for the DATE_KEYWORDS hit in [start, end) that the keyword order prefers."""
+    if not dates:
+        return None
+    found = {k for k, s, e in dates if s >= start and (end is None or e <= end)}
     for k, offset in DATE_KEYWORDS.items():
-        if k in lower:
+        if k in found:
+            now = _dt.datetime.utcnow()
             return (now + _dt.timedelta(days=offset)).replace(hour=9, minute=0, second=0, microsecond=0)
-    # Try relaxed parsing
+    return None
+
+def _fuzzy_date(text: str) -> Optional[_dt.datetime]:
+    if text.isascii() and not _DATEUTIL_HINT.search(text):
+        return None  # dateutil would raise "String does not contain a date"
     try:
-        dt = date_parser.parse(text, fuzzy=True, default=now)
-        return dt
+        return date_parser.parse(text, fuzzy=True, default=_dt.datetime.utcnow())
     except Exception:
         return None
 
-def _extract_priority(text: str) -> Optional[str]:
-    for k,v in PRIORITY_KEYWORDS.items():
-        if k in text.lower():
-            return v
-    return None
+def _extract_date(lower: str, dates: List[Tuple[str, int, int]], start: int = 0,
+                  end: Optional[int] = None) -> Optional[_dt.datetime]:
+    """DATE_KEYWORDS first, then a fuzzy parse of lower[start:end]."""
+    return _keyword_date(dates, start, end) or _fuzzy_date(lower[start:end])
 
 def interpret_messages(messages: List[Dict[str,str]]) -> AssistantResult:
     """Given a conversation (list of {role, content}), derive one action from the last user message.
@@ -64,59 +168,77 @@ def interpret_messages(messages: List[Dict[str,str]]) -> AssistantResult:
         return AssistantResult(intent=INTENT_UNKNOWN, entities={}, response="I'm waiting for your instructions.")
     text = last_user.get('content','').strip()
     lower = text.lower()
+    match = intent_classifier.classify(lower)
+    intent, spans = match.intent, match.spans
     entities: Dict[str, Any] = {}
 
+    def span_text(name: str) -> str:
+        start, end = spans[name]
+        return lower[start:end]
+
     # Free up schedule
-    if FREE_UP_PAT.search(lower):
-        entities['targetDate'] = _extract_date(lower) or _dt.datetime.utcnow()
+    if intent == INTENT_FREE_UP:
+        entities['targetDate'] = _extract_date(lower, match.dates) or _dt.datetime.utcnow()
+        period = PERIOD_PAT.search(lower)
+        if period: entities['period'] = 'evening' if period.group(1) == 'tonight' else period.group(1)
         return AssistantResult(intent=INTENT_FREE_UP, entities=entities, response="Let me see which tasks we can postpone to free some time.")
 
     # Add task
-    if any(k in lower for k in ['add ','create','remind me','schedule','new task']):
-        entities['description'] = re.sub(r'^(add|create|schedule|new task)\s+','', text, flags=re.I)
-        entities['dueDate'] = _extract_date(lower) or (_dt.datetime.utcnow() + _dt.timedelta(hours=1))
-        pr = _extract_priority(lower)
+    if intent == INTENT_ADD:
+        entities['description'] = _ADD_PREFIX.sub('', text)
+        entities['dueDate'] = _extract_date(lower, match.dates) or (_dt.datetime.utcnow() + _dt.timedelta(hours=1))
+        found = {k for k, _, _ in match.priorities}
+        pr = next((v for k, v in PRIORITY_KEYWORDS.items() if k in found), None)
         if pr: entities['priority'] = pr
         return AssistantResult(intent=INTENT_ADD, entities=entities, response="Adding that task.")
 
     # Complete task
-    if any(k in lower for k in ['complete','mark done','finish','done with']):
-        # Heuristic: after keyword
-        m = re.search(r'(?:complete|finish|done with) (.+)', lower)
-        if m: entities['description'] = m.group(1).strip()
+    if intent == INTENT_COMPLETE:
+        if 'description' in spans: entities['description'] = span_text('description').strip()
         return AssistantResult(intent=INTENT_COMPLETE, entities=entities, response="Marking it complete if I find it.")
 
     # List tasks
-    if any(k in lower for k in ['list','show','what\'s due','what is due','tasks for']):
-        entities['targetDate'] = _extract_date(lower) or _dt.datetime.utcnow()
+    if intent == INTENT_LIST:
+        entities['targetDate'] = _extract_date(lower, match.dates) or _dt.datetime.utcnow()
         return AssistantResult(intent=INTENT_LIST, entities=entities, response="Here is what I found.")
 
     # Snooze
-    if 'snooze' in lower or 'delay' in lower:
-        m = re.search(r'snooze (.+?) by (\d+)(m|h|d)', lower)
-        if m:
-            entities['description'] = m.group(1).strip()
-            entities['duration'] = m.group(2)+m.group(3)
+    if intent == INTENT_SNOOZE:
+        if 'description' in spans:
+            entities['description'] = span_text('description').strip()
+            entities['duration'] = span_text('duration')
         return AssistantResult(intent=INTENT_SNOOZE, entities=entities, response="Attempting a snooze.")
 
     # Reschedule
-    if 'reschedule' in lower or 'move' in lower:
-        m = re.search(r'(?:reschedule|move) (.+?) to (.+)', lower)
-        if m:
-            entities['description'] = m.group(1).strip()
-            entities['newDate'] = _extract_date(m.group(2))
+    if intent == INTENT_RESCHEDULE:
+        if 'description' in spans:
+            entities['description'] = span_text('description').strip()
+            start, end = spans['newDate']
+            entities['newDate'] = _extract_date(lower, match.dates, start, end)
         return AssistantResult(intent=INTENT_RESCHEDULE, entities=entities, response="Trying to update its date.")
 
     # Delete
-    if 'delete' in lower or 'remove' in lower:
-        m = re.search(r'(?:delete|remove) (.+)', lower)
-        if m:
-            entities['description'] = m.group(1).strip()
+    if intent == INTENT_DELETE:
+        if 'description' in spans: entities['description'] = span_text('description').strip()
         return AssistantResult(intent=INTENT_DELETE, entities=entities, response="Removing if it exists.")
 
     return AssistantResult(intent=INTENT_UNKNOWN, entities={}, response="I can add, list, complete, snooze, reschedule or free up your schedule. Try: 'Free up tomorrow afternoon'.")
 
 
+def find_tasks(db, description: str, single: bool = False,
+               include_completed: bool = False, partial: bool = False) -> List[Any]:
+    """Tasks a spoken description refers to, via the full-text index (TaskStore.search_tasks).
+
+    Tasks containing every word (as a word prefix) match, best first; `single` keeps only the
+    best. With `partial`, if none has every word the single best partial match is used; only
+    the non-destructive single-target intents (snooze, reschedule) ask for that.
+    """
+    store = TaskStore(db)
+    tasks = store.search_tasks(description, limit=1 if single else None, include_completed=include_completed)
+    if tasks or not partial:
+        return tasks
+    return store.search_tasks(description, limit=1, match_all=False, include_completed=include_completed)
+
 def apply_actions(result: AssistantResult, db) -> Dict[str, Any]:
     """Execute the interpreted intent against the SQLite DB.
     Returns dict with 'message' and optional 'refresh' flag.
@@ -148,9 +270,10 @@ def apply_actions(result: AssistantResult, db) -> Dict[str, Any]:
             desc = entities.get('description')
             if not desc:
                 return {'message':'Please specify which task to complete.'}
-            cur.execute("UPDATE tasks SET completed=1, completedAt=? WHERE completed=0 AND deletedAt IS NULL AND description LIKE ?", (now.isoformat(), f"%{desc}%"))
+            ids = [t.id for t in find_tasks(db, desc)]
+            cur.executemany("UPDATE tasks SET completed=1, completedAt=? WHERE id=?", [(now.isoformat(), i) for i in ids])
             db.commit()
-            return { 'message': f"Completed {cur.rowcount} task(s) matching '{desc}'.", 'refresh': cur.rowcount>0 }
+            return { 'message': f"Completed {len(ids)} task(s) matching '{desc}'.", 'refresh': bool(ids) }
 
         if intent == INTENT_LIST:
             target = entities.get('targetDate') or now
@@ -175,12 +298,11 @@ def apply_actions(result: AssistantResult, db) -> Dict[str, Any]:
             if not desc:
                 return {'message':'Which task should I snooze?'}
             multiplier = {'10m': (_dt.timedelta(minutes=10)), '1h': _dt.timedelta(hours=1), '1d': _dt.timedelta(days=1)}.get(dur, _dt.timedelta(hours=1))
-            cur.execute("SELECT id, dueDate FROM tasks WHERE deletedAt IS NULL AND completed=0 AND description LIKE ? ORDER BY dueDate LIMIT 1", (f"%{desc}%",))
-            row = cur.fetchone()
-            if not row:
+            match = find_tasks(db, desc, single=True, partial=True)
+            if not match:
                 return {'message':'Task not found to snooze.'}
-            new_due = date_parser.parse(row['dueDate']) + multiplier
-            cur.execute("UPDATE tasks SET dueDate=?, snoozedUntil=?, snoozeDuration=? WHERE id=?", (new_due.isoformat(), new_due.isoformat(), dur, row['id']))
+            new_due = match[0].dueDate + multiplier
+            cur.execute("UPDATE tasks SET dueDate=?, snoozedUntil=?, snoozeDuration=? WHERE id=?", (new_due.isoformat(), new_due.isoformat(), dur, match[0].id))
             db.commit()
             return {'message': f"Snoozed task to {new_due.strftime('%H:%M')}", 'refresh': True }
 
@@ -189,9 +311,8 @@ def apply_actions(result: AssistantResult, db) -> Dict[str, Any]:
             new_date = entities.get('newDate')
             if not (desc and new_date):
                 return {'message':'Need a task and a new date/time.'}
-            cur.execute("SELECT id FROM tasks WHERE deletedAt IS NULL AND completed=0 AND description LIKE ? ORDER BY dueDate LIMIT 1", (f"%{desc}%",))
-            row = cur.fetchone()
-            if not row:
+            match = find_tasks(db, desc, single=True, partial=True)
+            if not match:
                 return {'message':'Task not found.'}
             # Normalize new_date to ISO
             if isinstance(new_date, _dt.datetime):
@@ -201,7 +322,7 @@ def apply_actions(result: AssistantResult, db) -> Dict[str, Any]:
                     new_dt = date_parser.parse(str(new_date))
                 except Exception:
                     return {'message':'Could not parse the new date/time.'}
-            cur.execute("UPDATE tasks SET dueDate=? WHERE id=?", (new_dt.isoformat(), row['id']))
+            cur.execute("UPDATE tasks SET dueDate=? WHERE id=?", (new_dt.isoformat(), match[0].id))
             db.commit()
             return {'message': f"Rescheduled to {new_dt.strftime('%Y-%m-%d %H:%M')}", 'refresh': True }
 
@@ -209,41 +330,27 @@ def apply_actions(result: AssistantResult, db) -> Dict[str, Any]:
             desc = entities.get('description')
             if not desc:
                 return {'message':'Which task should I delete?'}
-            cur.execute("UPDATE tasks SET deletedAt=? WHERE deletedAt IS NULL AND description LIKE ?", (now.isoformat(), f"%{desc}%"))
+            ids = [t.id for t in find_tasks(db, desc, include_completed=True)]
+            cur.executemany("UPDATE tasks SET deletedAt=? WHERE id=?", [(now.isoformat(), i) for i in ids])
             db.commit()
-            return {'message': f"Deleted {cur.rowcount} task(s).", 'refresh': cur.rowcount>0 }
+            return {'message': f"Deleted {len(ids)} task(s).", 'refresh': bool(ids) }
 
         if intent == INTENT_FREE_UP:
             target = entities.get('targetDate') or now
-            if isinstance(target, _dt.datetime):
-                date_prefix = target.strftime('%Y-%m-%d')
-            else:
-                date_prefix = str(target)[:10]
-            cur.execute("SELECT id, description, dueDate, priority FROM tasks WHERE deletedAt IS NULL AND completed=0 AND substr(dueDate,1,10)=? ORDER BY dueDate", (date_prefix,))
-            rows = cur.fetchall()
-            if not rows:
+            if not isinstance(target, _dt.datetime):
+                target = date_parser.parse(str(target))
+            plan = free_up(TaskStore(db), target.date(), entities.get('period'))
+            if not plan.considered:
                 return {'message':'No tasks to optimize that day.'}
-            # Strategy: move up to 3 lowest priority / latest tasks to next day same time
-            # Determine candidate order: by priority asc then time desc
-            def prio_val(p): return {'priority-high':3,'priority-medium':2,'priority-low':1}.get(p,2)
-            sorted_rows = sorted(rows, key=lambda r: (prio_val(r['priority']), r['dueDate']), reverse=False)
-            moved = []
-            for r in reversed(sorted_rows): # start from lowest priority later tasks
-                if len(moved)>=3: break
-                old_dt = date_parser.parse(r['dueDate'])
-                new_dt = old_dt + _dt.timedelta(days=1)
-                cur.execute("UPDATE tasks SET dueDate=? WHERE id=?", (new_dt.isoformat(), r['id']))
-                moved.append((r['description'], old_dt, new_dt))
-            db.commit()
-            if not moved:
+            if not plan.moves:
                 return {'message':'Could not find tasks suitable to move.'}
-            summary = '; '.join(f"'{d}' to {n.strftime('%Y-%m-%d %H:%M')}" for d,_,n in moved)
-            return {'message': f"Freed time by moving {len(moved)} task(s): {summary}", 'refresh': True }
+            summary = '; '.join(f"'{m.description}' to {m.new.strftime('%Y-%m-%d %H:%M')}" for m in plan.moves)
+            return {'message': f"Freed time by moving {len(plan.moves)} task(s): {summary}", 'refresh': True }
 
         return {'message': result.get('response','I am not sure.')}
     except Exception as e:
         return {'message': f"Error executing action: {e}"}
 
 __all__ = [
-    'interpret_messages', 'apply_actions'
+    'interpret_messages', 'apply_actions', 'IntentClassifier', 'IntentMatch'
 ]
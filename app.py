@@ -1,82 +1,359 @@
+import os
+# `python app.py` serves with gevent when it is installed (see serve()). Patching comes
+# before anything creates threads or locks, so the events broker's waits, the due
+# notifier and every request - each open /api/events stream included - are greenlets.
+SERVER = os.environ.get('MANAGEME_SERVER', 'gevent')  # 'gevent' or 'threaded' (Flask dev server)
+GEVENT = False
+if __name__ == '__main__' and SERVER == 'gevent':
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+        GEVENT = True
+    except ImportError:
+        pass
 from dateutil import parser as dateutil_parser # Using dateutil for more robust parsing
+import collections
 import datetime
+import functools
+import hashlib
 import json
-import os
-from flask import Flask, request, jsonify, render_template, send_from_directory
+import threading
+import uuid
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, g, has_app_context, make_response, stream_with_context
 import logging
+import task_store
+from scheduler import DueScheduler
+from events import EventBroker, DueNotifier, format_sse
+from serialization import TaskSerializer, to_json_dict
+from datetime_parser import DATE_FORMAT_SETTINGS, DateTimeParser
+from recurrence import FREQUENCIES, RecurrenceEngine, current_occurrence, is_series, make_instance
+from task_index import day_bounds, month_bounds
+from task_model import Task
+from task_store import decode_cursor, encode_cursor, get_priority_value, sort_key
+from ai_assistant import apply_actions
+from llm_provider import AssistantEngine, get_provider
+from conversations import ConversationStore
+from ble_ingest import Frame, IngestPipeline
 
 # --- Flask App Setup ---
 app = Flask(__name__, static_folder='.', template_folder='.')
 logging.basicConfig(level=logging.INFO)
 log = app.logger # Use Flask's built-in logger
 
-# --- In-Memory Data Storage (VOLATILE - Replace with Database) ---
-# Simulating database tables with dictionaries
-# WARNING: All data is lost when the script stops!
-tasks = {} # {task_id: task_dict} - Active tasks
-deleted_tasks = {} # {task_id: task_dict} - Soft-deleted tasks
-# No separate completed_tasks dict; completion is a flag in the main 'tasks' dict
-next_task_id = 1
+# --- Persistent Data Storage (SQLite) ---
+# Tasks live in a single 'tasks' table (see task_store.py).
+# Completion and soft deletion are columns (completed / deletedAt), not separate tables.
+# Override the location with the MANAGEME_DB environment variable (tests patch app.DATABASE).
+DATABASE = os.environ.get('MANAGEME_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manageme.db'))
+_initialized_databases = set() # DB paths whose schema has been created/migrated this process
+# MANAGEME_STORAGE=memory serves the task routes from a volatile in-process store
+# (sorted due-date index, no database). The AI assistant always uses SQLite.
+STORAGE_BACKEND = os.environ.get('MANAGEME_STORAGE', 'sqlite')
+_memory_store = None
+# Min-heap of active tasks by dueDate backing /api/due_tasks; loaded lazily from the store
+due_scheduler = DueScheduler()
+_scheduler_source = None # (backend, database) the scheduler was loaded from
+# Memoized lazy expansion of recurring series (see recurrence.py)
+recurrence_engine = RecurrenceEngine()
+UPCOMING_SERIES_DAYS = 30 # how far ahead /api/tasks/all expands recurring series
+# Bulk import (/api/tasks/bulk) and export (/api/tasks/export)
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+MAX_BULK_ERRORS = 100 # per-row errors reported; the rest are only counted
+# Keyset pagination for the list endpoints (?limit=&cursor=, next page in X-Next-Cursor)
+DEFAULT_PAGE_SIZE = 100  # when a 'cursor' comes without a 'limit'; with neither, lists are unpaged
+MAX_PAGE_SIZE = 500
+RANGE_FILTER_DAYS = {'last7': -7, 'last30': -30, 'last365': -365, 'next7': 7, 'next30': 30}
+# Store version: bumped by every mutation (notify hooks), it keys the list endpoints' ETags.
+# The boot id keeps tags from a previous process from matching after a restart.
+_store_version = 0
+_store_version_lock = threading.Lock()
+_BOOT_ID = uuid.uuid4().hex[:8]
+# UI date/time and voice text parsing with per-profile format memory (see datetime_parser.py)
+datetime_parser = DateTimeParser()
+# Cached per-task JSON for list responses (orjson when installed, see serialization.py)
+task_serializer = TaskSerializer()
+# Assistant interpretation: $MANAGEME_LLM provider with a timeout, falling back to the rules
+assistant_engine = AssistantEngine(get_provider(), timeout=float(os.environ.get('MANAGEME_LLM_TIMEOUT', '5')))
+# Server-side /api/ai/assist sessions: recent turns and the task being discussed
+conversations = ConversationStore()
+# Wearable frames -> reassembly -> speech-to-text ($MANAGEME_STT engine) for /api/receive_ble_data
+ble_ingest = IngestPipeline()
+STT_TIMEOUT = float(os.environ.get('MANAGEME_STT_TIMEOUT', '10')) # seconds a request waits for a transcript
+# Push channel for /api/events (Server-Sent Events)
+event_broker = EventBroker()
+SSE_HEARTBEAT_SECONDS = 15
+
+# --- Database Helpers ---
+
+def create_db_tables():
+    """Creates (or migrates) the tasks table and its indexes in DATABASE."""
+    conn = task_store.connect(DATABASE)
+    try:
+        task_store.create_tables(conn)
+    finally:
+        conn.close()
+    _initialized_databases.add(DATABASE)
+    log.info(f"Database ready at {DATABASE}")
 
-# --- Helper Functions ---
+def get_db():
+    """
+    Returns a SQLite connection to DATABASE.
+    Inside a request/app context the connection is cached on flask.g and closed on teardown;
+    outside one (scripts, tests) a fresh connection is returned.
+    """
+    if DATABASE not in _initialized_databases:
+        create_db_tables()
+    if not has_app_context():
+        return task_store.connect(DATABASE)
+    db = getattr(g, '_database', None)
+    if db is None:
+        db = g._database = task_store.connect(DATABASE)
+    return db
+
+@app.teardown_appcontext
+def close_db(exception):
+    """Closes the per-context database connection."""
+    db = g.pop('_database', None)
+    if db is not None:
+        db.close()
+
+def get_store():
+    """Returns the task store for the configured backend (SQLite TaskStore by default)."""
+    global _memory_store
+    if STORAGE_BACKEND == 'memory':
+        if _memory_store is None:
+            _memory_store = task_store.MemoryTaskStore()
+        return _memory_store
+    return task_store.TaskStore(get_db())
+
+# --- Recurring Series Helpers ---
+
+def tasks_in_window(store, start, end, sort='time'):
+    """
+    Active tasks due in [start, end) with recurring series expanded into their
+    occurrences for that window. Occurrences that were completed, snoozed or
+    deleted individually are materialized rows and replace the virtual instance.
+    """
+    series_list = store.series_between(start, end)
+    if not series_list:
+        return store.tasks_between(start, end, sort)
+    found = [t for t in store.tasks_between(start, end) if not is_series(t)]
+    found.extend(expand_series(store, series_list, start, end))
+    if sort == 'priority':
+        found.sort(key=lambda t: (-get_priority_value(t.get('priority')), t['dueDate']))
+    else:
+        found.sort(key=lambda t: t['dueDate'])
+    return found
+
+def expand_series(store, series_list, start, end):
+    """Virtual instances of the given series in [start, end), minus materialized occurrences."""
+    handled = collections.defaultdict(set)
+    for instance in store.instances_between([s['id'] for s in series_list], start, end):
+        handled[instance['originalTaskId']].add(instance['occurrenceDate'])
+    instances = []
+    for series in series_list:
+        instances.extend(recurrence_engine.expand(series, start, end, handled[series['id']]))
+    return instances
+
+def scheduled_due(task, store, now=None):
+    """Due time reminders track for a task: its dueDate, or a series' current occurrence."""
+    if not is_series(task):
+        return task.get('dueDate')
+    return current_occurrence(task, now or datetime.datetime.now(),
+                              lambda occ: store.instance_for(task['id'], occ) is not None)
+
+def materialize_occurrence(store, series, occurrence, **state):
+    """Stores (or updates) the instance row for one occurrence of a series and returns it."""
+    existing = store.instance_for(series['id'], occurrence)
+    if existing:
+        store.update_task(existing['id'], **state)
+        existing.update(state)
+        return existing
+    instance = make_instance(series, occurrence)
+    instance.update({"repeatFrequency": 'none', "customRepeatDays": [], "repeatUntil": None,
+                     "createdAt": datetime.datetime.now()})
+    instance.update(state)
+    return store.add_task(instance)
+
+def due_views(tasks):
+    """Presents due series rows as the instance for the occurrence the scheduler fired."""
+    return [make_instance(t, due_scheduler.due_at(t['id']) or t['dueDate']) if is_series(t) else t
+            for t in tasks]
+
+# --- Scheduler / Event Hooks ---
+
+def bump_store_version():
+    """Marks every cached list response stale (called by the notify hooks)."""
+    global _store_version
+    with _store_version_lock:
+        _store_version += 1
+        return _store_version
+
+def list_etag():
+    """
+    ETag for a list GET: store version plus everything else the body depends on
+    (backend, database, full URL and today's date for day-relative defaults).
+    """
+    key = f"{_BOOT_ID}|{_store_version}|{STORAGE_BACKEND}|{DATABASE}|{request.full_path}|{datetime.date.today()}"
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+def conditional_list(view):
+    """Answers If-None-Match with 304 Not Modified before the view queries the store."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = list_etag() # read before the query: a concurrent write only makes the tag older
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache' # always revalidate
+        return response
+    return wrapper
+
+def get_scheduler():
+    """Returns the due scheduler, (re)loading it from the store when needed."""
+    global _scheduler_source
+    source = (STORAGE_BACKEND, DATABASE)
+    if not due_scheduler.loaded or _scheduler_source != source:
+        store = get_store()
+        due_scheduler.load(dict(t, dueDate=scheduled_due(t, store)) for t in store.active_tasks())
+        _scheduler_source = source
+    return due_scheduler
+
+def sync_scheduler(task):
+    """Updates the scheduler entry for one task after it was added or changed."""
+    if task and not task.get('completed') and not task.get('deletedAt') and task.get('dueDate'):
+        due = scheduled_due(task, get_store())
+        if due is None:
+            due_scheduler.cancel(task['id']) # series has no occurrences left
+        else:
+            due_scheduler.schedule(task['id'], due, task.get('priority'))
+    elif task:
+        due_scheduler.cancel(task['id'])
 
-def generate_task_id():
-    """Generates a unique sequential task ID."""
-    global next_task_id
-    # In a real DB, this would be handled by auto-incrementing primary keys
-    task_id = next_task_id
-    next_task_id += 1
-    log.info(f"Generated new task ID: {task_id}")
-    return task_id
+def notify_task_change(event_type, task):
+    """
+    Single hook for task mutations: keeps the due scheduler and the recurrence memo
+    in sync, pushes the change to /api/events subscribers and wakes the due notifier.
+    """
+    bump_store_version()
+    recurrence_engine.invalidate(task['id'])
+    task_serializer.invalidate(task['id'])
+    sync_scheduler(task)
+    if task.get('originalTaskId'):
+        # An occurrence was handled; its series now tracks the next one
+        sync_scheduler(get_store().get_task(task['originalTaskId']))
+    event_broker.publish(event_type, task_to_dict_for_json(task))
+    due_notifier.wake()
+
+def notify_bulk_change(reason, count=None):
+    """Hook for mutations touching many (or unknown) tasks: scheduler reloads, clients refetch."""
+    bump_store_version()
+    due_scheduler.invalidate()
+    task_serializer.clear()
+    event_broker.publish('tasks.changed', {"reason": reason, "count": count})
+    due_notifier.wake()
+
+def _notifier_due_ids(now):
+    with app.app_context():
+        return get_scheduler().due_ids(now)
+
+def _notifier_fetch(task_ids):
+    with app.app_context():
+        return [task_to_dict_for_json(t) for t in due_views(get_store().get_tasks(task_ids))]
+
+# Single timer thread that publishes task.due when the scheduler's next due time arrives
+due_notifier = DueNotifier(event_broker, _notifier_due_ids, due_scheduler.next_due_at, _notifier_fetch)
+
+# --- Helper Functions ---
 
-def parse_datetime_string_robust(date_str, time_str):
+def parse_datetime_string_robust(date_str, time_str, profile=None):
     """
     Parses date and time strings from frontend into a Python datetime object.
-    Uses dateutil.parser for flexibility.
     Assumes date_str is like 'DD/MM/YYYY' or 'MM/DD/YYYY'
     Assumes time_str is like 'H:MM AM/PM' or 'HH:MM'
+    Tries datetime_parser.UI_FORMATS, starting with the one that last worked for
+    `profile` (see parser_profile); returns None if none of them fits.
     """
     if not date_str or not time_str:
         log.warning("parse_datetime_string_robust called with empty date or time string.")
         return None
 
     try:
-        # Combine and let dateutil try to parse common formats
-        # Giving dayfirst=True hints towards DD/MM/YYYY if ambiguous
-        # You might need to pass the user's date format setting here
-        # For now, we'll try dayfirst=True as a common European format
-        # dt_str = f"{date_str} {time_str}"
-        # parsed_dt = parser.parse(dt_str, dayfirst=True) # Example: Prioritize DD/MM
-
-        # More robust: Try specific formats based on potential settings
-        # Assuming JS sends DD/MM/YYYY or MM/DD/YYYY based on setting
-        # And HH:MM or H:MM AM/PM based on setting
-        # For simplicity here, let's assume JS standardizes to YYYY-MM-DD HH:MM:SS before sending
-        # OR we parse common formats expected from the UI pickers
-        # Example assuming MM/DD/YYYY H:MM AM/PM or DD/MM/YYYY HH:MM
-        formats_to_try = [
-            '%m/%d/%Y %I:%M %p', # MM/DD/YYYY H:MM AM/PM
-            '%d/%m/%Y %I:%M %p', # DD/MM/YYYY H:MM AM/PM
-            '%m/%d/%Y %H:%M',   # MM/DD/YYYY HH:MM
-            '%d/%m/%Y %H:%M'    # DD/MM/YYYY HH:MM
-        ]
-        parsed_dt = None
-        for fmt in formats_to_try:
-            try:
-                parsed_dt = datetime.datetime.strptime(f"{date_str} {time_str}", fmt)
-                log.debug(f"Successfully parsed '{date_str} {time_str}' using format '{fmt}'")
-                break # Stop on first success
-            except ValueError:
-                continue # Try next format
-
-        if parsed_dt is None:
-             raise ValueError("Could not parse date/time with known formats")
-
-        log.debug(f"Parsed '{date_str} {time_str}' into datetime: {parsed_dt}")
-        return parsed_dt
+        parsed_dt = datetime_parser.parse_ui(date_str, time_str, profile)
     except Exception as e:
         log.error(f"Error parsing date/time string: '{date_str} {time_str}'. Error: {e}")
-        return None # Return None if parsing fails
+        return None
+    if parsed_dt is None:
+        log.error(f"Error parsing date/time string: '{date_str} {time_str}'. No known format matched")
+        return None
+    log.debug(f"Parsed '{date_str} {time_str}' into datetime: {parsed_dt}")
+    return parsed_dt
+
+def parser_profile(data=None):
+    """Whose format memory a parse uses: the payload's dateFormat setting, else the X-Client-Id header."""
+    setting = data.get('dateFormat') if isinstance(data, dict) else None
+    if setting in DATE_FORMAT_SETTINGS:
+        return setting
+    return request.headers.get('X-Client-Id') or None
+
+def parse_range_date(value, end=False):
+    """Parses a startDate/endDate parameter (ISO date or datetime); a plain endDate includes that day."""
+    parsed = datetime.datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += datetime.timedelta(days=1)
+    return parsed
+
+def page_request(order):
+    """
+    Reads the shared list parameters: 'filter' (last7/last30/last365/next7/next30/all),
+    'startDate'/'endDate', 'limit' and 'cursor'.
+    Returns (since, until, after, limit); limit is None (the whole list, as before
+    paging existed) when neither 'limit' nor 'cursor' is given. Raises ValueError
+    for malformed values.
+    """
+    args = request.args
+    since = parse_range_date(args['startDate']) if args.get('startDate') else None
+    until = parse_range_date(args['endDate'], end=True) if args.get('endDate') else None
+    range_filter = args.get('filter', 'all')
+    if range_filter != 'all':
+        if range_filter not in RANGE_FILTER_DAYS:
+            raise ValueError(f"Unknown filter '{range_filter}'")
+        # Whole days (from midnight), so a response only changes with the data or the date
+        days = RANGE_FILTER_DAYS[range_filter]
+        today = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+        if days < 0:
+            bound = today + datetime.timedelta(days=days)
+            since = max(since or bound, bound)
+        else:
+            bound = today + datetime.timedelta(days=days + 1)
+            until = min(until or bound, bound)
+    after = decode_cursor(args['cursor'], order) if args.get('cursor') else None
+    if 'limit' not in args and after is None:
+        return since, until, None, None
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+    return since, until, after, limit
+
+def fetch_limit(limit):
+    """Rows to fetch for a page of `limit` (one extra to detect a next page); None when unpaged."""
+    return None if limit is None else limit + 1
+
+def page_response(tasks, order, limit):
+    """
+    JSON list of the first `limit` tasks (all of them if limit is None); callers fetch
+    fetch_limit(limit) rows so a next page can be detected without a COUNT query.
+    Its cursor goes in the X-Next-Cursor header.
+    """
+    page = tasks[:limit]
+    response = json_list_response(page)
+    if limit is not None and len(tasks) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(sort_key(order, page[-1]))
+    return response
 
 def task_to_dict_for_json(task):
     """
@@ -84,23 +361,14 @@ def task_to_dict_for_json(task):
     JSON-serializable dictionary (converting datetimes to ISO strings).
     Handles None values for dates.
     """
-    if not isinstance(task, dict):
+    if not isinstance(task, (dict, Task)):
         log.error(f"Invalid task type passed to task_to_dict_for_json: {type(task)}")
         return None
+    return to_json_dict(task)
 
-    serializable_task = task.copy()
-    for key, value in serializable_task.items():
-        if isinstance(value, (datetime.datetime, datetime.date)):
-            serializable_task[key] = value.isoformat()
-        elif not isinstance(value, (str, int, float, bool, list, dict, type(None))):
-             log.warning(f"Task serialization: Unexpected type {type(value)} for key '{key}'. Converting to string.")
-             serializable_task[key] = str(value)
-    return serializable_task
-
-def get_priority_value(priority_str):
-    """Assigns a numerical value for sorting priorities."""
-    prio_map = {'priority-high': 3, 'priority-medium': 2, 'priority-low': 1}
-    return prio_map.get(priority_str, 0) # Default to 0 if unknown
+def json_list_response(tasks):
+    """JSON array response built from the per-task serialization cache."""
+    return Response(task_serializer.encode_list(tasks), mimetype='application/json')
 
 # --- Static File Serving ---
 
@@ -125,10 +393,11 @@ def index():
 # --- API Endpoints ---
 
 @app.route('/api/tasks', methods=['GET'])
+@conditional_list
 def get_tasks_by_date():
     """
     Gets active (not completed, not deleted) tasks for a specific date.
-    Requires 'date' query parameter (YYYY-MM-DD).
+    Optional 'date' query parameter (YYYY-MM-DD), defaults to today.
     Supports sorting by 'time' (default) or 'priority'.
     """
     date_filter_str = request.args.get('date')
@@ -136,10 +405,8 @@ def get_tasks_by_date():
     log.info(f"GET /api/tasks request. Date: {date_filter_str}, Sort: {sort_order}")
 
     if not date_filter_str:
-        log.warning("Missing 'date' query parameter for /api/tasks")
-        # Default to today if needed, but frontend should always provide it now
-        # target_date = datetime.date.today()
-        return jsonify({"error": "Missing 'date' query parameter (YYYY-MM-DD)"}), 400
+        # Frontend always provides it; other clients (assistant, tests) get today
+        target_date = datetime.date.today()
     else:
         try:
             target_date = datetime.datetime.strptime(date_filter_str, '%Y-%m-%d').date()
@@ -147,68 +414,51 @@ def get_tasks_by_date():
             log.error(f"Invalid date format received: {date_filter_str}")
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
 
-    tasks_to_return = []
     try:
-        # --- DB Interaction Placeholder ---
-        # Replace this loop with a database query:
-        # SELECT * FROM tasks WHERE date(dueDate) = target_date AND completed = false AND deletedAt IS NULL;
-        current_tasks_list = list(tasks.values())
-        for task in current_tasks_list:
-            due_date = task.get('dueDate')
-            # Check if active and matches the target date
-            if (not task.get('completed') and not task.get('deletedAt') and
-                    due_date and isinstance(due_date, datetime.datetime) and
-                    due_date.date() == target_date):
-                serializable = task_to_dict_for_json(task)
-                if serializable:
-                    tasks_to_return.append(serializable)
-
-        # --- Sorting ---
-        if sort_order == 'priority':
-            # Sort by priority (descending), then time (ascending)
-            tasks_to_return.sort(key=lambda x: (-get_priority_value(x.get('priority')),
-                                                  datetime.datetime.fromisoformat(x['dueDate'])))
-        else: # Default sort by time (ascending)
-            tasks_to_return.sort(key=lambda x: datetime.datetime.fromisoformat(x['dueDate']))
-
-        log.info(f"Returning {len(tasks_to_return)} tasks for {target_date} (sorted by {sort_order}).")
-        return jsonify(tasks_to_return)
+        # Index range scan on dueDate plus lazily expanded recurring occurrences
+        day_tasks = tasks_in_window(get_store(), *day_bounds(target_date), sort=sort_order)
+        log.info(f"Returning {len(day_tasks)} tasks for {target_date} (sorted by {sort_order}).")
+        return json_list_response(day_tasks)
 
     except Exception as e:
          log.exception(f"Error in get_tasks_by_date")
          return jsonify({"error": "An internal server error occurred processing tasks"}), 500
 
 @app.route('/api/tasks/all', methods=['GET'])
+@conditional_list
 def get_all_active_tasks():
     """
-    Gets ALL active (not completed, not deleted) tasks.
-    Used for upcoming tasks view - filtering should ideally happen here based on query params.
+    Gets active (not completed, not deleted) tasks for the upcoming view, by due date.
+    Optional 'startDate'/'endDate' or 'filter=next7/next30' bound dueDate; pages are
+    'limit' long and the next one is requested with '?cursor=<X-Next-Cursor>'.
+    Recurring series are expanded from today (or startDate) for UPCOMING_SERIES_DAYS days
+    (or up to endDate).
     """
     log.info("GET /api/tasks/all request received.")
-    # --- Filtering Placeholder ---
-    # TODO: Add optional query parameters like 'startDate', 'endDate', 'limit'
-    # filter_param = request.args.get('filter') # e.g., 'next7', 'next30'
-    # Implement filtering logic based on dates
     try:
-        active_tasks = []
-        # --- DB Interaction Placeholder ---
-        # Replace with: SELECT * FROM tasks WHERE completed = false AND deletedAt IS NULL;
-        for task in tasks.values():
-             if not task.get('completed') and not task.get('deletedAt') and task.get('dueDate'):
-                 serializable = task_to_dict_for_json(task)
-                 if serializable:
-                     active_tasks.append(serializable)
-
-        # Sort by due date ascending
-        active_tasks.sort(key=lambda x: datetime.datetime.fromisoformat(x['dueDate']))
-        log.info(f"Returning {len(active_tasks)} total active tasks (no server-side filtering applied).")
-        return jsonify(active_tasks)
+        start, end, after, limit = page_request('due')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        store = get_store()
+        # Keyset page of stored tasks, merged with the series occurrences that follow the cursor
+        upcoming = store.upcoming_tasks(start, end, after, fetch_limit(limit))
+        window_start = start or datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+        window_end = end or window_start + datetime.timedelta(days=UPCOMING_SERIES_DAYS)
+        if window_start < window_end:
+            occurrences = expand_series(store, store.series_between(window_start, window_end),
+                                        window_start, window_end)
+            upcoming.extend(t for t in occurrences if after is None or sort_key('due', t) > after)
+            upcoming.sort(key=lambda t: sort_key('due', t))
+        log.info(f"Returning up to {limit or 'all'} of {len(upcoming)} fetched active tasks.")
+        return page_response(upcoming, 'due', limit)
     except Exception as e:
         log.exception("Error in get_all_active_tasks")
         return jsonify({"error": "An internal server error occurred getting all tasks"}), 500
 
 
 @app.route('/api/tasks/month', methods=['GET'])
+@conditional_list
 def get_tasks_by_month():
     """
     Gets active (not completed, not deleted) tasks for a specific month and year.
@@ -226,22 +476,10 @@ def get_tasks_by_month():
         if not (1 <= month <= 12):
              return jsonify({"error": "Invalid 'month' parameter. Must be between 1 and 12."}), 400
 
-        tasks_for_month = []
-        # --- DB Interaction Placeholder ---
-        # Replace with: SELECT * FROM tasks WHERE strftime('%Y-%m', dueDate) = '{year}-{month:02d}' AND completed = false AND deletedAt IS NULL;
-        current_tasks_list = list(tasks.values())
-        for task in current_tasks_list:
-            due_date = task.get('dueDate')
-            if (not task.get('completed') and not task.get('deletedAt') and
-                    due_date and isinstance(due_date, datetime.datetime) and
-                    due_date.year == year and due_date.month == month):
-                serializable = task_to_dict_for_json(task)
-                if serializable:
-                    tasks_for_month.append(serializable)
-
-        tasks_for_month.sort(key=lambda x: datetime.datetime.fromisoformat(x['dueDate']))
-        log.info(f"Returning {len(tasks_for_month)} tasks for {year}-{month:02d}.")
-        return jsonify(tasks_for_month)
+        # Index range scan over [first of month, first of next month) plus series occurrences
+        month_tasks = tasks_in_window(get_store(), *month_bounds(year, month))
+        log.info(f"Returning {len(month_tasks)} tasks for {year}-{month:02d}.")
+        return json_list_response(month_tasks)
 
     except ValueError:
         log.error(f"Invalid year/month format: year={year_str}, month={month_str}")
@@ -251,16 +489,19 @@ def get_tasks_by_month():
         return jsonify({"error": "An internal server error occurred getting month tasks"}), 500
 
 
-@app.route('/api/tasks', methods=['POST'])
-def add_task_route():
-    """Adds a new task based on JSON data from the frontend."""
-    log.info("POST /api/tasks request received.")
-    if not request.is_json:
-        return jsonify({"error": "Request must be JSON"}), 400
-
-    data = request.json
-    log.debug(f"Received task data: {data}")
+def _payload_datetime(data, key):
+    value = data.get(key)
+    return datetime.datetime.fromisoformat(value) if value else None
 
+def task_from_payload(data, imported=False, profile=None):
+    """
+    Validates one task payload and builds a Task; raises ValueError with a user-facing message.
+    The UI sends dueDate + dueTime (see parse_datetime_string_robust); imported rows
+    (bulk/export format) may instead carry an ISO dueDate and their stored state
+    (completed, deletedAt, ..., and their source 'id' for linking recurring instances).
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Task must be a JSON object")
     description = data.get('description')
     due_date_str = data.get('dueDate')
     due_time_str = data.get('dueTime')
@@ -269,177 +510,424 @@ def add_task_route():
     custom_repeat_days = data.get('customRepeatDays', [])
     repeat_until_str = data.get('repeatUntil') # NEW
 
-    if not description: # Basic validation
-        return jsonify({"error": "Task description cannot be empty"}), 400
+    if not description or not isinstance(description, str): # Basic validation
+        raise ValueError("Task description cannot be empty")
     if len(description) > 150: # Example validation
-        return jsonify({"error": "Task description exceeds 150 characters"}), 400
-    if not due_date_str or not due_time_str:
-         return jsonify({"error": "Missing due date or time"}), 400
-
-    due_date_obj = parse_datetime_string_robust(due_date_str, due_time_str)
+        raise ValueError("Task description exceeds 150 characters")
+    if not due_date_str or not (due_time_str or imported):
+        raise ValueError("Missing due date or time")
+    if repeat_frequency not in ('none',) + FREQUENCIES:
+        raise ValueError(f"Unknown repeat frequency '{repeat_frequency}'")
+    if repeat_frequency == 'custom' and not custom_repeat_days:
+        raise ValueError("Select at least one day for a custom repeat")
+
+    if due_time_str:
+        due_date_obj = parse_datetime_string_robust(due_date_str, due_time_str, profile)
+    else:
+        try:
+            due_date_obj = datetime.datetime.fromisoformat(due_date_str)
+        except (TypeError, ValueError):
+            due_date_obj = None
     if not due_date_obj:
-         return jsonify({"error": "Invalid date or time format provided"}), 400
+        raise ValueError("Invalid date or time format provided")
 
     repeat_until_obj = None
     if repeat_until_str:
         try:
             # Assuming repeatUntil is sent as YYYY-MM-DD or similar parseable format
-            repeat_until_obj = parser.parse(repeat_until_str).date()
+            repeat_until_obj = dateutil_parser.parse(repeat_until_str).date()
         except Exception as e:
             log.warning(f"Could not parse repeatUntil date '{repeat_until_str}': {e}")
             # Decide how to handle - ignore, error, or default? Ignoring for now.
             repeat_until_obj = None
 
-    task_id = generate_task_id()
-    new_task = {
-        "id": task_id,
-        "description": description,
-        "dueDate": due_date_obj, # Store as datetime
-        "priority": priority,
-        "repeatFrequency": repeat_frequency,
-        "customRepeatDays": custom_repeat_days,
-        "repeatUntil": repeat_until_obj, # Store as date or None (NEW)
-        "completed": False,
-        "createdAt": datetime.datetime.now(),
-        "completedAt": None,
-        "deletedAt": None,
-        # Placeholders for full recurring logic (not implemented)
-        "isRecurringInstance": False,
-        "originalTaskId": None,
-    }
-
-    # --- DB Interaction Placeholder ---
-    # Replace with: INSERT INTO tasks (...) VALUES (...);
-    tasks[task_id] = new_task
-    log.info(f"Task added (ID: {task_id}): {description}")
-
-    # --- Recurring Task Generation Placeholder ---
-    # TODO: Implement complex logic to generate future instances based on
-    # repeat_frequency, customRepeatDays, repeatUntil, and store them.
-    # This is non-trivial and likely requires a separate task scheduling system
-    # or generating instances on-the-fly when requested.
-    # For now, only the initial task is created.
+    task = Task(
+        description=description,
+        dueDate=due_date_obj, # Store as datetime
+        priority=priority, # validated into a Priority
+        repeatFrequency=repeat_frequency,
+        customRepeatDays=custom_repeat_days,
+        repeatUntil=repeat_until_obj, # Store as date or None (NEW)
+        createdAt=datetime.datetime.now(),
+        # A series is stored once; occurrences are expanded per query (see recurrence.py)
+        isRecurringInstance=False,
+    )
+    if imported:
+        task.update(
+            id=data.get('id'), # source id; the store remaps originalTaskId links within a batch
+            completed=bool(data.get('completed')),
+            completedAt=_payload_datetime(data, 'completedAt') or (due_date_obj if data.get('completed') else None),
+            deletedAt=_payload_datetime(data, 'deletedAt'),
+            snoozedUntil=_payload_datetime(data, 'snoozedUntil'),
+            snoozeDuration=data.get('snoozeDuration'),
+            createdAt=_payload_datetime(data, 'createdAt') or task.createdAt,
+            isRecurringInstance=bool(data.get('isRecurringInstance')),
+            originalTaskId=data.get('originalTaskId'),
+            occurrenceDate=_payload_datetime(data, 'occurrenceDate'),
+        )
+    return task
+
+@app.route('/api/tasks', methods=['POST'])
+def add_task_route():
+    """Adds a new task based on JSON data from the frontend."""
+    log.info("POST /api/tasks request received.")
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+
+    data = request.json
+    log.debug(f"Received task data: {data}")
+    try:
+        new_task = task_from_payload(data, profile=parser_profile(data))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    new_task = get_store().add_task(new_task) # id assigned by AUTOINCREMENT
+    task_id = new_task['id']
+    notify_task_change('task.added', new_task)
+    log.info(f"Task added (ID: {task_id}): {new_task['description']}")
 
     serializable_task = task_to_dict_for_json(new_task)
     if not serializable_task:
          return jsonify({"error": "Failed to process newly added task"}), 500
     return jsonify(serializable_task), 201
 
+class BulkRejected(Exception):
+    """A bulk row was invalid and the import is strict."""
+
+def bulk_rows():
+    """(line number, payload) pairs from an NDJSON body (read line by line) or a JSON array."""
+    if request.mimetype in NDJSON_MIMETYPES:
+        for line_no, raw in enumerate(request.stream, 1):
+            if raw.strip():
+                yield line_no, raw
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            raise ValueError("Body must be NDJSON or a JSON array of tasks")
+        yield from enumerate(data, 1)
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+def bulk_add_tasks_route():
+    """
+    Imports many tasks in one storage transaction.
+    Body: NDJSON (Content-Type application/x-ndjson, one task per line, streamed) or a JSON
+    array. Rows use the POST /api/tasks fields or the /api/tasks/export format.
+    Invalid rows are skipped and reported by line; with '?strict=true' nothing is stored
+    if any row is invalid.
+    """
+    strict = request.args.get('strict', 'false').lower() == 'true'
+    log.info(f"POST /api/tasks/bulk request received. Strict: {strict}")
+    errors = []
+    error_count = 0
+
+    def valid_tasks():
+        nonlocal error_count
+        for line_no, row in bulk_rows():
+            try:
+                if isinstance(row, bytes):
+                    row = json.loads(row)
+                yield task_from_payload(row, imported=True, profile=parser_profile(row))
+            except (TypeError, ValueError) as e:
+                error_count += 1
+                if len(errors) < MAX_BULK_ERRORS:
+                    errors.append({"line": line_no, "error": str(e)})
+                if strict:
+                    raise BulkRejected() from e
+
+    try:
+        ids = get_store().add_tasks(valid_tasks())
+    except BulkRejected:
+        log.warning(f"Strict bulk import rejected: {errors[0]}")
+        return jsonify({"inserted": 0, "ids": [], "errors": errors, "errorCount": error_count}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if ids:
+        notify_bulk_change('bulk_import', len(ids))
+    log.info(f"Bulk import stored {len(ids)} tasks, {error_count} rows rejected.")
+    return jsonify({"inserted": len(ids), "ids": ids, "errors": errors, "errorCount": error_count}), 201
+
+@app.route('/api/tasks/export', methods=['GET'])
+def export_tasks_route():
+    """Streams every task (any state) as NDJSON in id order; /api/tasks/bulk re-imports it."""
+    log.info("GET /api/tasks/export request received.")
+
+    def generate():
+        # The store is opened here: the view's own connection is closed when it returns
+        for task in get_store().iter_tasks():
+            yield task_serializer.encode_uncached(task) + b'\n'
+
+    filename = f"manageme-tasks-{datetime.date.today():%Y%m%d}.ndjson"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# --- Task Operations ---
+# Shared by the single-task routes and POST /api/tasks/batch. Each returns
+# (response payload, [(event type, changed task)]) and raises TaskOpError instead
+# of returning an error response; callers notify only after their changes are committed.
+
+SNOOZE_DURATIONS = {'10m': datetime.timedelta(minutes=10), '1h': datetime.timedelta(hours=1),
+                    '1d': datetime.timedelta(days=1)}
+
+class TaskOpError(Exception):
+    """A task operation was rejected; `status` is the HTTP status for the single-task route."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def parse_occurrence(value):
+    """Parses an 'occurrence' ISO datetime (query parameter or batch field)."""
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise TaskOpError("Invalid 'occurrence' parameter. Use ISO format.")
+
+def op_complete(store, task_id, occurrence=None, series=False):
+    """
+    Marks a task complete. For a recurring series: completes one occurrence (default the
+    current one), or with series=True ends the whole series; series=True on a
+    materialized occurrence also ends its series.
+    """
+    task = store.get_task(task_id)
+    if not task or task.get('deletedAt'):
+        log.warning(f"Complete task failed: Task not found (ID: {task_id})")
+        raise TaskOpError("Task not found", 404)
+    now = datetime.datetime.now()
+    if is_series(task) and not series and not task.get('completed'):
+        occurrence = occurrence or scheduled_due(task, store, now)
+        if occurrence is None:
+            raise TaskOpError("Series has no remaining occurrences")
+        instance = materialize_occurrence(store, task, occurrence, completed=True, completedAt=now)
+        log.info(f"Occurrence {occurrence.isoformat()} of series {task_id} completed (instance ID: {instance['id']})")
+        return ({"message": "Occurrence marked as complete", "id": instance['id'],
+                 "occurrenceDate": occurrence.isoformat()}, [('task.completed', instance)])
+    events = []
+    if series and task.get('originalTaskId'):
+        parent = store.get_task(task['originalTaskId'])
+        if parent and not parent.get('completed'):
+            changes = {"completed": True, "completedAt": now}
+            store.update_task(parent['id'], **changes)
+            parent.update(changes)
+            events.append(('task.completed', parent))
+    if task.get('completed'):
+        log.info(f"Task already complete (ID: {task_id})")
+        return {"message": "Task already complete"}, events
+    changes = {"completed": True, "completedAt": now}
+    store.update_task(task_id, **changes)
+    task.update(changes)
+    log.info(f"Task completed (ID: {task_id})")
+    return {"message": "Task marked as complete"}, events + [('task.completed', task)]
+
+def op_delete(store, task_id, occurrence=None):
+    """Soft deletes a task (sets deletedAt); for a series, `occurrence` deletes just that occurrence."""
+    task = store.get_task(task_id)
+    if not task or task.get('deletedAt'):
+        log.warning(f"Soft delete failed: Task not found in active list (ID: {task_id})")
+        raise TaskOpError("Task not found in active list", 404)
+    now = datetime.datetime.now()
+    if occurrence and is_series(task):
+        instance = materialize_occurrence(store, task, occurrence, deletedAt=now)
+        log.info(f"Occurrence {occurrence.isoformat()} of series {task_id} deleted")
+        return ({"message": "Occurrence moved to deleted list", "id": instance['id']},
+                [('task.deleted', instance)])
+    # Completed tasks are moved as well
+    task['deletedAt'] = now
+    store.update_task(task_id, deletedAt=now)
+    log.info(f"Task soft deleted (ID: {task_id})")
+    return {"message": "Task moved to deleted list"}, [('task.deleted', task)]
+
+def op_snooze(store, task_id, duration, occurrence=None):
+    """Snoozes a task until now + duration ('10m', '1h', '1d'); a series snoozes one occurrence."""
+    if not duration:
+        raise TaskOpError("Missing 'duration' for snooze")
+    task = store.get_task(task_id)
+    if not task:
+        log.warning(f"Snooze failed: Task not found (ID: {task_id})")
+        raise TaskOpError("Task not found", 404)
+    if task.get('completed') or task.get('deletedAt'):
+        raise TaskOpError("Cannot snooze completed or deleted task")
+    if not isinstance(task.get('dueDate'), datetime.datetime):
+        raise TaskOpError("Task has invalid due date")
+    if duration not in SNOOZE_DURATIONS:
+        raise TaskOpError("Invalid snooze duration")
+    now = datetime.datetime.now()
+    # Calculate new due date based on NOW, not original due date
+    new_due_date = now + SNOOZE_DURATIONS[duration]
+    if is_series(task):
+        # Snooze the current occurrence, not the series: it becomes its own row
+        occurrence = occurrence or scheduled_due(task, store, now)
+        if occurrence is None:
+            raise TaskOpError("Series has no remaining occurrences")
+        task = materialize_occurrence(store, task, occurrence)
+    changes = {"dueDate": new_due_date, "snoozedUntil": new_due_date, "snoozeDuration": duration}
+    store.update_task(task['id'], **changes)
+    task.update(changes)
+    log.info(f"Task {task['id']} snoozed until {new_due_date.isoformat()}")
+    return ({"message": f"Task snoozed until {new_due_date.isoformat()}",
+             "snoozedUntil": new_due_date.isoformat()}, [('task.snoozed', task)])
+
+def op_restore(store, task_id):
+    """Restores a task from the deleted list back to the active tasks list."""
+    task = store.get_task(task_id)
+    if not task or not task.get('deletedAt'):
+        log.warning(f"Restore failed: Task not found in deleted list (ID: {task_id})")
+        raise TaskOpError("Task not found in deleted list", 404)
+    # Restore implies making it active again, so clear completion status too
+    changes = {"deletedAt": None, "completed": False, "completedAt": None}
+    store.update_task(task_id, **changes)
+    task.update(changes)
+    log.info(f"Task restored (ID: {task_id})")
+    return {"message": "Task restored successfully"}, [('task.restored', task)]
+
+def op_purge(store, task_id):
+    """Permanently deletes a soft-deleted task."""
+    task = store.get_task(task_id)
+    if not task or not store.purge(task_id):
+        log.warning(f"Permanent delete failed: Task not found in deleted list (ID: {task_id})")
+        raise TaskOpError("Task not found in deleted list", 404)
+    log.info(f"Task permanently deleted (ID: {task_id})")
+    return {"message": "Task permanently deleted"}, [('task.purged', task)]
+
+def run_task_op(op, *args, **kwargs):
+    """Runs one operation for a single-task route and turns the outcome into a response."""
+    try:
+        payload, events = op(get_store(), *args, **kwargs)
+    except TaskOpError as e:
+        return jsonify({"error": e.message}), e.status
+    for event_type, task in events:
+        notify_task_change(event_type, task)
+    return jsonify(payload), 200
+
 @app.route('/api/tasks/<int:task_id>/complete', methods=['POST'])
 def complete_task(task_id):
-    """Marks a specific task as complete."""
-    # --- Recurring Task Completion Placeholder ---
-    # TODO: Add query parameter '?series=true' if frontend sends it.
-    # Based on that, implement logic to find and mark/delete future instances.
-    # This is complex and NOT implemented here.
+    """
+    Marks a specific task as complete.
+    For a recurring series: completes one occurrence ('?occurrence=ISO', default the
+    current one), or with '?series=true' ends the whole series. '?series=true' on a
+    materialized occurrence also ends its series.
+    """
     complete_series = request.args.get('series', 'false').lower() == 'true'
     log.info(f"POST /api/tasks/{task_id}/complete request. Complete series: {complete_series}")
-
-    # --- DB Interaction Placeholder ---
-    # Replace with: UPDATE tasks SET completed = true, completedAt = NOW() WHERE id = task_id;
-    # If complete_series, add logic to find and update/delete related recurring tasks.
-    if task_id in tasks:
-        if not tasks[task_id].get('completed'):
-            tasks[task_id]['completed'] = True
-            tasks[task_id]['completedAt'] = datetime.datetime.now()
-            log.info(f"Task completed (ID: {task_id})")
-            return jsonify({"message": "Task marked as complete"}), 200
-        else:
-            log.info(f"Task already complete (ID: {task_id})")
-            return jsonify({"message": "Task already complete"}), 200
-    else:
-        log.warning(f"Complete task failed: Task not found (ID: {task_id})")
-        return jsonify({"error": "Task not found"}), 404
+    try:
+        occurrence = parse_occurrence(request.args.get('occurrence'))
+    except TaskOpError as e:
+        return jsonify({"error": e.message}), e.status
+    return run_task_op(op_complete, task_id, occurrence, series=complete_series)
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task_route(task_id):
-    """Soft deletes a task (moves to deleted_tasks)."""
+    """
+    Soft deletes a task (sets deletedAt).
+    For a recurring series '?occurrence=ISO' deletes just that occurrence; without it
+    the whole series is deleted.
+    """
     log.info(f"DELETE /api/tasks/{task_id} request received.")
-    # --- DB Interaction Placeholder ---
-    # Replace with: UPDATE tasks SET deletedAt = NOW() WHERE id = task_id;
-    # (Or move to a separate 'deleted_tasks' table)
-    if task_id in tasks:
-        # Check if it's already marked completed; if so, handle differently?
-        # For simplicity now, just move it regardless of completed status.
-        task_to_delete = tasks.pop(task_id)
-        task_to_delete['deletedAt'] = datetime.datetime.now()
-        deleted_tasks[task_id] = task_to_delete
-        log.info(f"Task soft deleted (ID: {task_id})")
-        return jsonify({"message": "Task moved to deleted list"}), 200
-    else:
-        log.warning(f"Soft delete failed: Task not found in active list (ID: {task_id})")
-        return jsonify({"error": "Task not found in active list"}), 404
+    try:
+        occurrence = parse_occurrence(request.args.get('occurrence'))
+    except TaskOpError as e:
+        return jsonify({"error": e.message}), e.status
+    return run_task_op(op_delete, task_id, occurrence)
 
-# --- Snooze Placeholder ---
 @app.route('/api/tasks/<int:task_id>/snooze', methods=['POST'])
 def snooze_task(task_id):
-     """Snoozes a task by updating its due date."""
-     log.info(f"POST /api/tasks/{task_id}/snooze request.")
-     if not request.is_json:
-         return jsonify({"error": "Request must be JSON"}), 400
-     data = request.json
-     duration = data.get('duration') # e.g., '10m', '1h', '1d'
-
-     if not duration:
-         return jsonify({"error": "Missing 'duration' for snooze"}), 400
-
-     # --- DB Interaction Placeholder ---
-     # Replace with: SELECT dueDate FROM tasks WHERE id = task_id;
-     #              UPDATE tasks SET dueDate = new_due_date WHERE id = task_id;
-     if task_id in tasks:
-         task = tasks[task_id]
-         if task.get('completed') or task.get('deletedAt'):
-              return jsonify({"error": "Cannot snooze completed or deleted task"}), 400
-
-         current_due_date = task.get('dueDate')
-         if not current_due_date or not isinstance(current_due_date, datetime.datetime):
-              return jsonify({"error": "Task has invalid due date"}), 400
-
-         now = datetime.datetime.now()
-         # Calculate new due date based on NOW, not original due date
-         new_due_date = now
-         if duration == '10m':
-             new_due_date += datetime.timedelta(minutes=10)
-         elif duration == '1h':
-             new_due_date += datetime.timedelta(hours=1)
-         elif duration == '1d':
-             new_due_date += datetime.timedelta(days=1)
-         else:
-             return jsonify({"error": "Invalid snooze duration"}), 400
-
-         task['dueDate'] = new_due_date
-         log.info(f"Task {task_id} snoozed until {new_due_date.isoformat()}")
-         return jsonify({"message": f"Task snoozed until {new_due_date.isoformat()}"}), 200
-     else:
-         log.warning(f"Snooze failed: Task not found (ID: {task_id})")
-         return jsonify({"error": "Task not found"}), 404
+    """Snoozes a task by updating its due date (a series snoozes its current or '?occurrence=' occurrence)."""
+    log.info(f"POST /api/tasks/{task_id}/snooze request.")
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    try:
+        occurrence = parse_occurrence(request.args.get('occurrence'))
+    except TaskOpError as e:
+        return jsonify({"error": e.message}), e.status
+    return run_task_op(op_snooze, task_id, request.json.get('duration'), occurrence) # e.g., '10m', '1h', '1d'
+
+BATCH_OPERATIONS = {
+    'complete': lambda store, item: op_complete(store, item['id'], parse_occurrence(item.get('occurrence')),
+                                                series=bool(item.get('series'))),
+    'delete': lambda store, item: op_delete(store, item['id'], parse_occurrence(item.get('occurrence'))),
+    'snooze': lambda store, item: op_snooze(store, item['id'], item.get('duration'),
+                                            parse_occurrence(item.get('occurrence'))),
+    'restore': lambda store, item: op_restore(store, item['id']),
+    'purge': lambda store, item: op_purge(store, item['id']),
+}
+MAX_BATCH_OPERATIONS = 1000
+
+class BatchRolledBack(Exception):
+    """At least one batch item failed; the transaction is rolled back."""
+
+@app.route('/api/tasks/batch', methods=['POST'])
+def batch_tasks_route():
+    """
+    Applies a list of task operations atomically, in one storage transaction.
+    Body: {"operations": [{"op": "complete"|"delete"|"snooze"|"restore"|"purge", "id": 1,
+    "duration": "1h", "occurrence": "ISO", "series": true}, ...]} (or the bare list).
+    Returns per-item results; if any item fails nothing is applied (409).
+    """
+    data = request.get_json(silent=True)
+    operations = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"error": "Body must contain a non-empty 'operations' list"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+    log.info(f"POST /api/tasks/batch request with {len(operations)} operations.")
+
+    store = get_store()
+    results, events = [], []
+    try:
+        with store.transaction():
+            for index, item in enumerate(operations):
+                try:
+                    if not isinstance(item, dict) or item.get('op') not in BATCH_OPERATIONS:
+                        raise TaskOpError(f"Unknown operation; expected one of {sorted(BATCH_OPERATIONS)}")
+                    if not isinstance(item.get('id'), int):
+                        raise TaskOpError("Each operation needs an integer 'id'")
+                    payload, item_events = BATCH_OPERATIONS[item['op']](store, item)
+                except TaskOpError as e:
+                    results.append({"index": index, "ok": False, "status": e.status, "error": e.message})
+                    continue
+                results.append(dict(payload, index=index, ok=True))
+                events.extend(item_events)
+            if not all(r['ok'] for r in results):
+                raise BatchRolledBack()
+    except BatchRolledBack:
+        log.warning("Batch rolled back: " + "; ".join(r['error'] for r in results if not r['ok']))
+        return jsonify({"applied": False, "results": results}), 409
+    for event_type, task in events:
+        notify_task_change(event_type, task)
+    return jsonify({"applied": True, "results": results}), 200
+
+@app.route('/api/tasks/snoozed', methods=['GET'])
+def get_snoozed_tasks_route():
+    """Gets active tasks whose snooze has not yet expired, soonest first."""
+    log.info("GET /api/tasks/snoozed request received.")
+    try:
+        snoozed_list = get_store().snoozed_tasks(datetime.datetime.now())
+        log.info(f"Returning {len(snoozed_list)} snoozed tasks.")
+        return json_list_response(snoozed_list)
+    except Exception as e:
+        log.exception("Error in get_snoozed_tasks_route")
+        return jsonify({"error": "An internal server error occurred getting snoozed tasks"}), 500
 
 
 @app.route('/api/completed_tasks', methods=['GET'])
+@conditional_list
 def get_completed_tasks_route():
-    """Gets all tasks marked as completed AND not soft-deleted."""
+    """
+    Gets tasks marked as completed AND not soft-deleted.
+    'filter=last7/last30/last365' or 'startDate'/'endDate' bound completedAt;
+    paged with 'limit'/'cursor' (see page_request).
+    """
     log.info("GET /api/completed_tasks request received.")
-    # --- Filtering Placeholder ---
-    # TODO: Add query parameter like 'filter=last7/last30/etc'
-    # filter_param = request.args.get('filter', 'all')
-    # Implement date filtering based on 'completedAt'
     try:
-        completed_list = []
-        # --- DB Interaction Placeholder ---
-        # Replace with: SELECT * FROM tasks WHERE completed = true AND deletedAt IS NULL;
-        for t in tasks.values():
-             if t.get('completed') and not t.get('deletedAt'):
-                 serializable = task_to_dict_for_json(t)
-                 if serializable:
-                     completed_list.append(serializable)
-
-        # Sort by due date, then priority (as requested in feedback)
-        completed_list.sort(
-            key=lambda x: (datetime.datetime.fromisoformat(x['dueDate']),
-                           -get_priority_value(x.get('priority')))
-        )
-        log.info(f"Returning {len(completed_list)} completed tasks.")
-        return jsonify(completed_list)
+        since, until, after, limit = page_request('completed')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # Most recently completed first, keyset-paged on (completedAt, id) in SQL
+        completed = get_store().completed_tasks(since, until, after, fetch_limit(limit))
+        log.info(f"Returning up to {limit or 'all'} completed tasks.")
+        return page_response(completed, 'completed', limit)
     except Exception as e:
         log.exception("Error in get_completed_tasks_route")
         return jsonify({"error": "An internal server error occurred getting completed tasks"}), 500
@@ -447,23 +935,12 @@ def get_completed_tasks_route():
 # --- NEW: Delete All Completed ---
 @app.route('/api/completed_tasks/all', methods=['DELETE'])
 def delete_all_completed_route():
-    """Soft deletes ALL completed tasks (moves them to deleted_tasks)."""
+    """Soft deletes ALL completed tasks (sets deletedAt)."""
     log.info("DELETE /api/completed_tasks/all request received.")
     try:
-        ids_to_move = []
-        # --- DB Interaction Placeholder ---
-        # Replace with: SELECT id FROM tasks WHERE completed = true AND deletedAt IS NULL;
-        # Then loop through IDs and update/move
-        for task_id, task in list(tasks.items()): # Iterate over a copy of items
-            if task.get('completed') and not task.get('deletedAt'):
-                ids_to_move.append(task_id)
-
-        moved_count = 0
-        for task_id in ids_to_move:
-            task_to_delete = tasks.pop(task_id)
-            task_to_delete['deletedAt'] = datetime.datetime.now()
-            deleted_tasks[task_id] = task_to_delete
-            moved_count += 1
+        # Single UPDATE ... WHERE completed = 1 AND deletedAt IS NULL
+        moved_count = get_store().delete_all_completed(datetime.datetime.now())
+        notify_bulk_change('delete_all_completed', moved_count)
 
         log.info(f"Soft deleted {moved_count} completed tasks.")
         return jsonify({"message": f"{moved_count} completed tasks moved to deleted list"}), 200
@@ -473,21 +950,23 @@ def delete_all_completed_route():
 
 
 @app.route('/api/deleted_tasks', methods=['GET'])
+@conditional_list
 def get_deleted_tasks_route():
-    """Gets all tasks currently in the deleted_tasks dictionary."""
+    """
+    Gets soft-deleted tasks, most recently deleted first.
+    'filter=last7/last30/last365' or 'startDate'/'endDate' bound deletedAt;
+    paged with 'limit'/'cursor' (see page_request).
+    """
     log.info("GET /api/deleted_tasks request received.")
     try:
-        # --- DB Interaction Placeholder ---
-        # Replace with: SELECT * FROM tasks WHERE deletedAt IS NOT NULL; (if using flag)
-        # Or: SELECT * FROM deleted_tasks; (if using separate table)
-        deleted_list = [task_to_dict_for_json(t) for t in deleted_tasks.values() if t]
-        # Sort by deletion date descending
-        deleted_list.sort(
-            key=lambda x: datetime.datetime.fromisoformat(x['deletedAt']) if x.get('deletedAt') else datetime.datetime.min,
-            reverse=True
-        )
-        log.info(f"Returning {len(deleted_list)} deleted tasks.")
-        return jsonify(deleted_list)
+        since, until, after, limit = page_request('deleted')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        # Sorted by deletion date descending (deletedAt index)
+        deleted = get_store().deleted_tasks(since, until, after, fetch_limit(limit))
+        log.info(f"Returning up to {limit or 'all'} deleted tasks.")
+        return page_response(deleted, 'deleted', limit)
     except Exception as e:
         log.exception("Error in get_deleted_tasks_route")
         return jsonify({"error": "An internal server error occurred getting deleted tasks"}), 500
@@ -496,21 +975,7 @@ def get_deleted_tasks_route():
 def restore_task_route(task_id):
     """Restores a task from the deleted list back to the active tasks list."""
     log.info(f"POST /api/deleted_tasks/{task_id}/restore request received.")
-    # --- DB Interaction Placeholder ---
-    # Replace with: UPDATE tasks SET deletedAt = NULL, completed = false, completedAt = NULL WHERE id = task_id;
-    # (Or move from deleted_tasks table back to tasks table)
-    if task_id in deleted_tasks:
-        task_to_restore = deleted_tasks.pop(task_id)
-        task_to_restore['deletedAt'] = None
-        # Restore implies making it active again, so clear completion status too
-        task_to_restore['completed'] = False
-        task_to_restore['completedAt'] = None
-        tasks[task_id] = task_to_restore
-        log.info(f"Task restored (ID: {task_id})")
-        return jsonify({"message": "Task restored successfully"}), 200
-    else:
-        log.warning(f"Restore failed: Task not found in deleted list (ID: {task_id})")
-        return jsonify({"error": "Task not found in deleted list"}), 404
+    return run_task_op(op_restore, task_id)
 
 # --- NEW: Restore All Deleted ---
 @app.route('/api/deleted_tasks/all/restore', methods=['POST'])
@@ -518,18 +983,9 @@ def restore_all_deleted_route():
     """Restores ALL tasks from the deleted list back to active."""
     log.info("POST /api/deleted_tasks/all/restore request received.")
     try:
-        ids_to_restore = list(deleted_tasks.keys()) # Get all keys before modifying
-        restored_count = 0
-        # --- DB Interaction Placeholder ---
-        # Replace with: UPDATE tasks SET deletedAt = NULL, completed = false, completedAt = NULL WHERE deletedAt IS NOT NULL;
-        for task_id in ids_to_restore:
-            if task_id in deleted_tasks: # Check again in case of concurrent requests
-                task_to_restore = deleted_tasks.pop(task_id)
-                task_to_restore['deletedAt'] = None
-                task_to_restore['completed'] = False
-                task_to_restore['completedAt'] = None
-                tasks[task_id] = task_to_restore
-                restored_count += 1
+        # Single UPDATE; also clears completion so restored tasks are active again
+        restored_count = get_store().restore_all()
+        notify_bulk_change('restore_all', restored_count) # many tasks re-activated
         log.info(f"Restored {restored_count} deleted tasks.")
         return jsonify({"message": f"{restored_count} tasks restored successfully"}), 200
     except Exception as e:
@@ -539,30 +995,18 @@ def restore_all_deleted_route():
 
 @app.route('/api/deleted_tasks/<int:task_id>', methods=['DELETE'])
 def permanent_delete_task_route(task_id):
-    """Permanently deletes a task from the deleted_tasks dictionary."""
+    """Permanently deletes a soft-deleted task."""
     log.info(f"DELETE /api/deleted_tasks/{task_id} request received (Permanent).")
-    # --- DB Interaction Placeholder ---
-    # Replace with: DELETE FROM tasks WHERE id = task_id AND deletedAt IS NOT NULL;
-    # Or: DELETE FROM deleted_tasks WHERE id = task_id;
-    if task_id in deleted_tasks:
-        deleted_tasks.pop(task_id)
-        log.info(f"Task permanently deleted (ID: {task_id})")
-        return jsonify({"message": "Task permanently deleted"}), 200
-    else:
-        log.warning(f"Permanent delete failed: Task not found in deleted list (ID: {task_id})")
-        return jsonify({"error": "Task not found in deleted list"}), 404
+    return run_task_op(op_purge, task_id)
 
 # --- NEW: Delete All Permanently ---
 @app.route('/api/deleted_tasks/all', methods=['DELETE'])
 def permanent_delete_all_route():
-    """Permanently deletes ALL tasks from the deleted_tasks dictionary."""
+    """Permanently deletes ALL soft-deleted tasks."""
     log.info("DELETE /api/deleted_tasks/all request received (Permanent).")
     try:
-        # --- DB Interaction Placeholder ---
-        # Replace with: DELETE FROM tasks WHERE deletedAt IS NOT NULL;
-        # Or: DELETE FROM deleted_tasks;
-        count = len(deleted_tasks)
-        deleted_tasks.clear()
+        count = get_store().purge_all()
+        notify_bulk_change('purge_all', count)
         log.info(f"Permanently deleted {count} tasks from deleted list.")
         return jsonify({"message": f"{count} tasks permanently deleted"}), 200
     except Exception as e:
@@ -576,44 +1020,71 @@ def get_due_tasks_route():
     Checks for and returns ALL tasks that are currently due
     (due time is now or in the past, and not completed/deleted).
     Sorted by priority (desc) then due date (asc).
+    The X-Next-Due-At header tells clients when the next task becomes due.
     """
     log.info("GET /api/due_tasks request received.")
     now = datetime.datetime.now()
-    due_now_tasks = []
-    # --- DB Interaction Placeholder ---
-    # Replace with: SELECT * FROM tasks WHERE dueDate <= NOW() AND completed = false AND deletedAt IS NULL;
-    current_tasks_list = list(tasks.values())
-
-    for task in current_tasks_list:
-         due_date = task.get('dueDate')
-         if (not task.get('completed') and not task.get('deletedAt') and
-                 due_date and isinstance(due_date, datetime.datetime) and
-                 due_date <= now):
-              # Keep original task dict with datetime objects for sorting
-              due_now_tasks.append(task)
-
-    if not due_now_tasks:
-        log.info("No tasks currently due.")
-        return jsonify([]) # Return empty array if no tasks are due
-
-    # Sort due tasks: High > Medium > Low, then earliest due date first
-    due_now_tasks.sort(key=lambda t: (
-        -get_priority_value(t.get('priority')), # Negate priority score for descending
-        t['dueDate']                            # Ascending sort for dueDate
-    ))
+    scheduler = get_scheduler()
+    # Heap pops only the newly due tasks; ids come back High > Medium > Low, then earliest first
+    due_now_tasks = due_views(get_store().get_tasks(scheduler.due_ids(now)))
 
     log.info(f"Found {len(due_now_tasks)} due tasks.")
-    # Convert all due tasks to JSON serializable format
-    serializable_due_tasks = [task_to_dict_for_json(t) for t in due_now_tasks if t]
-    return jsonify(serializable_due_tasks)
+    # Convert all due tasks to JSON serializable format (empty array if none are due)
+    response = json_list_response(t for t in due_now_tasks if t)
+    next_due = scheduler.next_due_at()
+    if next_due:
+        response.headers['X-Next-Due-At'] = next_due.isoformat()
+    return response
+
+@app.route('/api/due_tasks/next', methods=['GET'])
+def get_next_due_route():
+    """
+    Returns when the next pending task becomes due, so clients can time their next check.
+    Returns JSON: {"nextDueAt": iso_string or null, "secondsUntilDue": float or null}
+    """
+    next_due = get_scheduler().next_due_at()
+    if next_due is None:
+        return jsonify({"nextDueAt": None, "secondsUntilDue": None})
+    seconds = max(0.0, (next_due - datetime.datetime.now()).total_seconds())
+    return jsonify({"nextDueAt": next_due.isoformat(), "secondsUntilDue": seconds})
+
+# --- Push Events (Server-Sent Events) ---
+
+@app.route('/api/events', methods=['GET'])
+def events_stream():
+    """
+    Streams task events as text/event-stream: task.due, task.added, task.completed,
+    task.snoozed, task.deleted, task.restored and tasks.changed (bulk changes).
+    Reconnecting clients send Last-Event-ID and receive any buffered events they missed.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = event_broker.subscribe(last_event_id)
+    due_notifier.start() # timer thread is shared by all subscribers
+    log.info(f"GET /api/events subscriber connected ({event_broker.subscriber_count} total).")
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                events = subscription.wait(SSE_HEARTBEAT_SECONDS)
+                if not events:
+                    yield ": keep-alive\n\n" # also detects closed connections
+                for event in events:
+                    yield format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscription)
+            log.info("GET /api/events subscriber disconnected.")
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # Add this function somewhere in app.py
 
 @app.route('/api/parse-datetime', methods=['POST'])
 def parse_datetime_natural():
     """
-    Parses a natural language date/time string using dateutil.parser.
-    Expects JSON: {"text": "natural language string"}
+    Parses a natural language date/time string (dateutil.parser rules, see datetime_parser.py).
+    Expects JSON: {"text": "natural language string", "dateFormat": "DDMMYYYY" | "MMDDYYYY" (optional)}
     Returns JSON: {"original": text, "iso": iso_string, "date_str": "DD/MM/YYYY", "time_str": "H:MM AM/PM"} or {"error": ...}
     """
     if not request.is_json:
@@ -630,16 +1101,15 @@ def parse_datetime_natural():
     log.info(f"/api/parse-datetime - Attempting to parse: '{text_to_parse}'")
 
     try:
-        # Use dateutil.parser - it's quite flexible
-        # dayfirst=True helps interpret ambiguous dates like 01/05/2025 as 1st May
-        parsed_dt = dateutil_parser.parse(text_to_parse, dayfirst=True, fuzzy=False)
-        # fuzzy=False tries to prevent matching parts of other words
+        # dateutil semantics (fuzzy=False) with dayfirst from the dateFormat setting (default
+        # DDMMYYYY, so 01/05/2025 is 1st May); common shapes skip dateutil (datetime_parser.py)
+        parsed_dt = datetime_parser.parse_text(text_to_parse, parser_profile(data))
 
         # You might want to return components formatted according to user settings,
         # but sending back standard formats (ISO, and maybe common UI formats)
         # gives the frontend flexibility.
 
-        # Note: We don't know user's settings (12/24hr, DDMM/MMDD) here easily.
+        # dateFormat (if sent) only picks dayfirst; the 12/24hr setting is unknown here.
         # Let's return ISO and common formats. Frontend can use what it needs.
         response_data = {
             "original": text_to_parse,
@@ -668,18 +1138,141 @@ def parse_datetime_natural():
 # Ensure this new route is within your Flask app structure
 # (e.g., before the `if __name__ == '__main__':` block)
 
-# --- Placeholder for BLE/STT ---
-@app.route('/api/receive_ble_data', methods=['POST'])
+# --- AI Assistant ---
+@app.route('/api/ai/assist', methods=['POST'])
+def ai_assist_route():
+    """
+    Interprets a conversation (configured provider, rule-based fallback) and applies the resulting action.
+    Expects JSON: {"message": "...", "sessionId": "..."} with only the new turn; omit sessionId
+    to start a session (the server keeps the history, see conversations.py).
+    The stateless form {"messages": [{"role": "user", "content": "..."}]} is still accepted.
+    Returns JSON: {"intent": ..., "message": ..., "refresh": bool, "source": "provider"|"cache"|"fallback",
+                   "sessionId": ... (session form only)}
+    """
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    data = request.json
+    text = data.get('message')
+    if text is not None and (not isinstance(text, str) or not text.strip()):
+        return jsonify({"error": "'message' must be a non-empty string"}), 400
+    try:
+        if text is None:
+            messages = data.get('messages') or []
+            log.info(f"POST /api/ai/assist request with {len(messages)} message(s).")
+            result = assistant_engine.interpret(messages)
+            outcome = apply_actions(result, get_db())
+            session_id = None
+        else:
+            conversation = conversations.open(data.get('sessionId'))
+            log.info(f"POST /api/ai/assist turn for session {conversation.id}.")
+            with conversation.lock:
+                conversation.add('user', text)
+                result = conversation.resolve(assistant_engine.interpret(conversation.messages()))
+                outcome = apply_actions(result, get_db())
+                conversation.remember(result)
+                conversation.add('assistant', outcome.get('message') or '')
+            session_id = conversation.id
+        if outcome.get('refresh'):
+            notify_bulk_change('assistant') # assistant writes SQL directly
+        response = {
+            "intent": result['intent'],
+            "message": outcome.get('message'),
+            "refresh": bool(outcome.get('refresh')),
+            "source": result.get('source'),
+        }
+        if session_id is not None:
+            response["sessionId"] = session_id
+        return jsonify(response), 200
+    except Exception as e:
+        log.exception("Error in ai_assist_route")
+        return jsonify({"error": "An internal server error occurred in the assistant"}), 500
+
+@app.route('/api/ai/sessions/<session_id>', methods=['DELETE'])
+def end_ai_session(session_id):
+    """Ends an assistant conversation session (they also expire when idle)."""
+    if not conversations.close(session_id):
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({"message": "Session ended"}), 200
+
+# --- Wearable Ingestion (BLE gateway -> STT -> assistant) ---
+@app.route('/api/receive_ble_data', methods=['GET', 'POST'])
 def receive_ble_data():
-    """ Placeholder for receiving audio/commands from ESP32 """
-    log.warning("Received call to placeholder /api/receive_ble_data")
-    # TODO: Implement BLE reception, STT call, parsing, and task creation/modification
-    return jsonify({"error": "BLE/STT endpoint not implemented"}), 501
+    """
+    Streaming ingestion of wearable frames forwarded by the BLE gateway (see ble_ingest.py).
+    POST body: NDJSON, read line by line, one frame per line:
+        {"device", "stream", "seq", "kind": "audio"|"command", "data", "final", "pressedAt"}
+    A stream's frames may arrive out of order and over several requests. Every stream this
+    request completes is transcribed, run through the assistant and reported with its
+    latency from button press (pressedAt, else first frame) to applied action.
+    Returns JSON: {"accepted": n, "errors": [...], "errorCount": n, "results": [...]}
+    GET returns ingestion stats (streams, per-device counters, latency percentiles).
+    """
+    if request.method == 'GET':
+        return jsonify(ble_ingest.stats()), 200
+    accepted = 0
+    errors = []
+    error_count = 0
+    completed = []
+    for line_no, raw in enumerate(request.stream, 1):
+        if not raw.strip():
+            continue
+        try:
+            future = ble_ingest.add(Frame.from_json(json.loads(raw)))
+        except ValueError as e: # FrameError and invalid JSON
+            error_count += 1
+            if len(errors) < MAX_BULK_ERRORS:
+                errors.append({"line": line_no, "error": str(e)})
+            continue
+        accepted += 1
+        if future is not None:
+            completed.append(future)
+
+    results = []
+    refresh = False
+    for future in completed:
+        try:
+            utterance = future.result(timeout=STT_TIMEOUT)
+        except Exception as e:
+            log.warning(f"BLE utterance failed: {e}")
+            results.append({"error": str(e) or "Speech recognition timed out"})
+            continue
+        result = assistant_engine.interpret([{'role': 'user', 'content': utterance.transcript}])
+        outcome = apply_actions(result, get_db())
+        refresh = refresh or bool(outcome.get('refresh'))
+        latency = ble_ingest.record_latency(utterance)
+        log.info(f"BLE {utterance.device}/{utterance.stream}: '{utterance.transcript}' -> "
+                 f"{result['intent']} in {latency['total_ms']} ms")
+        results.append({"device": utterance.device, "stream": utterance.stream,
+                        "transcript": utterance.transcript, "intent": result['intent'],
+                        "message": outcome.get('message'), "latency": latency})
+    if refresh:
+        notify_bulk_change('wearable') # assistant writes SQL directly
+    status = 400 if error_count and not accepted else 200
+    return jsonify({"accepted": accepted, "errors": errors, "errorCount": error_count,
+                    "results": results}), status
 
 # --- Main Execution ---
+def serve(host=None, port=None):
+    """
+    Runs the API on $MANAGEME_HOST:$MANAGEME_PORT (0.0.0.0:5000 by default: reachable on
+    the local network). With gevent installed every connection is a greenlet, so idle
+    /api/events subscribers cost no thread; MANAGEME_SERVER=threaded (or no gevent)
+    uses Flask's threaded debug server, which holds one thread per open stream.
+    For gunicorn, see gunicorn.conf.py.
+    """
+    host = host or os.environ.get('MANAGEME_HOST', '0.0.0.0')
+    port = int(port or os.environ.get('MANAGEME_PORT', '5000'))
+    if GEVENT:
+        from gevent.pywsgi import WSGIServer
+        log.info(f"Starting gevent server on {host}:{port}...")
+        WSGIServer((host, port), app).serve_forever()
+    else:
+        if SERVER == 'gevent':
+            log.warning("gevent is not installed (pip install gevent): using the threaded dev server, "
+                        "which holds one thread per /api/events subscriber.")
+        log.info(f"Starting Flask dev server on {host}:{port}...")
+        app.run(debug=True, host=host, port=port, threaded=True)
+
 if __name__ == '__main__':
-    log.info("Starting Flask server...")
-    # Use host='0.0.0.0' to make accessible on local network
-    # Set debug=False for production deployment
-    # Use a proper WSGI server (like gunicorn or waitress) in production
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_db_tables()
+    serve()
@@ -0,0 +1,91 @@
+"""bench_datetime_parser.py
+Compares the original parsing (strptime over the four UI formats; dateutil.parser for
+voice text) with DateTimeParser, both without its result cache (regex fast paths and
+format memory only) and with it, over a corpus of UI picker values and voice phrases.
+The corpus repeats inputs the way real traffic does (the same few times and dates).
+
+Run from the project root:  python benchmarks/bench_datetime_parser.py
+"""
+import datetime
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from dateutil import parser as dateutil_parser
+from datetime_parser import UI_FORMATS, DateTimeParser
+
+CORPUS_SIZE = 5_000
+START = datetime.date(2025, 1, 1)
+
+VOICE_PHRASES = [
+    '5 pm', '5:30 pm', '17:30', '9am', 'noon', '10:15', '7 PM',
+    'May 5th at 3:30 pm', 'june 3rd', '3rd of June 2025', '12 March 2025 at 9 am',
+    'December 24, 2025 at 6 pm', '05/06/2025 8:00 am', '2025-07-14 09:00', '2025-07-14',
+    'tomorrow at 5 pm', 'next friday', 'friday 10am', 'in two hours',
+]
+
+
+def ui_corpus(rnd, n):
+    """(date, time, dateFormat setting) as the frontend's formatDate/formatTime write them."""
+    rows = []
+    for _ in range(n):
+        day = START + datetime.timedelta(days=int(rnd.paretovariate(1.2)) % 120)
+        hour, minute = rnd.choice([8, 9, 12, 14, 17, 18, 21]), rnd.choice([0, 0, 15, 30, 45])
+        setting = rnd.choice(['DDMMYYYY', 'MMDDYYYY'])
+        date_str = day.strftime('%d/%m/%Y' if setting == 'DDMMYYYY' else '%m/%d/%Y')
+        if rnd.random() < 0.6:
+            time_str = f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+        else:
+            time_str = f"{hour:02d}:{minute:02d}"
+        rows.append((date_str, time_str, setting))
+    return rows
+
+
+def original_ui(date_str, time_str):
+    for fmt in UI_FORMATS:
+        try:
+            return datetime.datetime.strptime(f"{date_str} {time_str}", fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def original_text(text):
+    try:
+        return dateutil_parser.parse(text, dayfirst=True, fuzzy=False)
+    except ValueError:
+        return None
+
+
+def parsed_text(parser, text):
+    try:
+        return parser.parse_text(text)
+    except ValueError:
+        return None
+
+
+def main():
+    rnd = random.Random(42)
+    ui = ui_corpus(rnd, CORPUS_SIZE)
+    voice = [rnd.choice(VOICE_PHRASES) for _ in range(CORPUS_SIZE)]
+    uncached, cached = DateTimeParser(max_entries=0), DateTimeParser()
+
+    cases = [
+        ('ui: strptime loop', lambda: [original_ui(d, t) for d, t, _ in ui]),
+        ('ui: fast path + format memory', lambda: [uncached.parse_ui(d, t, s) for d, t, s in ui]),
+        ('ui: with LRU cache', lambda: [cached.parse_ui(d, t, s) for d, t, s in ui]),
+        ('voice: dateutil', lambda: [original_text(v) for v in voice]),
+        ('voice: fast paths', lambda: [parsed_text(uncached, v) for v in voice]),
+        ('voice: with LRU cache', lambda: [parsed_text(cached, v) for v in voice]),
+    ]
+    print(f"{CORPUS_SIZE} inputs per run, best of 5")
+    for name, run in cases:
+        run()  # warm-up (fills the LRU cache for the cached cases)
+        best = min(timeit.repeat(run, number=1, repeat=5))
+        print(f"  {name:32s} {best * 1e3:8.1f} ms   {best / CORPUS_SIZE * 1e6:6.2f} us/input")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""bench_due_index.py
+Compares the original linear scan used by get_tasks_by_date / get_tasks_by_month
+(filter every task, then sort) with DueDateIndex lookups at 1k, 10k and 100k tasks.
+
+Run from the project root:  python benchmarks/bench_due_index.py
+"""
+import datetime
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from task_index import DueDateIndex
+
+SIZES = (1_000, 10_000, 100_000)
+START = datetime.datetime(2024, 1, 1)
+SPAN_MINUTES = 3 * 365 * 24 * 60  # tasks spread over three years
+
+
+def make_tasks(n):
+    rng = random.Random(n)
+    return {i: {'id': i, 'dueDate': START + datetime.timedelta(minutes=rng.randrange(SPAN_MINUTES)),
+                'completed': rng.random() < 0.3, 'deletedAt': None}
+            for i in range(1, n + 1)}
+
+
+def linear_day(tasks, day):
+    result = [t for t in tasks.values()
+              if not t['completed'] and not t['deletedAt'] and t['dueDate'].date() == day]
+    result.sort(key=lambda t: t['dueDate'])
+    return result
+
+
+def linear_month(tasks, year, month):
+    result = [t for t in tasks.values()
+              if not t['completed'] and not t['deletedAt']
+              and t['dueDate'].year == year and t['dueDate'].month == month]
+    result.sort(key=lambda t: t['dueDate'])
+    return result
+
+
+def build_index(tasks):
+    index = DueDateIndex()
+    for t in tasks.values():
+        if not t['completed'] and not t['deletedAt']:
+            index.add(t['id'], t['dueDate'])
+    return index
+
+
+def bench(label, fn, number):
+    seconds = timeit.timeit(fn, number=number) / number
+    print(f"  {label:<28} {seconds * 1e6:>12.1f} us")
+    return seconds
+
+
+def main():
+    day = datetime.date(2025, 6, 15)
+    for n in SIZES:
+        tasks = make_tasks(n)
+        index = build_index(tasks)
+        number = max(5, 200_000 // n)
+        print(f"{n} tasks ({len(index)} active):")
+        scan_day = bench("linear scan: day", lambda: linear_day(tasks, day), number)
+        idx_day = bench("DueDateIndex: day", lambda: [tasks[i] for i in index.for_day(day)], number * 20)
+        scan_month = bench("linear scan: month", lambda: linear_month(tasks, 2025, 6), number)
+        idx_month = bench("DueDateIndex: month", lambda: [tasks[i] for i in index.for_month(2025, 6)], number * 20)
+        bench("DueDateIndex: move (snooze)",
+              lambda: index.add(1, index.due_of(1) or START), number * 20)
+        print(f"  speedup day x{scan_day / idx_day:.0f}, month x{scan_month / idx_month:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""bench_free_up.py
+Times the assistant's FREE_UP on a busy board (tasks every 30 minutes of working hours
+for two years, plus a few daily series): the original approach (select the day by
+substr(dueDate), move three tasks one UPDATE each to the same time next day) against
+schedule_optimizer.free_up (range scans, bisect gap search, one batched update).
+Also counts how many of the original moves landed on an occupied slot.
+
+Run from the project root:  python benchmarks/bench_free_up.py
+"""
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from dateutil import parser as date_parser
+from schedule_optimizer import free_up
+from task_store import TaskStore, create_tables
+
+START = datetime.date(2024, 1, 1)
+DAYS = 730
+PRIORITIES = ('priority-low', 'priority-medium', 'priority-high')
+
+
+def make_db():
+    rng = random.Random(3)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    rows = []
+    for d in range(DAYS):
+        day = datetime.datetime.combine(START + datetime.timedelta(days=d), datetime.time(8))
+        for slot in range(26):
+            if rng.random() < 0.8:
+                rows.append((f"Task {d}-{slot}", (day + datetime.timedelta(minutes=30 * slot)).isoformat(),
+                             rng.choice(PRIORITIES), 'none'))
+    rows += [(f"Daily {h}", f"2024-01-01T{h:02d}:15:00", 'priority-medium', 'daily') for h in (9, 13, 19)]
+    conn.executemany("INSERT INTO tasks (description, dueDate, priority, repeatFrequency, createdAt) "
+                     "VALUES (?, ?, ?, ?, '2024-01-01T00:00:00')", rows)
+    conn.commit()
+    return conn, len(rows)
+
+
+def original_free_up(conn, day):
+    cur = conn.cursor()
+    cur.execute("SELECT id, description, dueDate, priority FROM tasks WHERE deletedAt IS NULL AND completed=0 "
+                "AND substr(dueDate,1,10)=? ORDER BY dueDate", (day.isoformat(),))
+    rows = cur.fetchall()
+    prio = {'priority-high': 3, 'priority-medium': 2, 'priority-low': 1}
+    moved = []
+    for r in reversed(sorted(rows, key=lambda r: (prio.get(r['priority'], 2), r['dueDate']))):
+        if len(moved) >= 3:
+            break
+        new_dt = date_parser.parse(r['dueDate']) + datetime.timedelta(days=1)
+        cur.execute("UPDATE tasks SET dueDate=? WHERE id=?", (new_dt.isoformat(), r['id']))
+        moved.append(new_dt)
+    conn.commit()
+    return moved
+
+
+def main():
+    days = [START + datetime.timedelta(days=d) for d in random.Random(1).sample(range(DAYS - 10), 50)]
+    conn, n = make_db()
+    collisions = sum(conn.execute("SELECT COUNT(*) FROM tasks WHERE dueDate = ? AND deletedAt IS NULL",
+                                  (new.isoformat(),)).fetchone()[0] > 1
+                     for day in days[:10] for new in original_free_up(conn, day))
+    print(f"{n} tasks; original moves landing on an occupied slot: {collisions}/30")
+    for label, run in (('original (per-row UPDATEs)', lambda c, s, d: original_free_up(c, d)),
+                       ('schedule_optimizer.free_up', lambda c, s, d: free_up(s, d))):
+        conn, _ = make_db()
+        store = TaskStore(conn)
+        seconds = timeit.timeit(lambda: [run(conn, store, day) for day in days], number=1) / len(days)
+        print(f"  {label:<28} {seconds * 1e3:8.2f} ms per FREE_UP")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""bench_icon_startup.py
+Icon work done before the first screen appears, for the original load_icons
+(open + LANCZOS resize of every icon, synchronously) and for icon_cache.IconLoader
+with a cold cache (first start: resize and persist) and a warm cache (later starts).
+Icons are synthetic 512x512 RGBA PNGs; PhotoImage creation needs Tk and is left out.
+
+Run from the project root:  python benchmarks/bench_icon_startup.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PIL import Image
+from icon_cache import IconCache, IconLoader
+
+NAMES = ["add_task", "remove_task", "mark_as_complete", "home", "settings", "history", "calendar"]
+SOURCE_SIZE = 512
+SIZE = 64
+RUNS = 5
+
+
+def make_icons(directory):
+    rng = random.Random(0)
+    for name in NAMES:
+        image = Image.new("RGBA", (SOURCE_SIZE, SOURCE_SIZE))
+        image.putdata([(rng.randrange(256), rng.randrange(256), 128, 255) for _ in range(SOURCE_SIZE * SOURCE_SIZE)])
+        image.save(os.path.join(directory, f"{name}.png"))
+
+
+def original(directory):
+    for name in NAMES:
+        image = Image.open(os.path.join(directory, f"{name}.png"))
+        image.resize((SIZE, SIZE), Image.Resampling.LANCZOS)
+
+
+def timed(fn, runs=RUNS):
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        make_icons(directory)
+        cache_dir = os.path.join(directory, ".cache")
+        print(f"{len(NAMES)} icons, {SOURCE_SIZE}px -> {SIZE}px (best of {RUNS})")
+        print(f"  original load_icons (blocking)       {timed(lambda: original(directory)):8.1f} ms")
+
+        def cold():
+            for f in os.listdir(cache_dir) if os.path.isdir(cache_dir) else ():
+                os.remove(os.path.join(cache_dir, f))
+            IconLoader(NAMES, SIZE, IconCache(directory, cache_dir)).wait()
+        print(f"  IconLoader, cold cache (all icons)   {timed(cold):8.1f} ms")
+        print(f"  IconLoader, warm cache (all icons)   "
+              f"{timed(lambda: IconLoader(NAMES, SIZE, IconCache(directory, cache_dir)).wait()):8.1f} ms")
+        loaders = []
+        print(f"  IconLoader, before first screen      "
+              f"{timed(lambda: loaders.append(IconLoader(NAMES, SIZE, IconCache(directory, cache_dir)))):8.1f} ms")
+        for loader in loaders:
+            loader.wait()
+
+
+if __name__ == '__main__':
+    main()
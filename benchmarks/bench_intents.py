@@ -0,0 +1,97 @@
+"""bench_intents.py
+Throughput of ai_assistant.interpret_messages against the original rule chain
+(substring checks in order, inline re.search calls and a fuzzy dateutil parse of
+the whole message for every date) over a few thousand generated utterances, and
+a check that both give the same intent for each one.
+
+Run from the project root:  python benchmarks/bench_intents.py
+"""
+import datetime as _dt
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from dateutil import parser as date_parser
+import ai_assistant
+from ai_assistant import DATE_KEYWORDS, FREE_UP_PAT, interpret_messages
+
+UTTERANCES = 5_000
+TASKS = ['dentist', 'pay rent', 'call mom', 'gym', 'groceries', 'pills', 'team standup', 'water the plants']
+TEMPLATES = [
+    'add {task} tomorrow', 'Add {task} at 5pm high priority', 'remind me to {task} on friday',
+    'create {task} for march 3', 'new task {task}', 'schedule {task} day after tomorrow',
+    'complete {task}', 'mark done {task}', "I'm done with {task}", 'finish {task}',
+    'list tasks for today', 'show me tomorrow', "what's due on monday?", 'what is due today',
+    'snooze {task} by 10m', 'snooze {task} by 2h', 'delay {task}',
+    'move {task} to tomorrow', 'move {task} to 3pm friday', 'reschedule {task} to next week',
+    'delete {task}', 'remove {task}', 'free up my afternoon', 'clear my day tomorrow',
+    'make time for {task} today', 'thanks!', 'how are you', 'what can you do',
+]
+
+
+def original_extract_date(text):
+    lower = text.lower()
+    now = _dt.datetime.utcnow()
+    for k, offset in DATE_KEYWORDS.items():
+        if k in lower:
+            return (now + _dt.timedelta(days=offset)).replace(hour=9, minute=0, second=0, microsecond=0)
+    try:
+        return date_parser.parse(text, fuzzy=True, default=now)
+    except Exception:
+        return None
+
+
+def original_intent(text):
+    """The intent chain of the original interpret_messages, including its date/entity work."""
+    lower = text.strip().lower()
+    if FREE_UP_PAT.search(lower):
+        original_extract_date(lower)
+        return ai_assistant.INTENT_FREE_UP
+    if any(k in lower for k in ['add ', 'create', 'remind me', 'schedule', 'new task']):
+        re.sub(r'^(add|create|schedule|new task)\s+', '', text, flags=re.I)
+        original_extract_date(lower)
+        return ai_assistant.INTENT_ADD
+    if any(k in lower for k in ['complete', 'mark done', 'finish', 'done with']):
+        re.search(r'(?:complete|finish|done with) (.+)', lower)
+        return ai_assistant.INTENT_COMPLETE
+    if any(k in lower for k in ['list', 'show', "what's due", 'what is due', 'tasks for']):
+        original_extract_date(lower)
+        return ai_assistant.INTENT_LIST
+    if 'snooze' in lower or 'delay' in lower:
+        re.search(r'snooze (.+?) by (\d+)(m|h|d)', lower)
+        return ai_assistant.INTENT_SNOOZE
+    if 'reschedule' in lower or 'move' in lower:
+        m = re.search(r'(?:reschedule|move) (.+?) to (.+)', lower)
+        if m:
+            original_extract_date(m.group(2))
+        return ai_assistant.INTENT_RESCHEDULE
+    if 'delete' in lower or 'remove' in lower:
+        re.search(r'(?:delete|remove) (.+)', lower)
+        return ai_assistant.INTENT_DELETE
+    return ai_assistant.INTENT_UNKNOWN
+
+
+def main():
+    rnd = random.Random(5)
+    corpus = [rnd.choice(TEMPLATES).format(task=rnd.choice(TASKS)) for _ in range(UTTERANCES)]
+    conversations = [[{'role': 'user', 'content': text}] for text in corpus]
+
+    mismatches = [t for t, c in zip(corpus, conversations)
+                  if original_intent(t) != interpret_messages(c)['intent']]
+    print(f"{UTTERANCES} utterances, intent mismatches: {len(mismatches)}")
+
+    cases = [
+        ('original rule chain', lambda: [original_intent(t) for t in corpus]),
+        ('interpret_messages', lambda: [interpret_messages(c) for c in conversations]),
+        ('classifier only', lambda: [ai_assistant.intent_classifier.classify(t.lower()) for t in corpus]),
+    ]
+    for name, run in cases:
+        best = min(timeit.repeat(run, number=1, repeat=5))
+        print(f"  {name:22s} {best * 1e3:8.1f} ms   {UTTERANCES / best:10,.0f} utterances/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""bench_serialization.py
+Compares the original list response path (copy + isinstance loop per task, then
+json.dumps of the whole list) with TaskSerializer's cached per-task fragments,
+using the stdlib encoder and orjson (if installed), at 100, 1k and 10k tasks.
+
+Run from the project root:  python benchmarks/bench_serialization.py
+"""
+import datetime
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from serialization import TaskSerializer, orjson
+
+SIZES = (100, 1_000, 10_000)
+START = datetime.datetime(2025, 1, 1, 9, 0)
+
+
+def make_tasks(n):
+    return [{'id': i, 'description': f'task {i}', 'dueDate': START + datetime.timedelta(hours=i),
+             'priority': 'priority-medium', 'repeatFrequency': 'none', 'customRepeatDays': [],
+             'repeatUntil': None, 'completed': False, 'snoozedUntil': None, 'snoozeDuration': None,
+             'deletedAt': None, 'completedAt': None, 'createdAt': START, 'isRecurringInstance': False,
+             'originalTaskId': None, 'occurrenceDate': None}
+            for i in range(1, n + 1)]
+
+
+def original(tasks):
+    result = []
+    for task in tasks:
+        serializable_task = task.copy()
+        for key, value in serializable_task.items():
+            if isinstance(value, (datetime.datetime, datetime.date)):
+                serializable_task[key] = value.isoformat()
+            elif not isinstance(value, (str, int, float, bool, list, dict, type(None))):
+                serializable_task[key] = str(value)
+        result.append(serializable_task)
+    return json.dumps(result).encode()
+
+
+def bench(label, fn, number):
+    seconds = timeit.timeit(fn, number=number) / number
+    print(f"  {label:<32} {seconds * 1e3:>10.3f} ms")
+    return seconds
+
+
+def main():
+    encoders = ['json'] + (['orjson'] if orjson is not None else [])
+    for n in SIZES:
+        tasks = make_tasks(n)
+        number = max(5, 20_000 // n)
+        print(f"{n} tasks:")
+        base = bench("original (isinstance + dumps)", lambda: original(tasks), number)
+        for encoder in encoders:
+            bench(f"{encoder}: cold cache", lambda: TaskSerializer(encoder=encoder).encode_list(tasks), number)
+            cache = TaskSerializer(max_entries=2 * n, encoder=encoder)
+            cache.encode_list(tasks)
+            warm = bench(f"{encoder}: warm cache", lambda: cache.encode_list(tasks), number)
+            print(f"  speedup warm {encoder} x{base / warm:.1f}")
+
+
+if __name__ == '__main__':
+    main()
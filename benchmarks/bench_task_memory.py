@@ -0,0 +1,52 @@
+"""bench_task_memory.py
+Per-task memory of the original 16-key task dict versus the slotted Task record,
+measured with tracemalloc over 10k and 100k tasks (field values are shared between
+both forms, so the numbers are the container overhead the model change affects).
+
+Run from the project root:  python benchmarks/bench_task_memory.py
+"""
+import datetime
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from task_model import Task
+
+SIZES = (10_000, 100_000)
+START = datetime.datetime(2024, 1, 1, 9, 0)
+
+
+def make_fields(n):
+    return [{'id': i, 'description': f'task {i}', 'dueDate': START + datetime.timedelta(hours=i),
+             'priority': 'priority-medium', 'repeatFrequency': 'none', 'customRepeatDays': [],
+             'repeatUntil': None, 'completed': False, 'snoozedUntil': None, 'snoozeDuration': None,
+             'deletedAt': None, 'completedAt': None, 'createdAt': START, 'isRecurringInstance': False,
+             'originalTaskId': None, 'occurrenceDate': None}
+            for i in range(1, n + 1)]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(objects), objects
+
+
+def main():
+    for n in SIZES:
+        fields = make_fields(n)
+        dict_bytes, _ = measure(lambda: [dict(f) for f in fields])
+        task_bytes, _ = measure(lambda: [Task.from_dict(f) for f in fields])
+        print(f"{n} tasks:")
+        print(f"  dict per task   {dict_bytes:>8.0f} bytes")
+        print(f"  Task per task   {task_bytes:>8.0f} bytes")
+        print(f"  saving          {1 - task_bytes / dict_bytes:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
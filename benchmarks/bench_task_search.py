@@ -0,0 +1,57 @@
+"""bench_task_search.py
+Compares the assistant's original description lookup (LIKE '%text%', a full table
+scan per voice command) with TaskStore.search_tasks over the tasks_fts index, at
+10k and 100k tasks in an in-memory SQLite database.
+
+Run from the project root:  python benchmarks/bench_task_search.py
+"""
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from task_store import TaskStore, create_tables, has_fts
+
+SIZES = (10_000, 100_000)
+START = datetime.datetime(2024, 1, 1)
+WORDS = ('take', 'morning', 'pills', 'call', 'mom', 'buy', 'milk', 'pay', 'rent', 'water',
+         'plants', 'walk', 'dog', 'email', 'report', 'gym', 'dentist', 'book', 'flight', 'clean')
+QUERIES = ('take pills', 'call mom', 'dentist', 'water plants', 'flight')
+
+
+def make_db(n):
+    rng = random.Random(n)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    create_tables(conn)
+    conn.executemany(
+        "INSERT INTO tasks (description, dueDate, priority, completed, createdAt) "
+        "VALUES (?, ?, 'priority-medium', ?, ?)",
+        ((' '.join(rng.sample(WORDS, rng.randint(2, 5))).capitalize(),
+          (START + datetime.timedelta(minutes=rng.randrange(500_000))).isoformat(),
+          rng.random() < 0.3, START.isoformat()) for _ in range(n)))
+    conn.commit()
+    return conn
+
+
+def like_lookup(conn, text):
+    return conn.execute("SELECT id FROM tasks WHERE description LIKE ? AND completed = 0 "
+                        "AND deletedAt IS NULL", (f"%{text}%",)).fetchall()
+
+
+def main():
+    for n in SIZES:
+        conn = make_db(n)
+        store = TaskStore(conn)
+        print(f"{n} tasks (FTS5 available: {has_fts(conn)}), {len(QUERIES)} queries per run")
+        for label, run in (('LIKE %text%', lambda: [like_lookup(conn, q) for q in QUERIES]),
+                           ('search_tasks (FTS5)', lambda: [store.search_tasks(q) for q in QUERIES])):
+            best = min(timeit.repeat(run, number=1, repeat=5))
+            print(f"  {label:<24} {best / len(QUERIES) * 1e3:8.2f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+"""ble_gateway.py
+Long-running BLE central for the wearables.
+
+BleGateway keeps scanning in the background, and every advertising device whose
+name matches gets its own supervisor task on the same asyncio loop: connect,
+subscribe to the notification characteristic, wait for the link to drop, then
+reconnect with exponential backoff (with jitter, reset once a connection has been
+stable). A device that keeps failing is released after MAX_FAILURES attempts and
+picked up again the next time the scanner sees it. DeviceStats tracks per-device
+connections, throughput and latency.
+
+The radio is behind a small backend interface: BleakBackend talks to bleak, and
+FakeBleBackend simulates wearables (notification rate, dropped links, failed
+connects) so the gateway runs and is tested without hardware:
+
+    python ble_gateway.py --fake
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import dataclasses
+import inspect
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+try:
+    from bleak import BleakClient, BleakScanner
+except ImportError:  # only needed for real radios
+    BleakClient = BleakScanner = None
+
+log = logging.getLogger(__name__)
+
+TARGET_NAME = "TaskWearable"
+BLE_CHAR_UUID = "00002a19-0000-1000-8000-00805f9b34fb"
+SCAN_TIMEOUT = 5.0      # seconds per discovery pass
+SCAN_INTERVAL = 10.0    # pause between passes
+CONNECT_TIMEOUT = 10.0
+BACKOFF_BASE = 1.0      # first reconnect delay; doubles per failure...
+BACKOFF_MAX = 60.0      # ...up to this
+STABLE_AFTER = 30.0     # a connection this long resets the backoff
+MAX_FAILURES = 8        # consecutive failed connects before a device is released to the scanner
+MAX_DEVICES = 4
+HANDLER_DRAIN_TIMEOUT = 5.0  # on shutdown, how long scheduled on_data coroutines may take to finish
+
+
+class Backoff:
+    """Exponential backoff with jitter: the n-th delay is in [c/2, c], c = min(maximum, base * 2**n)."""
+
+    def __init__(self, base: float = BACKOFF_BASE, maximum: float = BACKOFF_MAX,
+                 rng: Optional[random.Random] = None):
+        self.base = base
+        self.maximum = maximum
+        self.failures = 0
+        self._rng = rng or random.Random()
+
+    def next(self) -> float:
+        ceiling = min(self.maximum, self.base * 2 ** self.failures)
+        self.failures += 1
+        return self._rng.uniform(ceiling / 2, ceiling)
+
+    def reset(self) -> None:
+        self.failures = 0
+
+
+@dataclasses.dataclass
+class DeviceStats:
+    address: str
+    name: str
+    connects: int = 0
+    disconnects: int = 0
+    failed_connects: int = 0
+    notifications: int = 0
+    bytes: int = 0
+    connected_seconds: float = 0.0      # completed connections only
+    last_connect_latency: float = 0.0   # connect + subscribe time
+    max_handler_latency: float = 0.0    # slowest on_data call
+    total_handler_latency: float = 0.0
+    max_gap: float = 0.0                # longest silence between notifications on one link
+    connected_at: Optional[float] = None
+    last_notification: Optional[float] = None
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Counters plus rates over the time spent connected (including the current link)."""
+        now = time.monotonic() if now is None else now
+        up = self.connected_seconds + (now - self.connected_at if self.connected_at is not None else 0.0)
+        result = {k: v for k, v in dataclasses.asdict(self).items() if k not in ('connected_at', 'last_notification')}
+        result.update(
+            connected=self.connected_at is not None,
+            uptime_seconds=up,
+            notifications_per_second=self.notifications / up if up else 0.0,
+            bytes_per_second=self.bytes / up if up else 0.0,
+            mean_handler_latency=self.total_handler_latency / self.notifications if self.notifications else 0.0,
+        )
+        return result
+
+
+@dataclasses.dataclass(frozen=True)
+class Device:
+    name: str
+    address: str
+
+
+# --- backends ---
+
+class BleakBackend:
+    """Real radios via bleak."""
+
+    def __init__(self):
+        if BleakScanner is None:
+            raise ImportError("The BLE gateway needs bleak (pip install bleak)")
+
+    async def discover(self, timeout: float) -> List[Device]:
+        found = await BleakScanner.discover(timeout=timeout)
+        return [Device(d.name or '', d.address) for d in found]
+
+    def client(self, device: Device, disconnected_callback: Callable[[Any], None]) -> Any:
+        return BleakClient(device.address, disconnected_callback=disconnected_callback)
+
+
+@dataclasses.dataclass
+class FakeWearable:
+    """Script for one simulated device."""
+    name: str
+    address: str
+    interval: float = 1.0               # seconds between notifications
+    payload: Callable[[int], bytes] = lambda i: f"tap {i}".encode()
+    drop_after: Optional[int] = None    # the link drops after this many notifications (every connection)
+    fail_connects: int = 0              # the first n connection attempts fail
+    advertising: bool = True
+    connect_delay: float = 0.0
+    connect_attempts: int = 0
+
+
+class _FakeClient:
+    def __init__(self, wearable: FakeWearable, disconnected_callback: Callable[[Any], None]):
+        self.wearable = wearable
+        self._disconnected_callback = disconnected_callback
+        self._task: Optional[asyncio.Task] = None
+        self.is_connected = False
+
+    async def connect(self) -> bool:
+        self.wearable.connect_attempts += 1
+        await asyncio.sleep(self.wearable.connect_delay)
+        if self.wearable.fail_connects > 0:
+            self.wearable.fail_connects -= 1
+            raise ConnectionError(f"{self.wearable.name}: connection failed")
+        self.is_connected = True
+        return True
+
+    async def start_notify(self, uuid: str, callback: Callable[[Any, bytearray], Any]) -> None:
+        self._task = asyncio.ensure_future(self._notify(uuid, callback))
+
+    async def _notify(self, uuid: str, callback: Callable[[Any, bytearray], Any]) -> None:
+        sent = 0
+        while self.is_connected:
+            await asyncio.sleep(self.wearable.interval)
+            if self.wearable.drop_after is not None and sent >= self.wearable.drop_after:
+                self.is_connected = False
+                self._disconnected_callback(self)
+                return
+            callback(uuid, bytearray(self.wearable.payload(sent)))
+            sent += 1
+
+    async def disconnect(self) -> bool:
+        self.is_connected = False
+        if self._task is not None:
+            self._task.cancel()
+        return True
+
+
+class FakeBleBackend:
+    """Simulated radios for tests and dry runs (see FakeWearable)."""
+
+    def __init__(self, wearables: List[FakeWearable], scan_delay: float = 0.0):
+        self.wearables = {w.address: w for w in wearables}
+        self.scan_delay = scan_delay
+        self.scans = 0
+
+    async def discover(self, timeout: float) -> List[Device]:
+        self.scans += 1
+        await asyncio.sleep(min(timeout, self.scan_delay))
+        return [Device(w.name, w.address) for w in self.wearables.values() if w.advertising]
+
+    def client(self, device: Device, disconnected_callback: Callable[[Any], None]) -> _FakeClient:
+        return _FakeClient(self.wearables[device.address], disconnected_callback)
+
+
+# --- gateway ---
+
+class BleGateway:
+    """Supervises connections to every matching wearable (up to max_devices) on one loop.
+
+    on_data(device, data) is called on the loop for every notification; it may return
+    an awaitable, which is scheduled rather than awaited so one slow consumer cannot
+    stall the link. The scheduled tasks are kept until they finish (their exceptions are
+    logged) and are awaited, then cancelled after HANDLER_DRAIN_TIMEOUT, when run() stops.
+    """
+
+    def __init__(self, on_data: Callable[[Device, bytearray], Optional[Awaitable[Any]]],
+                 backend: Any = None, name_filter: str = TARGET_NAME, char_uuid: str = BLE_CHAR_UUID,
+                 max_devices: int = MAX_DEVICES, scan_timeout: float = SCAN_TIMEOUT,
+                 scan_interval: float = SCAN_INTERVAL, connect_timeout: float = CONNECT_TIMEOUT,
+                 backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX,
+                 stable_after: float = STABLE_AFTER, max_failures: int = MAX_FAILURES,
+                 drain_timeout: float = HANDLER_DRAIN_TIMEOUT):
+        self.on_data = on_data
+        self.backend = backend or BleakBackend()
+        self.name_filter = name_filter
+        self.char_uuid = char_uuid
+        self.max_devices = max_devices
+        self.scan_timeout = scan_timeout
+        self.scan_interval = scan_interval
+        self.connect_timeout = connect_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.max_failures = max_failures
+        self.drain_timeout = drain_timeout
+        self.devices: Dict[str, DeviceStats] = {}
+        self._supervisors: Dict[str, asyncio.Task] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        self._handler_tasks: Set[asyncio.Task] = set()  # the loop only holds tasks weakly
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {address: s.snapshot(now) for address, s in self.devices.items()}
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleeps unless stop() is called first; True if stopping."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def run(self) -> None:
+        """Scans and supervises until stop(); then disconnects everything."""
+        self._stopping = asyncio.Event()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    found = await self.backend.discover(self.scan_timeout)
+                except Exception as e:
+                    log.warning(f"BLE scan failed: {e}")
+                    found = []
+                for device in found:
+                    if (self.name_filter in (device.name or '') and device.address not in self._supervisors
+                            and len(self._supervisors) < self.max_devices):
+                        self._supervise(device)
+                if await self._sleep(self.scan_interval):
+                    break
+        finally:
+            self._stopping.set()
+            supervisors = list(self._supervisors.values())
+            if supervisors:
+                await asyncio.gather(*supervisors, return_exceptions=True)
+            await self._drain_handlers()
+
+    def stop(self) -> None:
+        """Ends run(): links are closed and pending on_data coroutines drained (see _drain_handlers)."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _drain_handlers(self) -> None:
+        """Waits up to drain_timeout for scheduled on_data coroutines, then cancels the rest."""
+        if not self._handler_tasks:
+            return
+        _, late = await asyncio.wait(list(self._handler_tasks), timeout=self.drain_timeout)
+        for task in late:
+            task.cancel()
+        if late:
+            log.warning(f"BLE cancelled {len(late)} data handler(s) still running at shutdown")
+            await asyncio.wait(late)
+
+    def _handler_done(self, device: Device, task: asyncio.Task) -> None:
+        self._handler_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.exception(f"BLE data handler failed for {device.name}", exc_info=task.exception())
+
+    def _supervise(self, device: Device) -> None:
+        if device.address not in self.devices:
+            self.devices[device.address] = DeviceStats(device.address, device.name)
+        task = asyncio.ensure_future(self._connection_loop(device))
+        self._supervisors[device.address] = task
+        task.add_done_callback(lambda _: self._supervisors.pop(device.address, None))
+        log.info(f"BLE supervising {device.name} ({device.address})")
+
+    def _handler(self, device: Device, stats: DeviceStats) -> Callable[[Any, bytearray], None]:
+        def handle(_, data: bytearray) -> None:
+            now = time.monotonic()
+            if stats.last_notification is not None:
+                stats.max_gap = max(stats.max_gap, now - stats.last_notification)
+            stats.last_notification = now
+            stats.notifications += 1
+            stats.bytes += len(data)
+            try:
+                result = self.on_data(device, data)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._handler_tasks.add(task)
+                    task.add_done_callback(lambda done: self._handler_done(device, done))
+            except Exception:
+                log.exception(f"BLE data handler failed for {device.name}")
+            latency = time.monotonic() - now
+            stats.total_handler_latency += latency
+            stats.max_handler_latency = max(stats.max_handler_latency, latency)
+        return handle
+
+    async def _connection_loop(self, device: Device) -> None:
+        loop = asyncio.get_running_loop()
+        stats = self.devices[device.address]
+        backoff = Backoff(self.backoff_base, self.backoff_max)
+        failures = 0
+        while not self._stopping.is_set():
+            disconnected = asyncio.Event()
+            # bleak may call this from another thread on some platforms
+            client = self.backend.client(device, lambda _: loop.call_soon_threadsafe(disconnected.set))
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(client.connect(), self.connect_timeout)
+                await client.start_notify(self.char_uuid, self._handler(device, stats))
+            except Exception as e:
+                stats.failed_connects += 1
+                failures += 1
+                log.warning(f"BLE connect to {device.name} failed ({failures}/{self.max_failures}): {e}")
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                if failures >= self.max_failures:
+                    return  # released; the scanner picks it up again when it advertises
+                if await self._sleep(backoff.next()):
+                    return
+                continue
+            failures = 0
+            stats.connects += 1
+            stats.connected_at = time.monotonic()
+            stats.last_notification = None
+            stats.last_connect_latency = stats.connected_at - started
+            log.info(f"BLE connected to {device.name} in {stats.last_connect_latency:.2f}s")
+            stopping = asyncio.ensure_future(self._stopping.wait())
+            dropped = asyncio.ensure_future(disconnected.wait())
+            await asyncio.wait([stopping, dropped], return_when=asyncio.FIRST_COMPLETED)
+            stopping.cancel()
+            dropped.cancel()
+            up = time.monotonic() - stats.connected_at
+            stats.connected_seconds += up
+            stats.connected_at = None
+            if self._stopping.is_set():
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                return
+            stats.disconnects += 1
+            if up >= self.stable_after:
+                backoff.reset()
+            delay = backoff.next()
+            log.warning(f"BLE link to {device.name} dropped after {up:.1f}s; reconnecting in {delay:.1f}s")
+            if await self._sleep(delay):
+                return
+
+
+def _demo_backend() -> FakeBleBackend:
+    return FakeBleBackend([
+        FakeWearable("TaskWearable-1", "AA:00:00:00:00:01", interval=0.2, drop_after=10),
+        FakeWearable("TaskWearable-2", "AA:00:00:00:00:02", interval=0.5, fail_connects=2),
+    ])
+
+
+async def _main(fake: bool, seconds: float) -> None:
+    gateway = BleGateway(lambda device, data: print(f"[BLE] {device.name}: {data.decode('utf-8', 'replace')}"),
+                         backend=_demo_backend() if fake else None,
+                         scan_interval=1.0 if fake else SCAN_INTERVAL, backoff_base=0.5 if fake else BACKOFF_BASE)
+    runner = asyncio.ensure_future(gateway.run())
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        gateway.stop()
+        await runner
+        for address, stats in gateway.stats().items():
+            print(f"[BLE] {address}: {stats}")
+
+
+__all__ = [
+    'Backoff', 'DeviceStats', 'Device', 'BleakBackend', 'FakeWearable', 'FakeBleBackend', 'BleGateway'
+]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="ManageMe BLE gateway")
+    parser.add_argument("--fake", action="store_true", help="simulated wearables instead of radios")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.fake, args.seconds))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
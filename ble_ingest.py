@@ -0,0 +1,378 @@
+"""ble_ingest.py
+Streaming ingestion of wearable audio/command frames for /api/receive_ble_data.
+
+The BLE gateway forwards what a wearable sends after a button press as frames:
+NDJSON lines {"device", "stream", "seq", "kind", "data", "final", "pressedAt"}, where
+`stream` numbers one utterance on that device, `seq` orders its frames and the last
+frame has "final": true. Audio data is base64 (16 kHz 16-bit mono PCM by default);
+command data is text the wearable already produced.
+
+Frames may arrive out of order, duplicated, and spread over several requests. Each
+open stream keeps only the frames that are ahead of a gap; contiguous data goes
+straight into the speech engine's incremental recognizer, so a whole recording is
+never buffered. Recognition runs on a bounded thread pool with at most one job per
+stream at a time (chunks are fed in order). When a stream is complete its future
+resolves to an Utterance with the transcript and the timestamps needed to measure
+latency from button press to executed action.
+
+Speech engines are pluggable: StubSpeechEngine (deterministic, the audio bytes are
+the UTF-8 transcript) for tests, VoskSpeechEngine for offline recognition when vosk
+is installed. MANAGEME_STT selects one ('stub' by default).
+"""
+from __future__ import annotations
+import abc
+import base64
+import collections
+import concurrent.futures
+import dataclasses
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    import vosk
+except ImportError:  # only needed for offline recognition
+    vosk = None
+
+FRAME_KINDS = ('audio', 'command')
+SAMPLE_RATE = 16000
+STT_WORKERS = 2
+MAX_OPEN_STREAMS = 32            # streams being received at once, over all devices
+MAX_STREAM_BYTES = 2 * 1024 * 1024  # about a minute of 16 kHz 16-bit audio
+MAX_SEQ_GAP = 256                # frames held ahead of a missing one
+STREAM_TIMEOUT = 30.0            # seconds without frames before an open stream is dropped
+LATENCY_WINDOW = 256             # recent utterances kept for latency percentiles
+
+
+class FrameError(ValueError):
+    """A frame is malformed or cannot be accepted."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Frame:
+    device: str
+    stream: int
+    seq: int
+    kind: str
+    data: bytes
+    final: bool = False
+    pressed_at: Optional[float] = None  # epoch seconds of the button press, if the sender knows it
+
+    @classmethod
+    def from_json(cls, obj: Any) -> 'Frame':
+        """Frame from one decoded NDJSON line; raises FrameError."""
+        if not isinstance(obj, dict):
+            raise FrameError("Frame must be a JSON object")
+        device, stream, seq = obj.get('device'), obj.get('stream'), obj.get('seq')
+        kind = obj.get('kind', 'audio')
+        if not isinstance(device, str) or not device:
+            raise FrameError("'device' must be a non-empty string")
+        for name, value in (('stream', stream), ('seq', seq)):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise FrameError(f"'{name}' must be a non-negative integer")
+        if kind not in FRAME_KINDS:
+            raise FrameError(f"'kind' must be one of {', '.join(FRAME_KINDS)}")
+        raw = obj.get('data', '')
+        if not isinstance(raw, str):
+            raise FrameError("'data' must be a string")
+        try:
+            data = base64.b64decode(raw, validate=True) if kind == 'audio' else raw.encode('utf-8')
+        except ValueError:
+            raise FrameError("Audio 'data' must be base64") from None
+        pressed_at = obj.get('pressedAt')
+        if pressed_at is not None and (not isinstance(pressed_at, (int, float)) or isinstance(pressed_at, bool)):
+            raise FrameError("'pressedAt' must be epoch seconds")
+        return cls(device, stream, seq, kind, data, bool(obj.get('final')), pressed_at)
+
+
+def encode_frame(device: str, stream: int, seq: int, data: bytes, kind: str = 'audio',
+                 final: bool = False, pressed_at: Optional[float] = None) -> bytes:
+    """One NDJSON frame line, as the gateway sends it."""
+    payload = base64.b64encode(data).decode('ascii') if kind == 'audio' else data.decode('utf-8')
+    frame = {'device': device, 'stream': stream, 'seq': seq, 'kind': kind, 'data': payload}
+    if final:
+        frame['final'] = True
+    if pressed_at is not None:
+        frame['pressedAt'] = pressed_at
+    return json.dumps(frame, separators=(',', ':')).encode() + b'\n'
+
+
+# --- speech engines ---
+
+class SpeechStream(abc.ABC):
+    """Incremental recognizer for one utterance: feed() chunks in order, then finish()."""
+
+    @abc.abstractmethod
+    def feed(self, chunk: bytes) -> None:
+        """Recognizes the next chunk of audio (or text)."""
+
+    @abc.abstractmethod
+    def finish(self) -> str:
+        """The transcript of everything fed."""
+
+
+class SpeechEngine(abc.ABC):
+    name = 'base'
+
+    @abc.abstractmethod
+    def open_stream(self, sample_rate: int = SAMPLE_RATE) -> SpeechStream:
+        """A new recognizer for one utterance."""
+
+
+class _TextStream(SpeechStream):
+    """Collects UTF-8 text (command frames, and the stub engine's 'audio')."""
+
+    def __init__(self, delay: float = 0.0):
+        self._parts: List[bytes] = []
+        self._delay = delay
+
+    def feed(self, chunk: bytes) -> None:
+        self._parts.append(chunk)
+
+    def finish(self) -> str:
+        if self._delay:
+            time.sleep(self._delay)
+        return ' '.join(b''.join(self._parts).decode('utf-8', errors='replace').split())
+
+
+class StubSpeechEngine(SpeechEngine):
+    """Deterministic engine for tests: the 'audio' is the transcript's UTF-8 bytes.
+    `delay` simulates recognition time per utterance."""
+    name = 'stub'
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE) -> SpeechStream:
+        return _TextStream(self.delay)
+
+
+class _VoskStream(SpeechStream):
+    def __init__(self, recognizer: Any):
+        self._recognizer = recognizer
+
+    def feed(self, chunk: bytes) -> None:
+        self._recognizer.AcceptWaveform(chunk)
+
+    def finish(self) -> str:
+        return json.loads(self._recognizer.FinalResult()).get('text', '')
+
+
+class VoskSpeechEngine(SpeechEngine):
+    """Offline recognition with Vosk (pip install vosk, plus a model directory)."""
+    name = 'vosk'
+
+    def __init__(self, model_path: Optional[str] = None):
+        if vosk is None:
+            raise ImportError("Offline speech recognition needs vosk (pip install vosk)")
+        self._model = vosk.Model(model_path or os.environ.get('MANAGEME_VOSK_MODEL', 'model'))
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE) -> SpeechStream:
+        return _VoskStream(vosk.KaldiRecognizer(self._model, sample_rate))
+
+
+SPEECH_ENGINES: Dict[str, Callable[[], SpeechEngine]] = {
+    'stub': StubSpeechEngine,
+    'vosk': VoskSpeechEngine,
+}
+
+
+def get_speech_engine(name: Optional[str] = None) -> SpeechEngine:
+    """Engine by name; defaults to $MANAGEME_STT, then 'stub'."""
+    name = name or os.environ.get('MANAGEME_STT', 'stub')
+    try:
+        return SPEECH_ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown speech engine '{name}' (known: {', '.join(sorted(SPEECH_ENGINES))})")
+
+
+# --- reassembly ---
+
+@dataclasses.dataclass
+class Utterance:
+    device: str
+    stream: int
+    kind: str
+    transcript: str
+    frames: int
+    bytes: int
+    pressed_at: float      # button press (or first frame received) in epoch seconds
+    received_at: float     # last frame received
+    transcribed_at: float
+
+    def latency(self, done_at: Optional[float] = None) -> Dict[str, float]:
+        """Milliseconds per stage: receiving frames, recognition, handling (to done_at), total."""
+        done_at = time.time() if done_at is None else done_at
+        ms = lambda seconds: round(max(0.0, seconds) * 1000, 1)
+        return {'receive_ms': ms(self.received_at - self.pressed_at),
+                'stt_ms': ms(self.transcribed_at - self.received_at),
+                'handle_ms': ms(done_at - self.transcribed_at),
+                'total_ms': ms(done_at - self.pressed_at)}
+
+
+class _OpenStream:
+    """Receive state of one (device, stream)."""
+
+    def __init__(self, frame: Frame, speech: SpeechStream, now: float):
+        self.device, self.stream, self.kind = frame.device, frame.stream, frame.kind
+        self.speech = speech
+        self.next_seq = 0
+        self.ahead: Dict[int, bytes] = {}   # frames after a gap
+        self.final_seq: Optional[int] = None
+        self.chunks: List[bytes] = []       # contiguous, not yet fed to the recognizer
+        self.running = False                # a worker is feeding this stream
+        self.frames = 0
+        self.bytes = 0
+        self.pressed_at = frame.pressed_at if frame.pressed_at is not None else now
+        self.last_seen = now
+        self.received_at = now
+        self.future: "concurrent.futures.Future[Utterance]" = concurrent.futures.Future()
+
+    @property
+    def complete(self) -> bool:
+        return self.final_seq is not None and self.next_seq > self.final_seq
+
+
+class IngestPipeline:
+    """Reassembles frame streams from any number of devices and transcribes them on a bounded pool."""
+
+    def __init__(self, engine: Optional[SpeechEngine] = None, workers: int = STT_WORKERS,
+                 max_open_streams: int = MAX_OPEN_STREAMS, max_stream_bytes: int = MAX_STREAM_BYTES,
+                 stream_timeout: float = STREAM_TIMEOUT, sample_rate: int = SAMPLE_RATE,
+                 clock: Callable[[], float] = time.time):
+        self.engine = engine or get_speech_engine()
+        self.max_open_streams = max_open_streams
+        self.max_stream_bytes = max_stream_bytes
+        self.stream_timeout = stream_timeout
+        self.sample_rate = sample_rate
+        self._clock = clock
+        self._streams: "collections.OrderedDict[Tuple[str, int], _OpenStream]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="stt")
+        self._latencies: Deque[float] = collections.deque(maxlen=LATENCY_WINDOW)
+        self.counters = collections.Counter()
+        self.device_counters: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+
+    def _expire(self, now: float) -> None:
+        """Drops streams that stopped receiving frames (least recently seen first)."""
+        while self._streams:
+            key, oldest = next(iter(self._streams.items()))
+            if oldest.last_seen + self.stream_timeout > now:
+                break
+            del self._streams[key]
+            self.counters['streams_expired'] += 1
+            oldest.future.set_exception(TimeoutError(
+                f"stream {oldest.stream} of {oldest.device} timed out at seq {oldest.next_seq}"))
+
+    def add(self, frame: Frame) -> Optional["concurrent.futures.Future[Utterance]"]:
+        """
+        Accepts one frame. Returns the stream's future when this frame completes it (its
+        result is the transcribed Utterance), else None. Raises FrameError for frames that
+        cannot be taken (too many open streams, stream too large, seq too far ahead).
+        """
+        now = self._clock()
+        key = (frame.device, frame.stream)
+        with self._lock:
+            self._expire(now)
+            counters = self.device_counters[frame.device]
+            counters['frames'] += 1
+            counters['bytes'] += len(frame.data)
+            st = self._streams.get(key)
+            if st is None:
+                if len(self._streams) >= self.max_open_streams:
+                    self.counters['frames_rejected'] += 1
+                    raise FrameError("Too many open streams")
+                speech = self.engine.open_stream(self.sample_rate) if frame.kind == 'audio' else _TextStream()
+                st = self._streams[key] = _OpenStream(frame, speech, now)
+                self.counters['streams_opened'] += 1
+            if frame.seq < st.next_seq or frame.seq in st.ahead or st.complete:
+                self.counters['frames_duplicate'] += 1
+                return None
+            if frame.seq - st.next_seq > MAX_SEQ_GAP or (st.final_seq is not None and frame.seq > st.final_seq):
+                self.counters['frames_rejected'] += 1
+                raise FrameError(f"seq {frame.seq} is out of range for stream {frame.stream}")
+            if st.bytes + len(frame.data) > self.max_stream_bytes:
+                del self._streams[key]
+                self.counters['streams_too_large'] += 1
+                st.future.set_exception(FrameError(f"stream {frame.stream} exceeds {self.max_stream_bytes} bytes"))
+                raise FrameError("Stream too large")
+            self.counters['frames'] += 1
+            st.frames += 1
+            st.bytes += len(frame.data)
+            st.last_seen = st.received_at = now
+            self._streams.move_to_end(key)
+            if frame.pressed_at is not None:
+                st.pressed_at = min(st.pressed_at, frame.pressed_at)
+            if frame.final:
+                st.final_seq = frame.seq
+            st.ahead[frame.seq] = frame.data
+            while st.next_seq in st.ahead:  # move the contiguous run to the recognizer queue
+                st.chunks.append(st.ahead.pop(st.next_seq))
+                st.next_seq += 1
+            if st.complete:
+                del self._streams[key]
+            self._schedule(st)
+            return st.future if st.complete else None
+
+    def _schedule(self, st: _OpenStream) -> None:
+        """Queues a feeding job unless one is running for this stream (called under the lock)."""
+        if not st.running and (st.chunks or st.complete):
+            st.running = True
+            self._executor.submit(self._drain, st)
+
+    def _drain(self, st: _OpenStream) -> None:
+        """Worker: feeds queued chunks in order; finishes the utterance once everything is in."""
+        try:
+            while True:
+                with self._lock:
+                    chunks, st.chunks = st.chunks, []
+                    finish = not chunks and st.complete
+                    if not chunks and not finish:
+                        st.running = False
+                        return
+                for chunk in chunks:
+                    st.speech.feed(chunk)
+                if finish:
+                    transcript = st.speech.finish()
+                    self.counters['utterances'] += 1
+                    self.device_counters[st.device]['utterances'] += 1
+                    st.future.set_result(Utterance(st.device, st.stream, st.kind, transcript, st.frames,
+                                                   st.bytes, st.pressed_at, st.received_at, self._clock()))
+                    return
+        except Exception as e:
+            self.counters['stt_errors'] += 1
+            with self._lock:
+                self._streams.pop((st.device, st.stream), None)
+            if not st.future.done():
+                st.future.set_exception(e)
+
+    def record_latency(self, utterance: Utterance, done_at: Optional[float] = None) -> Dict[str, float]:
+        """Latency breakdown for a handled utterance, also kept for stats()."""
+        latency = utterance.latency(self._clock() if done_at is None else done_at)
+        self._latencies.append(latency['total_ms'])
+        return latency
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        summary = {}
+        if latencies:
+            summary = {'count': len(latencies), 'mean_ms': round(statistics.fmean(latencies), 1),
+                       'p50_ms': latencies[len(latencies) // 2],
+                       'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                       'max_ms': latencies[-1]}
+        return {'engine': self.engine.name, 'open_streams': len(self._streams), **self.counters,
+                'devices': {device: dict(c) for device, c in self.device_counters.items()},
+                'latency': summary}
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+__all__ = [
+    'FRAME_KINDS', 'FrameError', 'Frame', 'encode_frame', 'SpeechStream', 'SpeechEngine',
+    'StubSpeechEngine', 'VoskSpeechEngine', 'SPEECH_ENGINES', 'get_speech_engine', 'Utterance',
+    'IngestPipeline'
+]
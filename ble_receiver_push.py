@@ -1,50 +1,246 @@
+"""ble_receiver_push.py
+Listens to the wearable's BLE notifications, appends each message to a log file and
+publishes the log to git.
+
+Connections (scanning, reconnects, several wearables) are handled by ble_gateway.py.
+The wearable notifies about once a second, so nothing slow may run in the notification
+callback: it only timestamps the message and puts it on a bounded asyncio.Queue.
+A writer task appends queued lines to the file in batches, and commits/pushes run
+on a single background thread, at most one at a time, every COMMIT_INTERVAL seconds
+or COMMIT_BATCH lines (whichever comes first). When the queue is full new messages
+are dropped and counted; PipelineMetrics reports queue depth, drops and push latency.
+"""
 import asyncio
-from bleak import BleakClient, BleakScanner
+import concurrent.futures
+import dataclasses
 import os
-from git import Repo
+import threading
+import time
 from datetime import datetime
 
+from ble_gateway import BleGateway
+
+try:
+    from git import Repo
+except ImportError:  # only needed to publish the log
+    Repo = None
+
 # === CONFIG ===
 TARGET_NAME = "TaskWearable"
 BLE_CHAR_UUID = "00002a19-0000-1000-8000-00805f9b34fb"
 FILE_PATH = "E:/ManageMe/ble_recordings.txt"
 REPO_PATH = "E:/ManageMe"
+QUEUE_SIZE = 1000       # messages buffered between the BLE callback and the writer
+WRITE_BATCH = 50        # lines appended to the file per write
+WRITE_INTERVAL = 0.5    # seconds a partial batch waits for more lines
+COMMIT_INTERVAL = 60.0  # seconds between commits/pushes...
+COMMIT_BATCH = 100      # ...or as soon as this many lines are waiting
 
-# === BLE HANDLER ===
-def handle_ble_data(_, data: bytearray):
-    text = data.decode('utf-8').strip()
-    print(f"[BLE] Received: {text}")
+_STOP = object()
 
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(FILE_PATH, "a") as f:
-        f.write(f"[{timestamp}] {text}\n")
 
-    try:
-        repo = Repo(REPO_PATH)
-        repo.git.add(FILE_PATH)
-        repo.index.commit(f"Add BLE log: {timestamp}")
-        origin = repo.remote(name="origin")
-        origin.push()
-        print(f"[GIT] Pushed update at {timestamp}")
-    except Exception as e:
-        print(f"[GIT ERROR] {e}")
+@dataclasses.dataclass
+class PipelineMetrics:
+    received: int = 0          # messages the callback accepted
+    dropped: int = 0           # messages lost because the queue was full
+    queue_high_water: int = 0  # deepest the queue has been
+    lines_written: int = 0
+    write_batches: int = 0
+    unpublished: int = 0       # lines written but not yet committed
+    commits: int = 0
+    pushes: int = 0
+    push_failures: int = 0
+    last_push_seconds: float = 0.0
+
+    def snapshot(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+class GitPublisher:
+    """Commits the log file and pushes it to `remote` (GitPython), from a worker thread."""
+
+    def __init__(self, repo_path: str, file_path: str, remote: str = "origin", push: bool = True):
+        if Repo is None:
+            raise ImportError("Publishing the BLE log needs GitPython (pip install GitPython)")
+        self.repo = Repo(repo_path)
+        self.file_path = file_path
+        self.remote = remote
+        self.push = push
+
+    def commit(self, message: str) -> bool:
+        """Stages and commits the log file; False if there was nothing new."""
+        self.repo.git.add(self.file_path)
+        if self.repo.head.is_valid() and not self.repo.index.diff("HEAD"):
+            return False
+        self.repo.index.commit(message)
+        return True
+
+    def push_changes(self) -> None:
+        if not self.push:
+            return
+        for info in self.repo.remote(name=self.remote).push():
+            if info.flags & info.ERROR:
+                raise RuntimeError(f"push of {info.local_ref} failed: {info.summary.strip()}")
+
+
+class BleLogPipeline:
+    """BLE callback -> bounded queue -> batched file appends -> periodic background commit/push."""
+
+    def __init__(self, file_path: str = FILE_PATH, publisher=None, queue_size: int = QUEUE_SIZE,
+                 write_batch: int = WRITE_BATCH, write_interval: float = WRITE_INTERVAL,
+                 commit_interval: float = COMMIT_INTERVAL, commit_batch: int = COMMIT_BATCH):
+        self.file_path = file_path
+        self.publisher = publisher
+        self.queue: "asyncio.Queue" = asyncio.Queue(queue_size)
+        self.write_batch = write_batch
+        self.write_interval = write_interval
+        self.commit_interval = commit_interval
+        self.commit_batch = commit_batch
+        self.metrics = PipelineMetrics()
+        self._file_lock = threading.Lock()  # a commit never stages a half-written batch
+        self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="ble-git")
+        self._publishing = None  # the in-flight commit/push future
+        self._last_publish = time.monotonic()
+
+    # --- BLE side ---
+
+    def handle_ble_data(self, _, data: bytearray) -> None:
+        """Notification callback (runs on the event loop): timestamp and enqueue only."""
+        text = data.decode('utf-8', errors='replace').strip()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.queue.put_nowait(f"[{timestamp}] {text}\n")
+        except asyncio.QueueFull:
+            self.metrics.dropped += 1
+            return
+        self.metrics.received += 1
+        self.metrics.queue_high_water = max(self.metrics.queue_high_water, self.queue.qsize())
+
+    # --- writer ---
+
+    async def _next_batch(self, first_timeout: float) -> list:
+        """Up to write_batch lines; waits write_interval for a batch to fill. [] on timeout."""
+        try:
+            batch = [self.queue.get_nowait()]
+        except asyncio.QueueEmpty:
+            try:
+                batch = [await asyncio.wait_for(self.queue.get(), first_timeout)]
+            except asyncio.TimeoutError:
+                return []
+        deadline = asyncio.get_running_loop().time() + self.write_interval
+        while len(batch) < self.write_batch and batch[-1] is not _STOP:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _append(self, lines: list) -> None:
+        with self._file_lock:
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+
+    async def run(self) -> None:
+        """Writer loop; returns after stop() once everything queued is written and published."""
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.publisher is None:
+                wait = None
+            elif self._publishing is not None:  # the in-flight push resets the clock
+                wait = self.commit_interval
+            else:
+                wait = max(0.0, self._last_publish + self.commit_interval - time.monotonic())
+            batch = await self._next_batch(wait)
+            stopping = bool(batch) and batch[-1] is _STOP
+            lines = batch[:-1] if stopping else batch
+            if lines:
+                await loop.run_in_executor(None, self._append, lines)
+                self.metrics.lines_written += len(lines)
+                self.metrics.write_batches += 1
+                self.metrics.unpublished += len(lines)
+            if stopping:
+                await self._publish(force=True)
+                return
+            self._maybe_publish()
+
+    def _due(self) -> bool:
+        return (self.metrics.unpublished >= self.commit_batch
+                or time.monotonic() - self._last_publish >= self.commit_interval)
+
+    def _maybe_publish(self) -> None:
+        if self.publisher is None or not self.metrics.unpublished:
+            self._last_publish = time.monotonic()
+            return
+        if self._publishing is None and self._due():
+            self._publishing = asyncio.ensure_future(self._publish())
+
+    async def _publish(self, force: bool = False) -> None:
+        if self._publishing is not None and force:
+            await self._publishing
+        if self.publisher is None or not self.metrics.unpublished:
+            return
+        lines, self.metrics.unpublished = self.metrics.unpublished, 0
+        self._last_publish = time.monotonic()
+        loop = asyncio.get_running_loop()
+        try:
+            seconds = await loop.run_in_executor(self._executor, self._commit_and_push, lines)
+            if seconds is not None:
+                self.metrics.last_push_seconds = seconds
+                print(f"[GIT] Pushed {lines} line(s) in {seconds:.2f}s "
+                      f"(queue {self.queue.qsize()}, dropped {self.metrics.dropped})")
+        except Exception as e:
+            self.metrics.push_failures += 1
+            print(f"[GIT ERROR] {e}")  # the commit stays local; the next push sends it
+        finally:
+            if not force:
+                self._publishing = None
+
+    def _commit_and_push(self, lines: int):
+        """Worker thread: commit then push; returns the push time (None if nothing to commit)."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._file_lock:
+            committed = self.publisher.commit(f"Add BLE log: {lines} line(s) up to {timestamp}")
+        if not committed:
+            return None
+        self.metrics.commits += 1
+        started = time.monotonic()
+        self.publisher.push_changes()
+        self.metrics.pushes += 1
+        return time.monotonic() - started
+
+    async def stop(self) -> None:
+        """Flushes the queue and publishes what is left (call while run() is running)."""
+        await self.queue.put(_STOP)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
 
 # === BLE MAIN LOOP ===
 async def run_ble():
-    print("Scanning for BLE device...")
-    devices = await BleakScanner.discover(timeout=5)
-    target = next((d for d in devices if TARGET_NAME in d.name), None)
-
-    if not target:
-        print("Device not found.")
-        return
-
-    print(f"Connecting to {target.name} ({target.address})")
-    async with BleakClient(target.address) as client:
-        await client.start_notify(BLE_CHAR_UUID, handle_ble_data)
-        print("Connected and listening. Press Ctrl+C to exit.")
-        while True:
-            await asyncio.sleep(1)
+    """Logs every matching wearable (reconnecting as needed, see ble_gateway.py) until Ctrl+C."""
+    pipeline = BleLogPipeline(FILE_PATH, GitPublisher(REPO_PATH, FILE_PATH))
+    gateway = BleGateway(pipeline.handle_ble_data, name_filter=TARGET_NAME, char_uuid=BLE_CHAR_UUID)
+    writer = asyncio.ensure_future(pipeline.run())
+    print(f"Listening for '{TARGET_NAME}' devices. Press Ctrl+C to exit.")
+    try:
+        await gateway.run()
+    finally:
+        gateway.stop()
+        await pipeline.stop()
+        await writer
+        pipeline.close()
+        print(f"[BLE] {pipeline.metrics.snapshot()}")
+        for address, stats in gateway.stats().items():
+            print(f"[BLE] {address}: {stats}")
 
 if __name__ == "__main__":
     try:
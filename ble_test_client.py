@@ -1,28 +1,27 @@
 import asyncio
-from bleak import BleakClient, BleakScanner
+from ble_gateway import BleGateway
 
 SERVICE_UUID = "4fafc201-1fb5-459e-8fcc-c5c9c331914b"  # Same as ESP32
 CHAR_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a8"
+DEVICE_NAME = "ManageMeESP32"  # Match the BLE name you used
+LISTEN_SECONDS = 10
 
 async def run():
-    print("Scanning for devices...")
-    devices = await BleakScanner.discover()
-    for d in devices:
-        print(f"Found: {d.name}, {d.address}")
-        if "ManageMeESP32" in d.name:  # Match the BLE name you used
-            address = d.address
-            print(f"Connecting to {address}...")
-            async with BleakClient(address) as client:
-                print("Connected. Reading data...")
-                
-                def callback(sender, data):
-                    print(f"Notification from {sender}: {data.decode('utf-8')}")
-                
-                await client.start_notify(CHAR_UUID, callback)
-                await asyncio.sleep(10)  # Keep connection open for 10s
-                await client.stop_notify(CHAR_UUID)
-            return
+    def callback(device, data):
+        print(f"Notification from {device.name} ({device.address}): {data.decode('utf-8')}")
 
-    print("ESP32 not found. Is it powered and broadcasting?")
+    # Keeps scanning and reconnects if the ESP32 drops the link (see ble_gateway.py)
+    gateway = BleGateway(callback, name_filter=DEVICE_NAME, char_uuid=CHAR_UUID, scan_interval=2)
+    print(f"Listening for {DEVICE_NAME} for {LISTEN_SECONDS}s...")
+    runner = asyncio.ensure_future(gateway.run())
+    await asyncio.sleep(LISTEN_SECONDS)
+    gateway.stop()
+    await runner
+
+    if not gateway.devices:
+        print("ESP32 not found. Is it powered and broadcasting?")
+    for address, stats in gateway.stats().items():
+        print(f"{address}: {stats['notifications']} notification(s), {stats['connects']} connection(s), "
+              f"{stats['notifications_per_second']:.2f}/s")
 
 asyncio.run(run())
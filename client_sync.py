@@ -0,0 +1,398 @@
+"""client_sync.py
+Shared task data for the Tkinter client (main.py).
+
+The kiosk's Tk UI works on the same tasks as the web UI, through app.py's HTTP API, so
+changes from either side show up in the other (and go out on /api/events). TaskSync
+keeps a local cache of the active and recently completed tasks. UI changes are applied
+to the cache at once and queued (write-behind); a background thread sends the queue to
+the API in order and polls the task lists with If-None-Match, so an unchanged store
+costs one 304 per poll. The UI thread never does I/O: it reads the cache and drains
+change events with changes() from a Tk timer. The cache and any unsent changes are
+saved to a JSON file before each send, so nothing is lost on exit, while the server
+is unreachable or when it stops answering. Changes the API rejects (4xx) are dropped
+and reported as ('error', message) events.
+"""
+from __future__ import annotations
+import collections
+import datetime
+import json
+import os
+import queue
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+API_URL = os.environ.get('MANAGEME_API', 'http://127.0.0.1:5000')
+STATE_FILE = os.environ.get('MANAGEME_CLIENT_STATE', os.path.join(os.path.expanduser('~'), '.manageme_client.json'))
+POLL_INTERVAL = 5.0      # seconds between list polls (changes are sent as soon as they are queued)
+REQUEST_TIMEOUT = 5.0
+PAGE_SIZE = 500
+COMPLETED_FILTER = 'last30'  # completed tasks kept for the history view
+MAX_NAME_LENGTH = 150        # app.py's limit for a task description
+
+# The Tk client's frequency names <-> repeatFrequency
+FREQUENCY_TO_REPEAT = {"Once": "none", "Daily": "daily", "Weekly": "weekly"}
+REPEAT_TO_FREQUENCY = {repeat: name for name, repeat in FREQUENCY_TO_REPEAT.items()}
+
+
+class ClientTask(NamedTuple):
+    """A task as the Tk views show it; `key` is '<id>', '<id>@<occurrence>' or 'local-<uuid>' until sent."""
+    due: datetime.datetime
+    name: str
+    frequency: str
+    key: str
+
+    @property
+    def is_local(self) -> bool:
+        return self.key.startswith('local-')
+
+
+def task_from_api(data: Dict[str, Any]) -> Optional[ClientTask]:
+    """ClientTask for one task of the JSON API (None if it has no due date)."""
+    if not data.get('dueDate'):
+        return None
+    key = str(data['id'])
+    if data.get('isRecurringInstance') and data.get('occurrenceDate'):
+        key = f"{data.get('originalTaskId') or data['id']}@{data['occurrenceDate']}"
+    repeat = data.get('repeatFrequency') or 'none'
+    return ClientTask(datetime.datetime.fromisoformat(data['dueDate']), data.get('description') or '',
+                      REPEAT_TO_FREQUENCY.get(repeat, repeat.capitalize()), key)
+
+
+def task_path(key: str, action: str = "") -> str:
+    """API path of a synced task key, e.g. '/api/tasks/7/complete?occurrence=...' for a series occurrence."""
+    task_id, _, occurrence = key.partition('@')
+    path = f"/api/tasks/{task_id}" + (f"/{action}" if action else "")
+    return path + (f"?occurrence={urllib.parse.quote(occurrence)}" if occurrence else "")
+
+
+class ApiError(Exception):
+    """The API rejected a request (4xx); retrying will not help. `reason` is the server's error text."""
+
+    def __init__(self, message: str, reason: str = ""):
+        super().__init__(message)
+        self.reason = reason or message
+
+
+class ApiClient:
+    """Minimal JSON client for app.py (urllib, so the kiosk needs no extra packages)."""
+
+    def __init__(self, base_url: str = API_URL, timeout: float = REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, body: Any = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, Any]:
+        """(status, response headers, decoded JSON or None). Raises ApiError for 4xx, OSError when unreachable."""
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=dict(headers or {}))
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                raw = response.read()
+                return response.status, response.headers, json.loads(raw) if raw else None
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, e.headers, None
+            if 400 <= e.code < 500:
+                text = e.read().decode(errors='replace')[:200]
+                try:
+                    reason = json.loads(text).get('error') or text
+                except (ValueError, AttributeError):
+                    reason = text
+                raise ApiError(f"{method} {path}: {e.code} {text}", str(reason)) from None
+            raise OSError(f"{method} {path}: server error {e.code}") from None
+
+
+class TaskSync:
+    """Write-behind task cache shared with the web UI; see the module docstring."""
+
+    def __init__(self, api: Optional[ApiClient] = None, state_file: Optional[str] = STATE_FILE,
+                 poll_interval: float = POLL_INTERVAL):
+        self.api = api or ApiClient()
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+        self.online = False
+        self.last_error: Optional[str] = None
+        self._active: Dict[str, ClientTask] = {}
+        self._completed: Dict[str, ClientTask] = {}
+        self._pending: collections.deque = collections.deque()  # (op, key, payload) in UI order
+        self._etags: Dict[str, str] = {}
+        self._edits = 0  # bumped by every UI change; a poll that raced one is not applied
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._loaded = False
+        self._save_lock = threading.Lock()  # one writer of the state file at a time
+        self._events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="task-sync", daemon=True)
+
+    # --- UI thread (no I/O) ---
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Asks the thread to send what it can and save; waits at most `timeout` seconds, then
+        saves here if the thread is still stuck on the server, so queued changes are kept.
+        """
+        self._stopping = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._thread.is_alive() and self._loaded:
+            self._save()
+
+    def tasks(self) -> List[ClientTask]:
+        with self._lock:
+            return list(self._active.values())
+
+    def completed(self) -> List[ClientTask]:
+        with self._lock:
+            return list(self._completed.values())
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def changes(self) -> List[Tuple[str, Any]]:
+        """('add'|'remove', task) and ('error', message) events from the sync thread since the last call."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def add(self, due: datetime.datetime, name: str, frequency: str = "Once") -> ClientTask:
+        """Adds a task locally (key 'local-<uuid>') and queues it for the server."""
+        payload = {"description": name, "dueDate": due.strftime('%d/%m/%Y'), "dueTime": due.strftime('%H:%M'),
+                   "dateFormat": 'DDMMYYYY', "repeatFrequency": FREQUENCY_TO_REPEAT.get(frequency, 'none')}
+        with self._lock:
+            task = ClientTask(due, name, frequency, f"local-{uuid.uuid4().hex[:12]}")
+            self._active[task.key] = task
+            self._queue('add', task.key, payload)
+        return task
+
+    def complete(self, task: ClientTask) -> None:
+        with self._lock:
+            self._active.pop(task.key, None)
+            self._completed[task.key] = task
+            self._queue('complete', task.key)
+
+    def remove(self, task: ClientTask) -> None:
+        with self._lock:
+            self._active.pop(task.key, None)
+            if task.is_local and self._unqueue_add(task.key):
+                return  # never reached the server
+            self._queue('delete', task.key)
+
+    def _queue(self, op: str, key: str, payload: Any = None) -> None:
+        self._pending.append((op, key, payload))
+        self._edits += 1
+        self._dirty = True
+        self._wake.set()
+
+    def _unqueue_add(self, key: str) -> bool:
+        for entry in self._pending:
+            if entry[0] == 'add' and entry[1] == key:
+                self._pending.remove(entry)
+                self._edits += 1
+                self._dirty = True
+                return True
+        return False
+
+    # --- sync thread ---
+
+    def _run(self) -> None:
+        self._load()
+        self._loaded = True
+        while True:
+            if self._dirty:
+                self._save()  # before sending: a server that stops answering must not cost the queue
+            try:
+                sent = self._flush()
+                if sent and not self._stopping:
+                    self._poll()
+            except Exception as e:  # e.g. http.client.IncompleteRead; the thread must keep going
+                self.online = False
+                self.last_error = str(e)
+                print(f"[SYNC] {e!r}")
+            if self._dirty:
+                self._save()
+            if self._stopping:
+                return
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _flush(self) -> bool:
+        """Sends queued changes in order; False if the server could not be reached."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+                entry = self._pending[0]
+            op, key, payload = entry
+            try:
+                if op == 'add':
+                    _, _, data = self.api.request('POST', '/api/tasks', payload)
+                elif op == 'complete':
+                    self.api.request('POST', task_path(key, 'complete'))
+                else:
+                    self.api.request('DELETE', task_path(key))
+                self.online = True
+            except ApiError as e:
+                self.last_error = str(e)  # e.g. an invalid task, or one deleted on the web UI meanwhile
+                with self._lock:
+                    if self._pending and self._pending[0] is entry:
+                        self._pending.popleft()
+                    self._reject(op, key, e.reason)
+                    self._dirty = True
+                continue
+            except (OSError, ValueError) as e:
+                self.online = False
+                self.last_error = str(e)
+                return False
+            with self._lock:
+                if self._pending and self._pending[0] is entry:
+                    self._pending.popleft()
+                if op == 'add':
+                    self._confirm_add(key, data)
+                self._dirty = True
+
+    def _reject(self, op: str, key: str, reason: str) -> None:
+        """Drops a change the API refused and reports it (lock held); a rejected add takes its task along."""
+        task = self._active.get(key) or self._completed.get(key)
+        name = f"'{task.name}'" if task else "A task"
+        if op == 'add':
+            self._pending = collections.deque(entry for entry in self._pending if entry[1] != key)
+            self._completed.pop(key, None)
+            if self._active.pop(key, None) is not None:
+                self._events.put(('remove', task))
+            self._events.put(('error', f"{name} could not be saved: {reason}"))
+        else:
+            verb = 'completed' if op == 'complete' else 'removed'
+            self._events.put(('error', f"{name} could not be {verb} on the server: {reason}"))
+
+    def _confirm_add(self, local_key: str, data: Dict[str, Any]) -> None:
+        """Swaps a sent local task for the stored one and points queued changes at its id (lock held)."""
+        task = task_from_api(data)
+        if task is None:
+            return
+        self._pending = collections.deque(
+            (op, task.key if key == local_key else key, payload) for op, key, payload in self._pending)
+        local = self._active.pop(local_key, None)
+        if local is not None:
+            self._active[task.key] = task
+            self._events.put(('remove', local))
+            self._events.put(('add', task))
+        elif local_key in self._completed:
+            self._completed[task.key] = self._completed.pop(local_key)
+        else:  # removed in the UI while the add was on its way
+            self._pending.appendleft(('delete', task.key, None))
+
+    def _fetch(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """All pages of a list endpoint; None if the first page is unchanged (304)."""
+        headers = {'If-None-Match': self._etags[path]} if path in self._etags else {}
+        status, response_headers, page = self.api.request('GET', path, headers=headers)
+        if status == 304:
+            return None
+        etag = response_headers.get('ETag')
+        rows = list(page or [])
+        cursor = response_headers.get('X-Next-Cursor')
+        while cursor:
+            _, response_headers, page = self.api.request('GET', f"{path}&cursor={urllib.parse.quote(cursor)}")
+            rows.extend(page or [])
+            cursor = response_headers.get('X-Next-Cursor')
+        if etag:
+            self._etags[path] = etag
+        return rows
+
+    def _poll(self) -> None:
+        """Replaces the cache with the server's lists when they changed, emitting the differences."""
+        edits = self._edits
+        lists = {'active': f"/api/tasks/all?limit={PAGE_SIZE}",
+                 'completed': f"/api/completed_tasks?filter={COMPLETED_FILTER}&limit={PAGE_SIZE}"}
+        fetched = {}
+        try:
+            for name, path in lists.items():
+                rows = self._fetch(path)
+                if rows is not None:
+                    fetched[name] = {t.key: t for t in map(task_from_api, rows) if t is not None}
+            self.online = True
+        except ApiError as e:
+            self.last_error = str(e)
+            return
+        except (OSError, ValueError) as e:
+            self.online = False
+            self.last_error = str(e)
+            return
+        with self._lock:
+            if edits != self._edits or self._pending:
+                self._etags.clear()  # raced a UI change: apply the next poll instead
+                return
+            if 'active' in fetched:
+                fresh = fetched['active']
+                for key, task in self._active.items():
+                    if fresh.get(key) != task:
+                        self._events.put(('remove', task))
+                for key, task in fresh.items():
+                    if self._active.get(key) != task:
+                        self._events.put(('add', task))
+                self._active = fresh
+            if 'completed' in fetched:
+                self._completed = fetched['completed']
+            if fetched:
+                self._dirty = True
+
+    def _load(self) -> None:
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                state = json.load(f)
+            def decode(row): return ClientTask(datetime.datetime.fromisoformat(row[0]), *row[1:])
+            active = [decode(row) for row in state.get('active', [])]
+            completed = [decode(row) for row in state.get('completed', [])]
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[SYNC] Ignoring unreadable state file {self.state_file}: {e}")
+            return
+        with self._lock:
+            for task in active:
+                if task.key not in self._active:
+                    self._active[task.key] = task
+                    self._events.put(('add', task))
+            for task in completed:
+                self._completed.setdefault(task.key, task)
+            # Changes left over from the last run go first
+            self._pending.extendleft(reversed([tuple(op) for op in state.get('pending', [])]))
+
+    def _save(self) -> None:
+        with self._save_lock:  # stop() may save while the thread is stuck, or finishing its own save
+            with self._lock:
+                def encode(task): return [task.due.isoformat(), task.name, task.frequency, task.key]
+                state = {'active': [encode(t) for t in self._active.values()],
+                         'completed': [encode(t) for t in self._completed.values()],
+                         'pending': [list(op) for op in self._pending]}
+                self._dirty = False
+            if not self.state_file:
+                return
+            try:
+                tmp = f"{self.state_file}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_file)
+            except OSError as e:
+                print(f"[SYNC] Could not save {self.state_file}: {e}")
+
+
+__all__ = [
+    'ClientTask', 'task_from_api', 'task_path', 'ApiError', 'ApiClient', 'TaskSync',
+    'FREQUENCY_TO_REPEAT', 'MAX_NAME_LENGTH'
+]
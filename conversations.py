@@ -0,0 +1,121 @@
+"""conversations.py
+Server-side conversation sessions for /api/ai/assist.
+
+A client starts a session by sending one message without a sessionId and then sends
+only each new turn with the id it got back. The server keeps the last MAX_TURNS turns
+of every session in a ring buffer and remembers the task the conversation is about, so
+a follow-up like "snooze it by 10m" or "delete that task" refers to the task named in
+an earlier turn. Sessions idle for longer than IDLE_SECONDS are evicted.
+"""
+from __future__ import annotations
+import collections
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+MAX_TURNS = 20          # turns (user + assistant) kept per session
+IDLE_SECONDS = 30 * 60  # sessions unused for this long are dropped
+MAX_SESSIONS = 1000     # oldest-idle sessions are dropped beyond this
+
+# Descriptions that point back at the task the conversation is about
+REFERENCE_PAT = re.compile(r"(?:it|that|this|them|those)(?: (?:one|task|reminder|again))?|"
+                           r"the (?:same |last |previous )?(?:one|task|reminder)", re.I)
+# Intents whose 'description' entity names an existing task
+TASK_REFERENCE_INTENTS = frozenset({'COMPLETE_TASK', 'SNOOZE_TASK', 'RESCHEDULE_TASK', 'DELETE_TASK'})
+
+
+class Conversation:
+    """One session: a ring buffer of turns plus the entities resolved so far."""
+    __slots__ = ('id', 'turns', 'entities', 'last_seen', 'lock')
+
+    def __init__(self, session_id: str, max_turns: int, now: float):
+        self.id = session_id
+        self.turns: Deque[Dict[str, str]] = collections.deque(maxlen=max_turns)
+        self.entities: Dict[str, Any] = {}  # e.g. {'description': 'take morning pills'}
+        self.last_seen = now
+        self.lock = threading.Lock()  # serializes turns of one session
+
+    def add(self, role: str, content: str) -> None:
+        self.turns.append({'role': role, 'content': content})
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Turns in the {role, content} shape interpret_messages takes."""
+        return list(self.turns)
+
+    def resolve(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Replaces a referring description ('it', 'that task') with the remembered one."""
+        entities = result.get('entities') or {}
+        description = entities.get('description')
+        remembered = self.entities.get('description')
+        if (result.get('intent') in TASK_REFERENCE_INTENTS and remembered and description
+                and REFERENCE_PAT.fullmatch(description.strip())):
+            entities['description'] = remembered
+            result['entities'] = entities
+        return result
+
+    def remember(self, result: Dict[str, Any]) -> None:
+        """Keeps the task an executed result was about for later references."""
+        description = (result.get('entities') or {}).get('description')
+        if description and (result.get('intent') == 'ADD_TASK' or result.get('intent') in TASK_REFERENCE_INTENTS):
+            self.entities['description'] = description
+            self.entities['intent'] = result['intent']
+
+
+class ConversationStore:
+    """Sessions by id, in least-recently-used order so idle eviction stops at the first live one."""
+
+    def __init__(self, max_turns: int = MAX_TURNS, idle_seconds: float = IDLE_SECONDS,
+                 max_sessions: int = MAX_SESSIONS, clock: Callable[[], float] = time.monotonic):
+        self._sessions: "collections.OrderedDict[str, Conversation]" = collections.OrderedDict()
+        self._max_turns = max_turns
+        self._idle_seconds = idle_seconds
+        self._max_sessions = max_sessions
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen + self._idle_seconds > now and len(self._sessions) <= self._max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, session_id: Optional[str]) -> Optional[Conversation]:
+        """Live session by id (touching it), or None if unknown or expired."""
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            conversation = self._sessions.get(session_id) if session_id else None
+            if conversation is not None:
+                conversation.last_seen = now
+                self._sessions.move_to_end(session_id)
+            return conversation
+
+    def open(self, session_id: Optional[str] = None) -> Conversation:
+        """The live session `session_id`, or a new one (with a new id) if there is none."""
+        conversation = self.get(session_id)
+        if conversation is not None:
+            return conversation
+        now = self._clock()
+        conversation = Conversation(uuid.uuid4().hex, self._max_turns, now)
+        with self._lock:
+            self._sessions[conversation.id] = conversation
+            self._evict(now)
+        return conversation
+
+    def close(self, session_id: str) -> bool:
+        """Ends a session; False if it did not exist."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+__all__ = [
+    'MAX_TURNS', 'IDLE_SECONDS', 'MAX_SESSIONS', 'REFERENCE_PAT', 'Conversation', 'ConversationStore'
+]
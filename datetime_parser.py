@@ -0,0 +1,280 @@
+"""datetime_parser.py
+Date/time parsing for task payloads (the UI pickers' dueDate + dueTime) and for
+/api/parse-datetime (free text from the voice input).
+
+DateTimeParser keeps three things between calls:
+- the format (or text shape) that last parsed successfully for each profile, a
+  client id or the user's dateFormat setting, and tries it first next time;
+- an LRU cache of recent inputs and their results (failures included);
+- precompiled regexes for the common shapes, so most inputs never reach strptime's
+  per-format matching or dateutil's tokenizer.
+The fast paths give exactly what strptime / dateutil give for the inputs they accept
+and step aside for everything else. Calls without a profile always use the fixed
+format order, so ambiguous dates like 03/04/2099 resolve the same for every caller.
+"""
+from __future__ import annotations
+import collections
+import datetime as _dt
+import re
+import threading
+from typing import Any, Hashable, Optional, Sequence, Tuple
+
+from dateutil import parser as dateutil_parser
+
+# Formats the UI pickers send, in the order they are tried for anonymous callers
+UI_FORMATS = (
+    '%m/%d/%Y %I:%M %p',  # MM/DD/YYYY H:MM AM/PM
+    '%d/%m/%Y %I:%M %p',  # DD/MM/YYYY H:MM AM/PM
+    '%m/%d/%Y %H:%M',     # MM/DD/YYYY HH:MM
+    '%d/%m/%Y %H:%M',     # DD/MM/YYYY HH:MM
+)
+# The frontend's dateFormat setting -> whether the day comes first
+DATE_FORMAT_SETTINGS = {'DDMMYYYY': True, 'MMDDYYYY': False}
+
+# (day first, 12-hour clock) for the UI formats the regex fast path understands
+_UI_SPECS = {fmt: (fmt.startswith('%d'), '%p' in fmt) for fmt in UI_FORMATS}
+# One pattern covers all four UI formats (strptime turns a format space into \s+)
+_UI_SHAPE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})\s+(\d{1,2}):(\d{2})(?:\s+([ap])m)?', re.I)
+
+_MONTHS = {name: number for number, names in enumerate((
+    ('jan', 'january'), ('feb', 'february'), ('mar', 'march'), ('apr', 'april'), ('may',),
+    ('jun', 'june'), ('jul', 'july'), ('aug', 'august'), ('sep', 'sept', 'september'),
+    ('oct', 'october'), ('nov', 'november'), ('dec', 'december')), 1) for name in names}
+_MONTH = '(' + '|'.join(sorted(_MONTHS, key=len, reverse=True)) + ')'
+_TIME = r'(\d{1,2})(?::(\d{2}))?\s*(?:([ap])m)?'
+_AT_TIME = r'(?:,?\s+(?:at\s+)?' + _TIME + ')?'
+_DAY = r'(\d{1,2})(?:st|nd|rd|th)?'
+
+# Shapes of spoken/typed text handled without dateutil; they never overlap
+TEXT_SHAPES = {
+    'time': re.compile(_TIME, re.I | re.A),
+    'numeric': re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})' + _AT_TIME, re.I | re.A),
+    'day_month': re.compile(_DAY + r'\s+(?:of\s+)?' + _MONTH + r'(?:,?\s+(\d{4}))?' + _AT_TIME, re.I | re.A),
+    'month_day': re.compile(_MONTH + r'\s+' + _DAY + r'(?:,?\s+(\d{4}))?' + _AT_TIME, re.I | re.A),
+    'iso': re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2}))?)?', re.A),
+}
+
+
+class _Failure(str):
+    """Cached parse failure (the error message)."""
+    pass
+
+
+def _build_ui(spec: Tuple[bool, bool], groups: Sequence[Optional[str]]) -> Optional[_dt.datetime]:
+    """What strptime gives for one UI format on a string _UI_SHAPE matched (None = no match)."""
+    first, second, year, hour, minute, meridiem = groups
+    dayfirst, twelve_hour = spec
+    if twelve_hour != (meridiem is not None):
+        return None
+    hour, minute = int(hour), int(minute)
+    if minute > 59:
+        return None
+    if twelve_hour:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem in 'pP' else 0)
+    elif hour > 23:
+        return None
+    day, month = (first, second) if dayfirst else (second, first)
+    try:
+        return _dt.datetime(int(year), int(month), int(day), hour, minute)
+    except ValueError:
+        return None
+
+
+def _clock(hour: Optional[str], minute: Optional[str], meridiem: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(hour, minute) as dateutil reads them; None when the fast path should not decide."""
+    if hour is None:
+        return 0, 0
+    if minute is None and meridiem is None:
+        return None  # a bare number could be a day or a year to dateutil
+    hour, minute = int(hour), int(minute or 0)
+    if minute > 59:
+        return None
+    if meridiem is not None:
+        if not 1 <= hour <= 12:
+            return None
+        return hour % 12 + (12 if meridiem in 'pP' else 0), minute
+    return (hour, minute) if hour <= 23 else None
+
+
+def _build_text(shape: str, groups: Sequence[Optional[str]], dayfirst: bool,
+                today: _dt.date) -> Optional[_dt.datetime]:
+    """What dateutil gives for text that matched TEXT_SHAPES[shape] (None = ask dateutil)."""
+    if shape == 'iso':
+        year, first, second, hour, minute, seconds = (int(g) if g else 0 for g in groups)
+        # dateutil reads YYYY-AA-BB as year-day-month when dayfirst and BB could be a month
+        month, day = (second, first) if dayfirst and second <= 12 else (first, second)
+        clock = (hour, minute, seconds)
+    else:
+        if shape == 'time':
+            date_parts, time_parts = (today.year, today.month, today.day), groups
+        elif shape == 'numeric':
+            first, second, year = (int(g) for g in groups[:3])
+            if dayfirst and second <= 12 or not dayfirst and first > 12:
+                date_parts = (year, second, first)
+            else:
+                date_parts = (year, first, second)
+            time_parts = groups[3:]
+        elif shape == 'day_month':
+            date_parts = (int(groups[2] or today.year), _MONTHS[groups[1].lower()], int(groups[0]))
+            time_parts = groups[3:]
+        else:
+            date_parts = (int(groups[2] or today.year), _MONTHS[groups[0].lower()], int(groups[1]))
+            time_parts = groups[3:]
+        hm = _clock(*time_parts)
+        if hm is None:
+            return None
+        (year, month, day), clock = date_parts, hm + (0,)
+    try:
+        return _dt.datetime(year, month, day, *clock)
+    except ValueError:
+        return None
+
+
+class DateTimeParser:
+    """Format-aware, memoizing parser shared by the task routes and /api/parse-datetime.
+
+    `profile` identifies whose inputs these are: the user's dateFormat setting
+    ('DDMMYYYY' / 'MMDDYYYY') or any stable client key. Profiles remember the UI
+    format and text shape that worked last; the setting names also put their own
+    date order first and decide dayfirst for free text (DDMMYYYY when unknown).
+    """
+
+    def __init__(self, formats: Sequence[str] = UI_FORMATS, max_entries: int = 2048,
+                 max_profiles: int = 1024):
+        self.formats = tuple(formats)
+        self._cache: "collections.OrderedDict[tuple, Any]" = collections.OrderedDict()
+        self._last_format: "collections.OrderedDict[Hashable, str]" = collections.OrderedDict()
+        self._last_shape: "collections.OrderedDict[Hashable, str]" = collections.OrderedDict()
+        self._max_entries = max_entries
+        self._max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # --- bookkeeping ---
+
+    def _lookup(self, key: tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return True, self._cache[key]
+            self.misses += 1
+            return False, None
+
+    def _store(self, key: tuple, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+
+    def _remember(self, memory: "collections.OrderedDict", profile: Hashable, value: str) -> None:
+        with self._lock:
+            memory[profile] = value
+            memory.move_to_end(profile)
+            while len(memory) > self._max_profiles:
+                memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forgets cached results and every profile's remembered formats."""
+        with self._lock:
+            self._cache.clear()
+            self._last_format.clear()
+            self._last_shape.clear()
+
+    # --- UI pickers ---
+
+    def format_order(self, profile: Optional[Hashable] = None) -> Tuple[str, ...]:
+        """Formats in the order they will be tried for `profile`."""
+        order = self.formats
+        if profile is None:
+            return order
+        dayfirst = DATE_FORMAT_SETTINGS.get(profile)
+        if dayfirst is not None:
+            order = tuple(sorted(order, key=lambda fmt: fmt.startswith('%d') != dayfirst))
+        last = self._last_format.get(profile)
+        if last is not None and last != order[0]:
+            order = (last,) + tuple(fmt for fmt in order if fmt != last)
+        return order
+
+    def parse_ui(self, date_str: str, time_str: str,
+                 profile: Optional[Hashable] = None) -> Optional[_dt.datetime]:
+        """Datetime for the UI's date and time strings, or None if no format fits."""
+        order = self.format_order(profile)
+        key = ('ui', order, date_str, time_str)
+        hit, cached = self._lookup(key)
+        if hit:
+            fmt, result = cached
+        else:
+            fmt, result = self._parse_ui(f"{date_str} {time_str}", order)
+            self._store(key, (fmt, result))
+        if fmt is not None and profile is not None:
+            self._remember(self._last_format, profile, fmt)
+        return result
+
+    @staticmethod
+    def _parse_ui(text: str, order: Sequence[str]) -> Tuple[Optional[str], Optional[_dt.datetime]]:
+        match = _UI_SHAPE.fullmatch(text)
+        for fmt in order:
+            spec = _UI_SPECS.get(fmt)
+            if match is not None and spec is not None:
+                parsed = _build_ui(spec, match.groups())
+            else:
+                try:
+                    parsed = _dt.datetime.strptime(text, fmt)
+                except ValueError:
+                    parsed = None
+            if parsed is not None:
+                return fmt, parsed
+        return None, None
+
+    # --- free text ---
+
+    def shape_order(self, profile: Optional[Hashable] = None) -> Tuple[str, ...]:
+        """Text shapes in the order they will be tried for `profile`."""
+        last = self._last_shape.get(profile)
+        if last is None:
+            return tuple(TEXT_SHAPES)
+        return (last,) + tuple(shape for shape in TEXT_SHAPES if shape != last)
+
+    def parse_text(self, text: str, profile: Optional[Hashable] = None,
+                   today: Optional[_dt.date] = None) -> _dt.datetime:
+        """
+        Parses free text like dateutil.parser.parse(text, dayfirst=..., fuzzy=False);
+        missing date parts default to `today`. Raises ValueError when it cannot.
+        """
+        if not isinstance(text, str):
+            raise TypeError(f"Expected a string, not {type(text).__name__}")
+        dayfirst = DATE_FORMAT_SETTINGS.get(profile, True)
+        today = today or _dt.date.today()
+        key = ('text', dayfirst, today, text)
+        hit, cached = self._lookup(key)
+        if hit:
+            if isinstance(cached, _Failure):
+                raise ValueError(cached)
+            return cached
+        stripped = text.strip()
+        for shape in self.shape_order(profile):
+            match = TEXT_SHAPES[shape].fullmatch(stripped)
+            if match is not None:
+                result = _build_text(shape, match.groups(), dayfirst, today)
+                if result is not None:
+                    self._remember(self._last_shape, profile, shape)
+                    self._store(key, result)
+                    return result
+                break  # shapes do not overlap; let dateutil decide
+        try:
+            result = dateutil_parser.parse(text, dayfirst=dayfirst, fuzzy=False,
+                                           default=_dt.datetime.combine(today, _dt.time()))
+        except ValueError as e:
+            self._store(key, _Failure(e))
+            raise
+        self._store(key, result)
+        return result
+
+
+__all__ = [
+    'UI_FORMATS', 'DATE_FORMAT_SETTINGS', 'TEXT_SHAPES', 'DateTimeParser'
+]
@@ -0,0 +1,164 @@
+"""events.py
+In-process publish/subscribe broker behind the /api/events Server-Sent Events stream.
+Mutation routes publish task.added / task.completed / task.snoozed / task.deleted,
+and DueNotifier publishes task.due when the due scheduler says a task came due.
+
+The broker never starts a thread per subscriber: each subscriber is a bounded queue
+guarded by a Condition, so idle streams cost one blocked wait (a greenlet under a
+gevent/eventlet worker) and publishing is a single fan-out loop.
+"""
+from __future__ import annotations
+import collections
+import datetime as _dt
+import itertools
+import json
+import threading
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+MAX_QUEUE = 256      # events buffered per subscriber before the oldest are dropped
+REPLAY_BUFFER = 256  # recent events kept for reconnecting clients (Last-Event-ID)
+
+
+class Event(Dict[str, Any]):
+    """{'id': int, 'type': str, 'data': dict}"""
+    pass
+
+
+def format_sse(event: Event) -> str:
+    """Encodes one event in text/event-stream wire format."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+class Subscription:
+    """One connected client: a bounded event queue the stream generator waits on."""
+
+    def __init__(self, max_queue: int = MAX_QUEUE):
+        self._queue: Deque[Event] = collections.deque(maxlen=max_queue)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, event: Event) -> None:
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1  # slow consumer: oldest event is discarded
+            self._queue.append(event)
+            self._cond.notify()
+
+    def wait(self, timeout: float) -> List[Event]:
+        """Blocks up to `timeout` seconds and returns all queued events (empty list on timeout)."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._queue)
+            self._queue.clear()
+            return events
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class EventBroker:
+    """Fans events out to all current subscriptions and keeps a short replay buffer."""
+
+    def __init__(self, replay: int = REPLAY_BUFFER):
+        self._subscribers: List[Subscription] = []
+        self._recent: Deque[Event] = collections.deque(maxlen=replay)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """Registers a subscriber; events after `last_event_id` still in the replay buffer are queued."""
+        sub = Subscription()
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event['id'] > last_event_id:
+                        sub.put(event)
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+        sub.close()
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Event:
+        with self._lock:
+            event = Event(id=next(self._ids), type=event_type, data=data)
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.put(event)
+        return event
+
+
+class DueNotifier:
+    """Background timer that publishes task.due exactly when tasks come due.
+
+    Sleeps until the scheduler's next due time (capped at `max_sleep`) and is woken
+    early by wake() whenever a mutation may have changed it. `check` is called with
+    the current time and must return the ids that are due now; `fetch` turns newly
+    due ids into event payloads.
+    """
+
+    def __init__(self, broker: EventBroker, check: Callable[[_dt.datetime], List[int]],
+                 next_due: Callable[[], Optional[_dt.datetime]],
+                 fetch: Callable[[List[int]], List[Dict[str, Any]]], max_sleep: float = 30.0):
+        self.broker = broker
+        self._check = check
+        self._next_due = next_due
+        self._fetch = fetch
+        self._max_sleep = max_sleep
+        self._announced: set = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="due-notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def tick(self, now: _dt.datetime) -> List[int]:
+        """Publishes task.due for ids that became due since the last tick; returns them."""
+        due_ids = self._check(now)
+        new_ids = [task_id for task_id in due_ids if task_id not in self._announced]
+        self._announced = set(due_ids)  # snoozed/completed tasks drop out and can be announced again
+        for task in self._fetch(new_ids) if new_ids else []:
+            self.broker.publish('task.due', task)
+        return new_ids
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick(_dt.datetime.now())
+                next_due = self._next_due()
+            except Exception:
+                next_due = None  # store unavailable; retry after max_sleep
+            timeout = self._max_sleep
+            if next_due is not None:
+                timeout = min(timeout, max(0.0, (next_due - _dt.datetime.now()).total_seconds()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+
+__all__ = [
+    'EventBroker', 'Subscription', 'DueNotifier', 'format_sse'
+]
@@ -0,0 +1,13 @@
+"""gunicorn.conf.py
+Production server settings; `gunicorn app:app` reads them from the working directory.
+
+The gevent worker serves every connection as a greenlet, so an idle /api/events
+subscriber costs a parked greenlet rather than a worker thread. There is a single
+worker process, because the event broker, due notifier and caches live in-process.
+"""
+import os
+
+bind = f"{os.environ.get('MANAGEME_HOST', '0.0.0.0')}:{os.environ.get('MANAGEME_PORT', '5000')}"
+worker_class = 'gevent'
+workers = 1
+worker_connections = int(os.environ.get('MANAGEME_MAX_CONNECTIONS', '1000'))  # open streams + requests
@@ -0,0 +1,140 @@
+"""icon_cache.py
+Startup icon pipeline for the Tkinter client.
+
+Resizing every PNG in 'App Icons/' with LANCZOS on each start is the slowest part of a
+cold start on the Pi. IconCache keeps the resized copies on disk, keyed by icon name,
+target size and the source file's mtime, so a resize happens once per icon and size
+(and again only when the source changes). IconLoader reads them on a background thread
+while the welcome screen is up; the Tk PhotoImage for an icon is created on first use,
+on the Tk thread, and only waits if that icon is not loaded yet.
+Several sizes can be cached side by side; icon_size_for_dpi picks one for the
+display's DPI.
+"""
+from __future__ import annotations
+import concurrent.futures
+import glob
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+try:
+    from PIL import Image, ImageTk
+except ImportError:  # the icons are optional; buttons fall back to no image
+    Image = ImageTk = None
+
+ICON_DIR = "App Icons"
+CACHE_DIR = os.environ.get('MANAGEME_ICON_CACHE', os.path.join(ICON_DIR, ".cache"))
+ICON_SIZES = (48, 64, 96, 128)  # cached variants for different DPIs
+BASE_ICON_SIZE = 64             # size on a 96 DPI display
+
+
+def icon_size_for_dpi(dpi: float) -> int:
+    """Nearest cached size for a display's DPI (Tk: root.winfo_fpixels('1i'))."""
+    wanted = BASE_ICON_SIZE * dpi / 96
+    return min(ICON_SIZES, key=lambda size: abs(size - wanted))
+
+
+class IconCache:
+    """Resized icons persisted under `cache_dir` as '<name>-<size>-<mtime_ns>.png'."""
+
+    def __init__(self, source_dir: str = ICON_DIR, cache_dir: str = CACHE_DIR):
+        if Image is None:
+            raise ImportError("Icons need Pillow (pip install pillow)")
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def source_path(self, name: str) -> str:
+        return os.path.join(self.source_dir, f"{name}.png")
+
+    def cache_path(self, name: str, size: int, mtime_ns: int) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{size}-{mtime_ns}.png")
+
+    def load(self, name: str, size: int) -> "Image.Image":
+        """The icon at size x size, from the cache or resized (and cached) from the source."""
+        mtime_ns = os.stat(self.source_path(name)).st_mtime_ns
+        cached = self.cache_path(name, size, mtime_ns)
+        try:
+            image = Image.open(cached)
+            image.load()  # decode here, off the Tk thread
+            self.hits += 1
+            return image
+        except (OSError, ValueError):
+            pass
+        self.misses += 1
+        with Image.open(self.source_path(name)) as source:
+            image = source.resize((size, size), Image.Resampling.LANCZOS)
+        self._store(name, size, image, cached)
+        return image
+
+    def _store(self, name: str, size: int, image: "Image.Image", path: str) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for stale in glob.glob(os.path.join(glob.escape(self.cache_dir), f"{glob.escape(name)}-{size}-*.png")):
+                os.remove(stale)  # older versions of this icon at this size
+            tmp = f"{path}.{os.getpid()}.tmp"
+            image.save(tmp, format="PNG")
+            os.replace(tmp, path)  # readers never see a partial file
+        except OSError as e:
+            print(f"Could not cache icon {name} ({size}px): {e}")
+
+
+class IconLoader:
+    """
+    Mapping of icon name -> PhotoImage (or None if it could not be loaded), filled in the
+    background. Start it before the first screen; look icons up from the Tk thread.
+    """
+
+    def __init__(self, names: Iterable[str], size: int = BASE_ICON_SIZE, cache: Optional[IconCache] = None):
+        self.size = size
+        self.started = time.perf_counter()
+        self.loaded_seconds: Optional[float] = None  # time until every icon was decoded
+        self._photos: Dict[str, object] = {}
+        names = list(names)
+        self._remaining = len(names)
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="icons")
+        try:
+            self.cache = cache or IconCache()
+        except ImportError as e:
+            print(f"Error loading icons: {e}")
+            self.cache = None
+        self._pending = {name: self._executor.submit(self._load, name) for name in names}
+        self._executor.shutdown(wait=False)
+
+    def _load(self, name: str):
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.load(name, self.size)
+        except Exception as e:
+            print(f"Error loading icon {name}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._remaining -= 1
+                if not self._remaining:
+                    self.loaded_seconds = time.perf_counter() - self.started
+
+    def __getitem__(self, name: str):
+        if name not in self._photos:
+            image = self._pending[name].result()
+            self._photos[name] = ImageTk.PhotoImage(image) if image is not None else None
+        return self._photos[name]
+
+    def get(self, name: str, default=None):
+        return self[name] if name in self._pending else default
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pending
+
+    def wait(self) -> None:
+        """Blocks until every icon is decoded (PhotoImages are still made on first use)."""
+        concurrent.futures.wait(self._pending.values())
+
+
+__all__ = [
+    'ICON_DIR', 'ICON_SIZES', 'icon_size_for_dpi', 'IconCache', 'IconLoader'
+]
@@ -0,0 +1,309 @@
+"""llm_provider.py
+Pluggable interpretation backends for the AI assistant (/api/ai/assist).
+
+A provider turns a conversation into one assistant result ({intent, entities, response},
+the shape interpret_messages returns and apply_actions executes). AssistantEngine runs
+the configured provider on a small bounded thread pool with a timeout, so a slow or
+unreachable model never holds a Flask worker for longer than `timeout` seconds, and
+answers with the rule-based engine whenever the model times out, fails, returns
+something apply_actions cannot execute, or the pool is already full.
+Model answers are cached (LRU with a TTL) by the normalized last user utterance and a
+digest of the turns before it, so a follow-up ("move it to Friday") is only reused
+within the same conversation context.
+
+Select the provider with MANAGEME_LLM ('rules' by default); real model clients
+register themselves with register_provider().
+"""
+from __future__ import annotations
+import abc
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ai_assistant import (AssistantResult, INTENT_ADD, INTENT_COMPLETE, INTENT_DELETE, INTENT_FREE_UP,
+                          INTENT_LIST, INTENT_RESCHEDULE, INTENT_SNOOZE, INTENT_UNKNOWN, interpret_messages)
+
+INTENTS = frozenset({INTENT_ADD, INTENT_COMPLETE, INTENT_LIST, INTENT_SNOOZE, INTENT_DELETE,
+                     INTENT_RESCHEDULE, INTENT_FREE_UP, INTENT_UNKNOWN})
+
+_SPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s.!?,;:]+$')
+
+
+def normalize_utterance(text: str) -> str:
+    """Cache key form of an utterance: lowercase, single spaces, no trailing punctuation."""
+    return _TRAILING_PUNCTUATION.sub('', _SPACE.sub(' ', text.strip().lower()))
+
+
+def last_user_message(messages: List[Dict[str, str]]) -> Optional[str]:
+    """Content of the last user message, or None."""
+    last_user = next((m for m in reversed(messages or []) if m.get('role') == 'user'), None)
+    return None if last_user is None else last_user.get('content', '')
+
+
+def context_digest(messages: List[Dict[str, str]]) -> str:
+    """Digest of the turns before the last user message ('' when there are none)."""
+    last = max((i for i, m in enumerate(messages or []) if m.get('role') == 'user'), default=0)
+    prior = [(m.get('role'), m.get('content')) for m in (messages or [])[:last]]
+    if not prior:
+        return ''
+    return hashlib.sha1(json.dumps(prior, ensure_ascii=False).encode()).hexdigest()
+
+
+class LLMProvider(abc.ABC):
+    """Interface for interpretation backends.
+
+    interpret() is called on an AssistantEngine worker thread and may block (network
+    calls); it returns {'intent', 'entities', 'response'} or raises. `inline` providers
+    are cheap and deterministic: the engine calls them directly, without pool or cache.
+    """
+    name = 'base'
+    inline = False
+
+    @abc.abstractmethod
+    def interpret(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """The assistant result for a conversation (last message last)."""
+
+
+class RuleBasedProvider(LLMProvider):
+    """The keyword rules in ai_assistant.interpret_messages (also the fallback)."""
+    name = 'rules'
+    inline = True
+
+    def interpret(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        return interpret_messages(messages)
+
+
+class StubProvider(LLMProvider):
+    """Local stand-in for a model: canned results per normalized utterance, optional latency.
+
+    Utterances without a canned result get `default` (the rule engine's result when None).
+    `error` is raised instead of answering. Calls are recorded in `calls`.
+    """
+    name = 'stub'
+
+    def __init__(self, responses: Optional[Dict[str, Dict[str, Any]]] = None, delay: float = 0.0,
+                 default: Optional[Dict[str, Any]] = None, error: Optional[Exception] = None):
+        self.responses = {normalize_utterance(k): v for k, v in (responses or {}).items()}
+        self.delay = delay
+        self.default = default
+        self.error = error
+        self.calls: List[str] = []
+
+    def interpret(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        utterance = normalize_utterance(last_user_message(messages) or '')
+        self.calls.append(utterance)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        canned = self.responses.get(utterance, self.default)
+        return dict(canned) if canned is not None else interpret_messages(messages)
+
+
+PROVIDERS: Dict[str, Callable[[], LLMProvider]] = {
+    'rules': RuleBasedProvider,
+    'stub': StubProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[[], LLMProvider]) -> None:
+    """Makes a provider selectable with MANAGEME_LLM=<name>."""
+    PROVIDERS[name] = factory
+
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """Provider instance by name; defaults to $MANAGEME_LLM, then 'rules'."""
+    name = name or os.environ.get('MANAGEME_LLM', 'rules')
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown assistant provider '{name}' (known: {', '.join(sorted(PROVIDERS))})")
+
+
+class ResponseCache:
+    """LRU cache whose entries also expire `ttl` seconds after they were stored."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._entries: "collections.OrderedDict[Hashable, Tuple[float, Any]]" = collections.OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # expired
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _valid(result: Any) -> bool:
+    """True for a result apply_actions can execute."""
+    return (isinstance(result, dict) and result.get('intent') in INTENTS
+            and isinstance(result.get('entities', {}), dict))
+
+
+def _copy(result: Dict[str, Any], source: str) -> AssistantResult:
+    """Fresh result (callers never share a cached entities dict)."""
+    copy = AssistantResult(result)
+    copy['entities'] = dict(result.get('entities') or {})
+    copy.setdefault('response', '')
+    copy['source'] = source
+    return copy
+
+
+class AssistantEngine:
+    """Runs a provider with a timeout on a bounded pool, caching answers, falling back to rules.
+
+    At most `max_pending` calls (default: max_workers) are running or queued at once; a
+    call that would exceed that is answered by the fallback straight away instead of
+    waiting in the executor's queue. A model call that times out keeps its slot until it
+    really returns, and its late answer still fills the cache for the next request.
+    Every result carries 'source': 'provider', 'cache' or 'fallback'.
+    """
+
+    def __init__(self, provider: Optional[LLMProvider] = None, fallback: Optional[LLMProvider] = None,
+                 timeout: float = 5.0, max_workers: int = 4, max_pending: Optional[int] = None,
+                 cache_size: int = 256, ttl: float = 300.0):
+        self.provider = provider or get_provider()
+        self.fallback = fallback or RuleBasedProvider()
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_size, ttl)
+        self._max_workers = max_workers
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers)
+        self._lock = threading.Lock()
+        self.counters = collections.Counter()
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix=f"assistant-{self.provider.name}")
+            return self._executor
+
+    def _key(self, messages: List[Dict[str, str]]) -> Optional[Hashable]:
+        utterance = last_user_message(messages)
+        if not utterance:
+            return None
+        return (self.provider.name, context_digest(messages), normalize_utterance(utterance))
+
+    def _fallback(self, messages: List[Dict[str, str]], reason: str) -> AssistantResult:
+        self.counters['fallback'] += 1
+        self.counters[reason] += 1
+        return _copy(self.fallback.interpret(messages), 'fallback')
+
+    def _run(self, messages: List[Dict[str, str]], key: Hashable) -> Dict[str, Any]:
+        try:
+            result = self.provider.interpret(messages)
+        finally:
+            self._slots.release()
+        if not _valid(result):
+            raise ValueError(f"Provider '{self.provider.name}' returned an unusable result: {result!r}")
+        self.cache.put(key, _copy(result, 'cache'))
+        return result
+
+    def submit(self, messages: List[Dict[str, str]]) -> "concurrent.futures.Future[AssistantResult]":
+        """
+        Starts interpreting without blocking. The future's result is the provider's (or the
+        cache's) answer; it raises when the provider fails and is None when the pool is full
+        or the conversation has no user message (the caller should use the fallback).
+        """
+        future: "concurrent.futures.Future[AssistantResult]" = concurrent.futures.Future()
+        key = self._key(messages)
+        if self.provider.inline or key is None:
+            future.set_result(None)
+            return future
+        cached = self.cache.get(key)
+        if cached is not None:
+            future.set_result(_copy(cached, 'cache'))
+            return future
+        if not self._slots.acquire(blocking=False):
+            future.set_result(None)
+            return future
+        try:
+            return self._pool().submit(lambda: _copy(self._run(messages, key), 'provider'))
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _resolve(self, future: "concurrent.futures.Future[AssistantResult]", messages: List[Dict[str, str]],
+                 timeout: Optional[float]) -> AssistantResult:
+        try:
+            result = future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return self._fallback(messages, 'timeout')
+        except Exception:
+            return self._fallback(messages, 'error')
+        if result is None:
+            return self._fallback(messages, 'busy' if self._key(messages) else 'no_message')
+        self.counters[result['source']] += 1
+        return result
+
+    def interpret(self, messages: List[Dict[str, str]]) -> AssistantResult:
+        """Result for a conversation, waiting at most `timeout` seconds for the provider."""
+        if self.provider.inline:
+            self.counters['provider'] += 1
+            return _copy(self.provider.interpret(messages), 'provider')
+        return self._resolve(self.submit(messages), messages, self.timeout)
+
+    async def ainterpret(self, messages: List[Dict[str, str]]) -> AssistantResult:
+        """interpret() for asyncio callers; awaits the provider without blocking the event loop."""
+        if self.provider.inline:
+            return self.interpret(messages)
+        future = self.submit(messages)
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except Exception:
+            pass  # timeout or provider error: _resolve sees the same outcome on the concurrent future
+        return self._resolve(future, messages, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters by outcome plus cache size, for logging and diagnostics."""
+        return dict(self.counters, provider_name=self.provider.name, cached=len(self.cache),
+                    cache_hits=self.cache.hits, cache_misses=self.cache.misses)
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+__all__ = [
+    'INTENTS', 'normalize_utterance', 'last_user_message', 'context_digest', 'LLMProvider', 'RuleBasedProvider',
+    'StubProvider', 'PROVIDERS', 'register_provider', 'get_provider', 'ResponseCache', 'AssistantEngine'
+]
@@ -2,7 +2,27 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 from tkcalendar import Calendar
 from datetime import datetime, timedelta
-from PIL import Image, ImageTk  # For handling icons
+from client_sync import MAX_NAME_LENGTH, TaskSync
+from icon_cache import IconLoader, icon_size_for_dpi
+from task_index import HourlyIndex
+from view_manager import ViewManager
+from virtual_list import VirtualList
+
+def format_task(task):
+    return f"{task[0].strftime('%H:%M')} - {task[1]} ({task[2]})"
+
+def format_dated_task(task):
+    return f"{task[0].strftime('%Y-%m-%d')} {format_task(task)}"
+
+def format_history_row(row):
+    status, task = row
+    return f"{status}: {format_dated_task(task)}"
+
+def format_hour_row(row):
+    hour, tasks = row
+    return f"{hour:02d}:00 - " + "; ".join(f"{task[1]} ({task[2]})" for task in tasks)
+
+SYNC_CHECK_MS = 500  # how often the UI picks up changes made by the sync thread
 
 class TaskManagerApp:
     def __init__(self, root):
@@ -11,9 +31,18 @@ class TaskManagerApp:
         self.root.geometry("800x480")
         self.root.configure(bg="#f4f4f4")
         
-        self.tasks = []  # Store tasks as a list of tuples (datetime, task_name, frequency)
+        # Tasks are shared with the web app: ClientTask tuples (datetime, task_name, frequency, key)
+        # cached locally and synced with app.py's API in the background (see client_sync.py)
+        self.sync = TaskSync()
+        self.task_index = HourlyIndex()  # the cached tasks by date and hour, for the views
+        self.views = None  # screens right of the sidebar, built once each (see show_main_screen)
+        self.home_date = None  # date the hourly view currently shows
+        self.day_date = None  # date the day view currently shows
         self.current_date = datetime.today().date()  # Track the current date
         self.icons = self.load_icons()        # Load icons
+        self.sync.start()
+        self.root.after(SYNC_CHECK_MS, self.apply_sync_changes)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_welcome_screen()
         
 
@@ -23,17 +52,9 @@ class TaskManagerApp:
             "add_task", "remove_task", "mark_as_complete",
             "home", "settings", "history", "calendar"
         ]
-        icons = {}
-        for name in icon_names:
-            try:
-                image = Image.open(f"App Icons/{name}.png")
-                # Use Image.Resampling.LANCZOS instead of Image.ANTIALIAS
-                image = image.resize((64, 64), Image.Resampling.LANCZOS)  # Resize icons
-                icons[name] = ImageTk.PhotoImage(image)
-            except Exception as e:
-                print(f"Error loading icon {name}: {e}")
-                icons[name] = None
-        return icons
+        # Resized copies are cached on disk and read in the background while the welcome
+        # screen shows; each PhotoImage is made on first use (see icon_cache.py)
+        return IconLoader(icon_names, size=icon_size_for_dpi(self.root.winfo_fpixels('1i')))
 
     def show_welcome_screen(self):
         self.clear_screen()
@@ -98,6 +119,18 @@ class TaskManagerApp:
     def show_main_screen(self):
         self.clear_screen()
         self.create_sidebar()
+        main_area = tk.Frame(self.root, bg="#f4f4f4")
+        main_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Each screen is built on first use and cached; switching only re-packs it and
+        # refreshes its data-bound widgets
+        self.views = ViewManager(main_area, side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.views.register("home", self.build_home_screen, self.refresh_home_screen)
+        self.views.register("add_task", self.build_add_task_screen, self.reset_add_task_screen)
+        self.views.register("calendar", self.build_calendar)
+        self.views.register("day", self.build_day_screen, self.refresh_day_screen)
+        self.views.register("history", self.build_history_screen, self.refresh_history_screen)
+        self.home_date = None
+        self.day_date = None
         self.show_home_screen()
 
     def create_sidebar(self):
@@ -148,75 +181,89 @@ class TaskManagerApp:
         self.task_listbox.pack(fill=tk.BOTH, expand=True)
 
     def show_home_screen(self):
-        self.clear_main_area()
-        frame = tk.Frame(self.root, bg="#f4f4f4")
-        frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Show today's date at the top
-        today_label = tk.Label(frame, text=f"Today's Tasks - {self.current_date.strftime('%Y-%m-%d')}", 
-                               font=("Arial", 16, "bold"), bg="#f4f4f4")
-        today_label.pack(pady=10)
-
-        # Create a canvas for scrolling
-        canvas = tk.Canvas(frame)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        # Create a scrollbar for the canvas
-        scrollbar = tk.Scrollbar(frame, orient="vertical", command=canvas.yview)
-        scrollbar.pack(side=tk.RIGHT, fill="y")
-
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.bind_all('<MouseWheel>', lambda event: canvas.yview_scroll(int(-1*(event.delta/120)), "units"))
-
-        # Create a frame for the hourly tasks inside the canvas
-        task_frame = tk.Frame(canvas, bg="#f4f4f4")
-        canvas.create_window((0, 0), window=task_frame, anchor="nw")
-
-        # Add hourly task slots for the whole day
-        for hour in range(24):
-            task_time = datetime.combine(self.current_date, datetime.min.time()).replace(hour=hour)
-            task_label = tk.Label(task_frame, text=f"{task_time.strftime('%H:%M')} - ", font=("Arial", 12), bg="#f4f4f4")
-            task_label.grid(row=hour, column=0, sticky="w", padx=10, pady=5)
-
-            # Check if there are any tasks for this hour
-            tasks_for_hour = [task for task in self.tasks if task[0].hour == hour and task[0].date() == self.current_date]
-            if tasks_for_hour:
-                for task in tasks_for_hour:
-                    task_name = task[1]
-                    task_frequency = task[2]
-                    task_display = tk.Label(task_frame, text=f"{task_name} ({task_frequency})", font=("Arial", 12), bg="#f4f4f4", anchor="w")
-                    task_display.grid(row=hour, column=1, sticky="w", padx=10, pady=5)
+        self.views.show("home")
+
+    def build_home_screen(self, parent):
+        """The hourly view; refresh_home_screen/update_hour_row fill it in."""
+        frame = tk.Frame(parent, bg="#f4f4f4")
+
+        # Show the selected date at the top
+        self.home_title = tk.Label(frame, font=("Arial", 16, "bold"), bg="#f4f4f4")
+        self.home_title.pack(pady=10)
+
+        # One fixed-height row per hour, listing every task due in that hour; only the
+        # rows in view have widgets (see virtual_list.py)
+        self.hour_list = VirtualList(frame, [(hour, ()) for hour in range(24)], format_item=format_hour_row)
+        self.hour_list.pack(fill=tk.BOTH, expand=True)
+        return frame
+
+    def refresh_home_screen(self):
+        """Shows self.current_date; the list redraws only visible rows whose text changed."""
+        if self.home_date == self.current_date:
+            return
+        self.home_title.config(text=f"Today's Tasks - {self.current_date.strftime('%Y-%m-%d')}")
+        hours = self.task_index.hours(self.current_date)
+        self.hour_list.set_items([(hour, hours.get(hour, ())) for hour in range(24)])
+        self.home_date = self.current_date
+
+    def update_hour_row(self, hour, tasks):
+        self.hour_list.update_item(hour, (hour, tasks))
+
+    def add_task(self, due, name, frequency):
+        """Adds a task; it is shown at once and saved in the background."""
+        self.index_task('add', self.sync.add(due, name, frequency))
+
+    def index_task(self, event, task):
+        """Applies one added/removed task to the index and to the views showing its day."""
+        if event == 'add':
+            day, hour = self.task_index.add(task)
+        else:
+            touched = self.task_index.remove(task)
+            if touched is None:
+                return
+            day, hour = touched
+        if self.home_date == day:
+            self.update_hour_row(hour, self.task_index.hour(day, hour))
+        if self.day_date == day:
+            self.day_list.set_items(self.task_index.for_day(day))
+
+    def apply_sync_changes(self):
+        """Tk timer: shows tasks the sync thread loaded or received, and changes the server refused."""
+        errors = []
+        for event, item in self.sync.changes():
+            if event == 'error':
+                errors.append(item)  # a message
             else:
-                task_display = tk.Label(task_frame, text="", font=("Arial", 12), bg="#f4f4f4", anchor="w")
-                task_display.grid(row=hour, column=1, sticky="w", padx=10, pady=5)
-
-        # Update the scrollable region of the canvas
-        task_frame.update_idletasks()
-        canvas.config(scrollregion=canvas.bbox("all"))
+                self.index_task(event, item)
+        if errors:
+            messagebox.showwarning("Not Saved", "\n".join(errors))
+        self.root.after(SYNC_CHECK_MS, self.apply_sync_changes)
 
+    def on_close(self):
+        self.sync.stop()  # sends what it can within a moment; the rest is saved for next start
+        self.root.destroy()
 
     def show_add_task_screen(self):
-        self.clear_main_area()
-        frame = tk.Frame(self.root, bg="#f4f4f4")
-        frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.views.show("add_task")
+
+    def build_add_task_screen(self, parent):
+        frame = tk.Frame(parent, bg="#f4f4f4")
 
         task_name_label = tk.Label(frame, text="Enter Task Name:")
         task_name_label.pack(pady=10)
-        task_name_entry = tk.Entry(frame)
+        task_name_entry = self.task_name_entry = tk.Entry(frame)
         task_name_entry.pack(pady=10)
         
         date_label = tk.Label(frame, text="Select Task Date (YYYY-MM-DD):")
         date_label.pack(pady=10)
         
         # Entry to show selected date
-        date_entry = tk.Entry(frame)
-        today = datetime.today().strftime('%Y-%m-%d')
-        date_entry.insert(0, today)
+        date_entry = self.task_date_entry = tk.Entry(frame)
         date_entry.pack(pady=10)
 
         time_label = tk.Label(frame, text="Enter Task Time (HH:MM):")
         time_label.pack(pady=10)
-        time_entry = tk.Entry(frame)
+        time_entry = self.task_time_entry = tk.Entry(frame)
         time_entry.pack(pady=10)
 
         frequency_label = tk.Label(frame, text="Select Frequency:")
@@ -224,8 +271,7 @@ class TaskManagerApp:
 
         # Frequency selection (Daily, Weekly, etc.)
         frequency_options = ["Once", "Daily", "Weekly"]
-        frequency_combobox = ttk.Combobox(frame, values=frequency_options)
-        frequency_combobox.set("Once")
+        frequency_combobox = self.task_frequency_combobox = ttk.Combobox(frame, values=frequency_options)
         frequency_combobox.pack(pady=10)
 
         def save_task():
@@ -233,37 +279,77 @@ class TaskManagerApp:
             task_date = date_entry.get()
             task_time = time_entry.get()
             task_frequency = frequency_combobox.get()
-            
+            # Same rules as the API, so a task is never shown here and then refused by the server
+            if not task_name.strip():
+                messagebox.showwarning("Invalid Input", "Please enter a task name.")
+                return
+            if len(task_name) > MAX_NAME_LENGTH:
+                messagebox.showwarning("Invalid Input", f"Task names can be at most {MAX_NAME_LENGTH} characters.")
+                return
+
             try:
                 task_datetime = datetime.strptime(f"{task_date} {task_time}", '%Y-%m-%d %H:%M')
-                self.tasks.append((task_datetime, task_name, task_frequency))
+                self.add_task(task_datetime, task_name, task_frequency)
                 self.show_home_screen()  # Return to home screen after saving
             except ValueError:
                 messagebox.showwarning("Invalid Input", "Please enter a valid date and time in the specified format.")
         
         save_button = ttk.Button(frame, text="Save Task", command=save_task)
         save_button.pack(pady=10)
-
-    def clear_main_area(self):
-        """Clear the main area to the right of the sidebar."""
-        for widget in self.root.winfo_children():
-            if isinstance(widget, tk.Frame) and widget.winfo_x() > 100:  # Assuming sidebar width is 100
-                widget.destroy()
+        return frame
+
+    def reset_add_task_screen(self):
+        """Empties the cached form; the date defaults to today."""
+        self.task_name_entry.delete(0, tk.END)
+        self.task_date_entry.delete(0, tk.END)
+        self.task_date_entry.insert(0, datetime.today().strftime('%Y-%m-%d'))
+        self.task_time_entry.delete(0, tk.END)
+        self.task_frequency_combobox.set("Once")
+
+    def selected_task(self):
+        """The task picked in the current screen's list, or None (after telling the user why)."""
+        current = self.views.current if self.views else None
+        if current == 'day':
+            task = self.day_list.selected_item()
+        elif current == 'history':
+            row = self.history_list.selected_item()
+            task = row[1] if row and row[0] == "Overdue" else None
+        elif current == 'home' and self.hour_list.selected_item():
+            hour, tasks = self.hour_list.selected_item()
+            if len(tasks) > 1:
+                messagebox.showinfo("Select a Task", f"{len(tasks)} tasks are due at {hour:02d}:00. Pick one in the day view.")
+                self.show_tasks_for_date(self.current_date.strftime('%Y-%m-%d'))
+                return None
+            task = tasks[0] if tasks else None
+        else:
+            task = None
+        if task is None:
+            messagebox.showinfo("Select a Task", "Select a task on the home screen, the day view or the history first.")
+        return task
 
     def remove_task(self):
-        # Placeholder for remove task functionality
-        messagebox.showinfo("Remove Task", "Remove task functionality is not implemented yet.")
+        task = self.selected_task()
+        if task and messagebox.askyesno("Remove Task", f"Remove '{task.name}'?"):
+            self.sync.remove(task)
+            self.index_task('remove', task)
+            self.refresh_history_if_shown()
 
     def mark_task_completed(self):
-        # Placeholder for mark task as completed functionality
-        messagebox.showinfo("Mark Task Completed", "Mark task as completed functionality is not implemented yet.")
+        task = self.selected_task()
+        if task:
+            self.sync.complete(task)
+            self.index_task('remove', task)
+            self.refresh_history_if_shown()
+
+    def refresh_history_if_shown(self):
+        if self.views.current == 'history':
+            self.refresh_history_screen()
 
     def show_calendar(self):
-        self.clear_screen()  # Clear the screen before showing the calendar
-        self.create_sidebar()  # Ensure sidebar is still present
-        
-        calendar_frame = tk.Frame(self.root)
-        calendar_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.views.show("calendar")
+
+    def build_calendar(self, parent):
+        calendar_frame = tk.Frame(parent)
 
         cal = Calendar(calendar_frame, selectmode="day", date_pattern="yyyy-mm-dd", font=("Arial", 14), state="normal")
         cal.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -280,31 +366,49 @@ class TaskManagerApp:
             self.show_tasks_for_date(selected_date)
 
         cal.bind("<Double-1>", on_double_click)
+        return calendar_frame
 
     def show_tasks_for_date(self, selected_date):
-        self.clear_screen()  # Clear the screen before showing tasks for a specific date
-        self.create_sidebar()  # Keep the sidebar visible
+        self.views.show("day", datetime.strptime(selected_date, '%Y-%m-%d').date())
 
-        frame = tk.Frame(self.root, bg="#f4f4f4")
-        frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    def build_day_screen(self, parent):
+        frame = tk.Frame(parent, bg="#f4f4f4")
 
-        tasks_for_day = [task for task in self.tasks if task[0].date() == datetime.strptime(selected_date, '%Y-%m-%d').date()]
-        
-        task_listbox = tk.Listbox(frame, font=("Arial", 14))
-        task_listbox.pack(fill=tk.BOTH, expand=True)
+        self.day_title = tk.Label(frame, font=("Arial", 16, "bold"), bg="#f4f4f4")
+        self.day_title.pack(pady=10)
 
-        if tasks_for_day:
-            for task in tasks_for_day:
-                task_listbox.insert(tk.END, f"{task[0].strftime('%H:%M')} - {task[1]} ({task[2]})")
-        else:
-            task_listbox.insert(tk.END, "No tasks for this day.")
+        self.day_list = VirtualList(frame, format_item=format_task, empty_text="No tasks for this day.",
+                                    font=("Arial", 14))
+        self.day_list.pack(fill=tk.BOTH, expand=True)
 
         back_button = ttk.Button(frame, text="Back to Calendar", command=self.show_calendar)
         back_button.pack(pady=10)
+        return frame
+
+    def refresh_day_screen(self, day):
+        self.day_title.config(text=f"Tasks - {day.strftime('%Y-%m-%d')}")
+        self.day_list.set_items(self.task_index.for_day(day))
+        self.day_date = day
 
     def show_history(self):
-        # Placeholder for show history functionality
-        messagebox.showinfo("History", "History functionality is not implemented yet.")
+        self.views.show("history")
+
+    def build_history_screen(self, parent):
+        """Overdue and completed tasks, most recent first."""
+        frame = tk.Frame(parent, bg="#f4f4f4")
+
+        title = tk.Label(frame, text="History - Overdue and Completed Tasks", font=("Arial", 16, "bold"), bg="#f4f4f4")
+        title.pack(pady=10)
+
+        self.history_list = VirtualList(frame, format_item=format_history_row, empty_text="No overdue or completed tasks.")
+        self.history_list.pack(fill=tk.BOTH, expand=True)
+        return frame
+
+    def refresh_history_screen(self):
+        now = datetime.now()
+        rows = [("Overdue", task) for task in self.sync.tasks() if task.due < now]
+        rows += [("Completed", task) for task in self.sync.completed()]
+        self.history_list.set_items(sorted(rows, key=lambda row: row[1], reverse=True))
 
     def show_settings(self):
         # Placeholder for settings functionality
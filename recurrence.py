@@ -0,0 +1,198 @@
+"""recurrence.py
+Lazy expansion of recurring task series (repeatFrequency / customRepeatDays / repeatUntil).
+
+A series is stored once: its row's dueDate is the first occurrence (the anchor) and
+occurrences are computed on demand for whatever window a query asks for. Only
+occurrences a user acted on (completed, snoozed or deleted individually) are
+materialized as instance rows (isRecurringInstance, originalTaskId, occurrenceDate),
+so open-ended daily series never turn into thousands of rows.
+"""
+from __future__ import annotations
+import calendar
+import collections
+import datetime as _dt
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+FREQUENCIES = ('daily', 'weekly', 'weekdays', 'weekends', 'monthly', 'yearly', 'custom')
+
+# customRepeatDays uses the frontend's day numbers: 0 = Sunday ... 6 = Saturday
+WEEKDAYS = frozenset({1, 2, 3, 4, 5})
+WEEKENDS = frozenset({0, 6})
+
+# How far back the most recent occurrence can be for each frequency
+LOOKBACK_DAYS = {'daily': 1, 'weekly': 7, 'weekdays': 7, 'weekends': 7, 'custom': 7,
+                 'monthly': 62, 'yearly': 366 * 8}
+
+
+def is_series(task: Dict[str, Any]) -> bool:
+    """True for a recurring series row (not for a materialized instance)."""
+    return (task.get('repeatFrequency') in FREQUENCIES and not task.get('isRecurringInstance')
+            and task.get('dueDate') is not None)
+
+
+def _frontend_weekday(day: _dt.date) -> int:
+    return (day.weekday() + 1) % 7
+
+
+def _add_months(anchor: _dt.datetime, months: int) -> Optional[_dt.datetime]:
+    """anchor shifted by whole months, or None if that month has no such day (e.g. the 31st)."""
+    month_index = anchor.month - 1 + months
+    year, month = anchor.year + month_index // 12, month_index % 12 + 1
+    if anchor.day > calendar.monthrange(year, month)[1]:
+        return None
+    return anchor.replace(year=year, month=month)
+
+
+def iter_occurrences(series: Dict[str, Any], start: _dt.datetime,
+                     end: Optional[_dt.datetime] = None) -> Iterator[_dt.datetime]:
+    """
+    Yields occurrences with start <= occurrence < end (end=None: until repeatUntil or forever).
+    Jumps straight to the window instead of walking from the anchor, so cost is O(k).
+    """
+    anchor: _dt.datetime = series['dueDate']
+    freq = series.get('repeatFrequency')
+    until = series.get('repeatUntil')
+    if isinstance(until, _dt.datetime):
+        until = until.date()
+    start = max(start, anchor)
+
+    def in_range(occ: _dt.datetime) -> bool:
+        return end is None or occ < end
+
+    def past_until(occ: _dt.datetime) -> bool:
+        return until is not None and occ.date() > until
+
+    if freq in ('daily', 'weekly'):
+        step = _dt.timedelta(days=1 if freq == 'daily' else 7)
+        skipped = -(-(start - anchor) // step)  # ceil division of timedeltas
+        occ = anchor + skipped * step
+        while in_range(occ) and not past_until(occ):
+            yield occ
+            occ += step
+    elif freq in ('weekdays', 'weekends', 'custom'):
+        days = {'weekdays': WEEKDAYS, 'weekends': WEEKENDS}.get(freq)
+        if days is None:
+            days = frozenset(int(d) for d in series.get('customRepeatDays') or [])
+        if not days:
+            return
+        occ = _dt.datetime.combine(start.date(), anchor.time())
+        if occ < start:
+            occ += _dt.timedelta(days=1)
+        while in_range(occ) and not past_until(occ):
+            if _frontend_weekday(occ.date()) in days:
+                yield occ
+            occ += _dt.timedelta(days=1)
+    elif freq in ('monthly', 'yearly'):
+        step = 1 if freq == 'monthly' else 12
+        months = max(0, (start.year - anchor.year) * 12 + start.month - anchor.month - step)
+        months -= months % step
+        while True:
+            occ = _add_months(anchor, months)
+            months += step
+            if occ is None:
+                continue
+            if occ < start:
+                continue
+            if not in_range(occ) or past_until(occ):
+                return
+            yield occ
+
+
+def previous_occurrence(series: Dict[str, Any], at: _dt.datetime) -> Optional[_dt.datetime]:
+    """Most recent occurrence at or before `at`, or None."""
+    lookback = _dt.timedelta(days=LOOKBACK_DAYS.get(series.get('repeatFrequency'), 7))
+    last = None
+    for occ in iter_occurrences(series, at - lookback, at + _dt.timedelta(microseconds=1)):
+        last = occ
+    return last
+
+
+def next_occurrence(series: Dict[str, Any], after: _dt.datetime) -> Optional[_dt.datetime]:
+    """First occurrence strictly after `after`, or None if the series has ended."""
+    return next(iter_occurrences(series, after + _dt.timedelta(microseconds=1)), None)
+
+
+def current_occurrence(series: Dict[str, Any], now: _dt.datetime,
+                       is_handled: Callable[[_dt.datetime], bool]) -> Optional[_dt.datetime]:
+    """
+    The occurrence reminders should track: the latest one at or before `now` if it has
+    not been handled (completed/snoozed/deleted), otherwise the next one.
+    Older missed occurrences are not re-announced.
+    """
+    prev = previous_occurrence(series, now)
+    if prev is not None and not is_handled(prev):
+        return prev
+    return next_occurrence(series, now)
+
+
+def make_instance(series: Dict[str, Any], occurrence: _dt.datetime) -> Dict[str, Any]:
+    """Virtual (not stored) instance of a series at one occurrence."""
+    instance = series.copy()
+    instance.update({
+        "dueDate": occurrence,
+        "occurrenceDate": occurrence,
+        "isRecurringInstance": True,
+        "originalTaskId": series['id'],
+    })
+    return instance
+
+
+class RecurrenceEngine:
+    """Memoizes expansions per (series, window) with LRU eviction.
+
+    Entries are keyed by series id and also remember the rule they were computed
+    from, so an edited series never serves stale occurrences even if
+    invalidate() was missed.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._memo: "collections.OrderedDict[Tuple[int, _dt.datetime, _dt.datetime], Tuple[tuple, List[_dt.datetime]]]" = collections.OrderedDict()
+        self._keys_by_series: Dict[int, set] = collections.defaultdict(set)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _rule(series: Dict[str, Any]) -> tuple:
+        return (series['dueDate'], series.get('repeatFrequency'),
+                tuple(series.get('customRepeatDays') or ()), series.get('repeatUntil'))
+
+    def occurrences(self, series: Dict[str, Any], start: _dt.datetime, end: _dt.datetime) -> List[_dt.datetime]:
+        key = (series['id'], start, end)
+        rule = self._rule(series)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None and cached[0] == rule:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+        result = list(iter_occurrences(series, start, end))
+        with self._lock:
+            self.misses += 1
+            self._memo[key] = (rule, result)
+            self._keys_by_series[series['id']].add(key)
+            while len(self._memo) > self._max_entries:
+                old_key, _ = self._memo.popitem(last=False)
+                self._keys_by_series[old_key[0]].discard(old_key)
+        return result
+
+    def invalidate(self, series_id: int) -> None:
+        """Drops every memoized window of one series (call when it is edited)."""
+        with self._lock:
+            for key in self._keys_by_series.pop(series_id, ()):
+                self._memo.pop(key, None)
+
+    def expand(self, series: Dict[str, Any], start: _dt.datetime, end: _dt.datetime,
+               handled: Optional[set] = None) -> List[Dict[str, Any]]:
+        """Virtual instances in [start, end), skipping occurrences already materialized."""
+        handled = handled or set()
+        return [make_instance(series, occ) for occ in self.occurrences(series, start, end)
+                if occ not in handled]
+
+
+__all__ = [
+    'FREQUENCIES', 'is_series', 'iter_occurrences', 'previous_occurrence', 'next_occurrence',
+    'current_occurrence', 'make_instance', 'RecurrenceEngine'
+]
@@ -0,0 +1,140 @@
+"""schedule_optimizer.py
+Free-time optimizer behind the assistant's FREE_UP intent ("free up my afternoon").
+
+Each task is modelled as one SLOT-long block starting at its dueDate. To free a day
+(or a period of it), the lowest-priority, latest tasks are moved to the nearest free
+slot on the following days: the same time of day if it is free, otherwise the closest
+gap within MAX_SHIFT of it inside working hours. Busy slots of the search horizon
+(including recurring occurrences) sit in a sorted list, so every free-slot check is a
+bisect, and all moves are written with one batched update.
+High-priority tasks and recurring series are never moved.
+"""
+from __future__ import annotations
+import bisect
+import datetime as _dt
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+
+from recurrence import is_series, iter_occurrences
+from task_model import Priority
+
+SLOT = _dt.timedelta(minutes=30)  # time a task is assumed to take
+DAY_START = _dt.time(8, 0)        # gaps are searched within working hours...
+DAY_END = _dt.time(21, 0)
+MAX_SHIFT = _dt.timedelta(hours=3)  # ...and at most this far from the original time of day
+SEARCH_DAYS = 7
+MAX_MOVES = 3
+# Parts of a day FREE_UP can target ("clear my morning"); end is exclusive
+PERIODS = {
+    'morning': (_dt.time(0, 0), _dt.time(12, 0)),
+    'afternoon': (_dt.time(12, 0), _dt.time(17, 0)),
+    'evening': (_dt.time(17, 0), None),
+}
+
+
+class Move(NamedTuple):
+    task_id: int
+    description: str
+    old: _dt.datetime
+    new: _dt.datetime
+
+
+class FreeUpPlan(NamedTuple):
+    considered: int  # tasks in the targeted window
+    moves: List[Move]
+
+
+def period_bounds(day: _dt.date, period: Optional[str] = None) -> Tuple[_dt.datetime, _dt.datetime]:
+    """Half-open [start, end) for a whole day or one of PERIODS on it."""
+    start, end = _dt.time(0, 0), None
+    if period is not None:
+        start, end = PERIODS[period]
+    day_start = _dt.datetime.combine(day, _dt.time(0, 0))
+    return (_dt.datetime.combine(day, start),
+            _dt.datetime.combine(day, end) if end else day_start + _dt.timedelta(days=1))
+
+
+class BusySlots:
+    """Sorted start times of SLOT-long blocks; a new block fits where no start is within SLOT."""
+
+    def __init__(self, starts: Iterable[_dt.datetime] = (), slot: _dt.timedelta = SLOT):
+        self._starts = sorted(starts)
+        self._slot = slot
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def is_free(self, start: _dt.datetime) -> bool:
+        i = bisect.bisect_right(self._starts, start - self._slot)
+        return i == len(self._starts) or self._starts[i] >= start + self._slot
+
+    def add(self, start: _dt.datetime) -> None:
+        bisect.insort(self._starts, start)
+
+    def nearest_free(self, preferred: _dt.datetime, earliest: _dt.datetime, latest: _dt.datetime,
+                     max_shift: _dt.timedelta = MAX_SHIFT) -> Optional[_dt.datetime]:
+        """`preferred` if free, else the free start closest to it (later first on ties) in [earliest, latest)."""
+        if self.is_free(preferred):
+            return preferred
+        steps = int(max_shift / self._slot)
+        for step in range(1, steps + 1):
+            for candidate in (preferred + step * self._slot, preferred - step * self._slot):
+                if earliest <= candidate < latest and self.is_free(candidate):
+                    return candidate
+        return None
+
+
+def plan_free_up(day_tasks: Iterable[Any], busy: Iterable[_dt.datetime], max_moves: int = MAX_MOVES,
+                 search_days: int = SEARCH_DAYS) -> List[Move]:
+    """
+    Moves for up to `max_moves` of `day_tasks` (the tasks to clear) into free slots
+    among `busy` (block starts on the following `search_days` days). Pure: nothing is written.
+    """
+    candidates = [t for t in day_tasks if not is_series(t) and t.get('dueDate') is not None
+                  and Priority.parse(t.get('priority'), Priority.MEDIUM) is not Priority.HIGH]
+    # Lowest priority first, later tasks before earlier ones
+    candidates.sort(key=lambda t: (Priority.parse(t.get('priority'), Priority.MEDIUM).rank,
+                                   -t['dueDate'].timestamp()))
+    slots = BusySlots(busy)
+    moves: List[Move] = []
+    for task in candidates:
+        if len(moves) >= max_moves:
+            break
+        due = task['dueDate']
+        for offset in range(1, search_days + 1):
+            preferred = due + _dt.timedelta(days=offset)
+            earliest = min(preferred, _dt.datetime.combine(preferred.date(), DAY_START))
+            latest = max(preferred + SLOT, _dt.datetime.combine(preferred.date(), DAY_END))
+            new = slots.nearest_free(preferred, earliest, latest)
+            if new is not None:
+                slots.add(new)
+                moves.append(Move(task['id'], task['description'], due, new))
+                break
+    return moves
+
+
+def busy_starts(store: Any, start: _dt.datetime, end: _dt.datetime) -> List[_dt.datetime]:
+    """Block starts in [start, end): active tasks plus occurrences of recurring series."""
+    starts = store.due_dates_between(start, end)  # includes series anchors: one extra start at most
+    for series in store.series_between(start, end):
+        starts.extend(iter_occurrences(series, start, end))
+    return starts
+
+
+def free_up(store: Any, day: _dt.date, period: Optional[str] = None, max_moves: int = MAX_MOVES,
+            search_days: int = SEARCH_DAYS) -> FreeUpPlan:
+    """Plans and applies (one batched update) the moves that free `day` or a period of it."""
+    day_tasks = store.tasks_between(*period_bounds(day, period))
+    if not day_tasks:
+        return FreeUpPlan(0, [])
+    horizon = _dt.datetime.combine(day + _dt.timedelta(days=1), _dt.time(0, 0))
+    busy = busy_starts(store, horizon, horizon + _dt.timedelta(days=search_days + 1))
+    moves = plan_free_up(day_tasks, busy, max_moves, search_days)
+    if moves:
+        store.reschedule_many((m.task_id, m.new) for m in moves)
+    return FreeUpPlan(len(day_tasks), moves)
+
+
+__all__ = [
+    'SLOT', 'PERIODS', 'Move', 'FreeUpPlan', 'period_bounds', 'BusySlots', 'plan_free_up',
+    'busy_starts', 'free_up'
+]
@@ -0,0 +1,103 @@
+"""scheduler.py
+Due-task scheduler for the ManageMe backend.
+Holds active tasks in a min-heap keyed by dueDate so /api/due_tasks no longer
+scans every task: newly due tasks are popped in O(k log N) and the next due
+time is a heap peek. Snooze/complete/delete update it by lazy invalidation
+(stale heap entries are skipped when they reach the top).
+"""
+from __future__ import annotations
+import datetime as _dt
+import heapq
+import itertools
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from task_store import get_priority_value
+
+
+class DueScheduler:
+    """Min-heap of (dueDate, seq, task_id) plus the set of tasks that are already due.
+
+    `_scheduled` maps task_id -> (dueDate, priority value) for the live entry of each
+    pending task; any heap entry whose dueDate no longer matches it is stale.
+    `_fired` holds tasks whose due time has passed and that are still active.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[_dt.datetime, int, int]] = []
+        self._scheduled: Dict[int, Tuple[_dt.datetime, int]] = {}
+        self._fired: Dict[int, Tuple[_dt.datetime, int]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def load(self, tasks: Iterable[dict]) -> None:
+        """Replaces the schedule with the given active tasks (dicts with id/dueDate/priority)."""
+        with self._lock:
+            self._scheduled = {t['id']: (t['dueDate'], get_priority_value(t.get('priority')))
+                               for t in tasks if t.get('dueDate')}
+            self._fired = {}
+            self._heap = [(due, next(self._seq), task_id) for task_id, (due, _) in self._scheduled.items()]
+            heapq.heapify(self._heap)
+            self.loaded = True
+
+    def invalidate(self) -> None:
+        """Forces a reload on next use (after bulk or out-of-band changes)."""
+        with self._lock:
+            self.loaded = False
+
+    def schedule(self, task_id: int, due: _dt.datetime, priority: Optional[str] = None) -> None:
+        """Adds a task or moves it to a new due time (e.g. after a snooze)."""
+        with self._lock:
+            self._fired.pop(task_id, None)
+            self._scheduled[task_id] = (due, get_priority_value(priority))
+            heapq.heappush(self._heap, (due, next(self._seq), task_id))
+            if len(self._heap) > 2 * len(self._scheduled) + 64:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Rebuilds the heap without stale entries so repeated snoozes cannot grow it unbounded."""
+        self._heap = [entry for entry in self._heap if self._is_live(entry[0], entry[2])]
+        heapq.heapify(self._heap)
+
+    def cancel(self, task_id: int) -> None:
+        """Removes a completed or deleted task; its heap entry becomes stale."""
+        with self._lock:
+            self._scheduled.pop(task_id, None)
+            self._fired.pop(task_id, None)
+
+    def _is_live(self, due: _dt.datetime, task_id: int) -> bool:
+        entry = self._scheduled.get(task_id)
+        return entry is not None and entry[0] == due
+
+    def _drop_stale_top(self) -> None:
+        while self._heap and not self._is_live(self._heap[0][0], self._heap[0][2]):
+            heapq.heappop(self._heap)
+
+    def due_ids(self, now: _dt.datetime) -> List[int]:
+        """Ids of all active tasks due at or before `now`, highest priority then earliest first."""
+        with self._lock:
+            self._drop_stale_top()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, task_id = heapq.heappop(self._heap)
+                self._fired[task_id] = self._scheduled.pop(task_id)
+                self._drop_stale_top()
+            return [task_id for task_id, _ in
+                    sorted(self._fired.items(), key=lambda item: (-item[1][1], item[1][0]))]
+
+    def due_at(self, task_id: int) -> Optional[_dt.datetime]:
+        """Due time the scheduler holds for a task (fired or pending), or None."""
+        with self._lock:
+            entry = self._fired.get(task_id) or self._scheduled.get(task_id)
+            return entry[0] if entry else None
+
+    def next_due_at(self) -> Optional[_dt.datetime]:
+        """Due time of the earliest pending (not yet due) task, or None."""
+        with self._lock:
+            self._drop_stale_top()
+            return self._heap[0][0] if self._heap else None
+
+
+__all__ = [
+    'DueScheduler'
+]
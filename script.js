@@ -1347,6 +1347,7 @@ async function addTask() {
         description: taskDescription,
         dueDate: taskDateStr, // String from date picker
         dueTime: taskTimeStr, // String from time picker
+        dateFormat: state.settings.dateFormat, // Lets the server try the user's date order first
         priority: taskPriorityValue,
         repeatFrequency: repeat,
         customRepeatDays: customDays,
@@ -0,0 +1,116 @@
+"""serialization.py
+JSON encoding of tasks (Task records or task dicts) for the ManageMe list endpoints.
+Each task's encoded JSON object is cached by (id, dueDate) until a mutation
+invalidates it, so list responses are built by joining cached byte fragments
+instead of re-converting and re-encoding unchanged tasks on every request.
+orjson is used as the encoder when installed (MANAGEME_JSON=json forces the stdlib).
+"""
+from __future__ import annotations
+import collections
+import datetime as _dt
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_PLAIN_TYPES = frozenset({str, int, float, bool, list, dict, type(None)})
+_DATE_TYPES = frozenset({_dt.datetime, _dt.date})
+
+
+def to_json_dict(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a task with datetimes as ISO strings (and any other odd value as str)."""
+    result = {}
+    for key, value in task.items():
+        kind = type(value)
+        if kind in _PLAIN_TYPES:
+            result[key] = value
+        elif kind in _DATE_TYPES:
+            result[key] = value.isoformat()
+        else:
+            result[key] = str(value)  # e.g. Priority -> 'priority-high'
+    return result
+
+
+def _stdlib_dumps(task: Dict[str, Any]) -> bytes:
+    return json.dumps(to_json_dict(task), separators=(',', ':')).encode()
+
+
+def _orjson_dumps(task: Dict[str, Any]) -> bytes:
+    # orjson writes naive datetimes/dates exactly like isoformat(), so no conversion pass
+    return orjson.dumps(task, default=str)
+
+
+def get_encoder(name: Optional[str] = None) -> Callable[[Dict[str, Any]], bytes]:
+    """Task encoder: 'orjson', 'json' or 'auto' (orjson if importable); defaults to $MANAGEME_JSON."""
+    name = name or os.environ.get('MANAGEME_JSON', 'auto')
+    if name == 'orjson' and orjson is None:
+        raise ImportError("MANAGEME_JSON=orjson but orjson is not installed")
+    if name in ('orjson', 'auto') and orjson is not None:
+        return _orjson_dumps
+    return _stdlib_dumps
+
+
+class TaskSerializer:
+    """LRU cache of encoded task objects keyed by (id, dueDate).
+
+    dueDate is part of the key so virtual recurring instances (which share their
+    series id) get one entry per occurrence and a snoozed task never reuses its old
+    encoding. Other edits must call invalidate(task_id), or clear() after bulk changes.
+    """
+
+    def __init__(self, max_entries: int = 4096, encoder: Optional[str] = None):
+        self._dumps = get_encoder(encoder)
+        self._cache: "collections.OrderedDict[Tuple[int, Any], bytes]" = collections.OrderedDict()
+        self._keys_by_id: Dict[int, set] = collections.defaultdict(set)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, task: Dict[str, Any]) -> bytes:
+        """Encoded JSON object for one task (cached)."""
+        key = (task['id'], task.get('dueDate'))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+        encoded = self._dumps(task)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = encoded
+            self._keys_by_id[key[0]].add(key)
+            while len(self._cache) > self._max_entries:
+                old_key, _ = self._cache.popitem(last=False)
+                self._keys_by_id[old_key[0]].discard(old_key)
+        return encoded
+
+    def encode_uncached(self, task: Dict[str, Any]) -> bytes:
+        """Encodes without touching the cache (a full export would evict every hot entry)."""
+        return self._dumps(task)
+
+    def encode_list(self, tasks: Iterable[Dict[str, Any]]) -> bytes:
+        """JSON array of tasks, in the given order."""
+        return b'[' + b','.join(self.encode(t) for t in tasks) + b']'
+
+    def invalidate(self, task_id: int) -> None:
+        """Drops every cached encoding of one task (all occurrences for a series)."""
+        with self._lock:
+            for key in self._keys_by_id.pop(task_id, ()):
+                self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._keys_by_id.clear()
+
+
+__all__ = [
+    'to_json_dict', 'get_encoder', 'TaskSerializer'
+]
@@ -393,7 +393,7 @@ async function processTranscriptForField(transcript) {
                 updateFieldStatus('datetime', `Asking server to parse: "${transcript}"...`, false);
                 try {
                     // Use apiRequest from script.js (ensure it's globally accessible or passed)
-                    const response = await apiRequest('/api/parse-datetime', 'POST', { text: transcript });
+                    const response = await apiRequest('/api/parse-datetime', 'POST', { text: transcript, dateFormat: state.settings.dateFormat });
 
                     if (response && !response.error) {
                         // Backend successfully parsed
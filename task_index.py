@@ -0,0 +1,135 @@
+"""task_index.py
+In-process secondary indexes over task due dates.
+DueDateIndex keeps (dueDate, task_id) keys in a bisect-maintained sorted list so that
+day / month / range lookups cost O(log N + k) and come back already time-ordered.
+HourlyIndex buckets tasks by day and hour for the Tkinter client's hourly view.
+"""
+from __future__ import annotations
+import bisect
+import datetime as _dt
+import sys
+from typing import Dict, List, Optional, Tuple
+
+_MAX_ID = sys.maxsize
+
+
+def day_bounds(day: _dt.date) -> Tuple[_dt.datetime, _dt.datetime]:
+    """Half-open [start, end) datetime range covering one calendar day."""
+    start = _dt.datetime.combine(day, _dt.time.min)
+    return start, start + _dt.timedelta(days=1)
+
+
+def month_bounds(year: int, month: int) -> Tuple[_dt.datetime, _dt.datetime]:
+    """Half-open [start, end) datetime range covering one calendar month."""
+    start = _dt.datetime(year, month, 1)
+    end = _dt.datetime(year + 1, 1, 1) if month == 12 else _dt.datetime(year, month + 1, 1)
+    return start, end
+
+
+class DueDateIndex:
+    """Sorted (dueDate, task_id) index with O(log N) point updates by task id."""
+
+    def __init__(self):
+        self._keys: List[Tuple[_dt.datetime, int]] = []
+        self._due_by_id: Dict[int, _dt.datetime] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._due_by_id
+
+    def add(self, task_id: int, due: _dt.datetime) -> None:
+        """Inserts or moves a task to `due`."""
+        if task_id in self._due_by_id:
+            self.discard(task_id)
+        bisect.insort(self._keys, (due, task_id))
+        self._due_by_id[task_id] = due
+
+    def discard(self, task_id: int) -> None:
+        """Removes a task if present."""
+        due = self._due_by_id.pop(task_id, None)
+        if due is None:
+            return
+        i = bisect.bisect_left(self._keys, (due, task_id))
+        del self._keys[i]
+
+    def due_of(self, task_id: int) -> Optional[_dt.datetime]:
+        return self._due_by_id.get(task_id)
+
+    def between(self, start: _dt.datetime, end: _dt.datetime) -> List[int]:
+        """Task ids with start <= dueDate < end, in due order."""
+        lo = bisect.bisect_left(self._keys, (start,))
+        hi = bisect.bisect_left(self._keys, (end,))
+        return [task_id for _, task_id in self._keys[lo:hi]]
+
+    def up_to(self, end: _dt.datetime) -> List[int]:
+        """Task ids with dueDate <= end, in due order."""
+        hi = bisect.bisect_right(self._keys, (end, _MAX_ID))
+        return [task_id for _, task_id in self._keys[:hi]]
+
+    def all(self) -> List[int]:
+        return [task_id for _, task_id in self._keys]
+
+    def for_day(self, day: _dt.date) -> List[int]:
+        return self.between(*day_bounds(day))
+
+    def for_month(self, year: int, month: int) -> List[int]:
+        return self.between(*month_bounds(year, month))
+
+
+class HourlyIndex:
+    """
+    Tasks bucketed by calendar day, then hour, each bucket kept in time order.
+    Items are tuples whose first element is the due datetime (the Tkinter client's
+    (datetime, name, frequency) tasks). add/remove return the (day, hour) they touched,
+    so a view can redraw only that row; a day lookup is one dict access.
+    """
+
+    def __init__(self, items=()):
+        self._days: Dict[_dt.date, Dict[int, list]] = {}
+        self._size = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, item: tuple) -> Tuple[_dt.date, int]:
+        due = item[0]
+        bisect.insort(self._days.setdefault(due.date(), {}).setdefault(due.hour, []), item)
+        self._size += 1
+        return due.date(), due.hour
+
+    def remove(self, item: tuple) -> Optional[Tuple[_dt.date, int]]:
+        """Removes one occurrence of `item`; None if it is not indexed."""
+        due = item[0]
+        hours = self._days.get(due.date())
+        bucket = hours.get(due.hour) if hours else None
+        if not bucket or item not in bucket:
+            return None
+        bucket.remove(item)
+        if not bucket:
+            del hours[due.hour]
+            if not hours:
+                del self._days[due.date()]
+        self._size -= 1
+        return due.date(), due.hour
+
+    def hour(self, day: _dt.date, hour: int) -> list:
+        """Items due in that hour of `day`, in time order."""
+        return list(self._days.get(day, {}).get(hour, ()))
+
+    def hours(self, day: _dt.date) -> Dict[int, list]:
+        """{hour: items} for the non-empty hours of `day`."""
+        return {hour: list(items) for hour, items in self._days.get(day, {}).items()}
+
+    def for_day(self, day: _dt.date) -> list:
+        """Every item due on `day`, in time order."""
+        hours = self._days.get(day, {})
+        return [item for hour in sorted(hours) for item in hours[hour]]
+
+
+__all__ = [
+    'DueDateIndex', 'HourlyIndex', 'day_bounds', 'month_bounds'
+]
@@ -0,0 +1,780 @@
+"""task_store.py
+Task storage for the ManageMe Flask backend.
+TaskStore is SQLite-backed: all list queries are expressed as index range scans over
+`dueDate`, `completedAt` and `deletedAt` so they stay fast on boards with years of history.
+MemoryTaskStore keeps the same API without a database, using a sorted due-date index.
+Both return Task records (task_model.py).
+Descriptions are full-text indexed (FTS5) for the assistant's ranked task lookups.
+"""
+from __future__ import annotations
+import abc
+import base64
+import contextlib
+import datetime as _dt
+import enum
+import itertools
+import json
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from task_index import DueDateIndex, day_bounds, month_bounds
+from task_model import FIELD_NAMES, Priority, REPEAT_FREQUENCIES, Task
+
+TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    description TEXT NOT NULL,
+    dueDate TEXT NOT NULL,
+    priority TEXT DEFAULT 'priority-medium',
+    repeatFrequency TEXT DEFAULT 'none',
+    customRepeatDays TEXT,
+    repeatUntil TEXT,
+    completed INTEGER DEFAULT 0,
+    snoozedUntil TEXT,
+    snoozeDuration TEXT,
+    deletedAt TEXT,
+    completedAt TEXT,
+    createdAt TEXT NOT NULL,
+    isRecurringInstance INTEGER DEFAULT 0,
+    originalTaskId INTEGER,
+    occurrenceDate TEXT
+);
+"""
+
+INDEX_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_tasks_active_due ON tasks(completed, deletedAt, dueDate);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed, deletedAt, completedAt);
+CREATE INDEX IF NOT EXISTS idx_tasks_deletedAt ON tasks(deletedAt);
+CREATE INDEX IF NOT EXISTS idx_tasks_series ON tasks(dueDate) WHERE repeatFrequency <> 'none' AND isRecurringInstance = 0;
+CREATE INDEX IF NOT EXISTS idx_tasks_instances ON tasks(originalTaskId, occurrenceDate);
+"""
+
+# Full-text index over descriptions (external content: rows live in tasks, triggers keep
+# it in sync). Prefix indexes make the per-word prefix queries of search_tasks cheap.
+FTS_TABLE = """
+CREATE VIRTUAL TABLE tasks_fts USING fts5(
+    description, content='tasks', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+"""
+
+FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts(rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, description) VALUES ('delete', old.id, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF description ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    INSERT INTO tasks_fts(rowid, description) VALUES (new.id, new.description);
+END;
+"""
+
+# Words dropped from search queries ("complete the pills task" looks for 'pills')
+SEARCH_STOPWORDS = frozenset({'a', 'an', 'the', 'my', 'our', 'to', 'for', 'of', 'on', 'at', 'in',
+                              'and', 'with', 'task', 'tasks'})
+
+# Columns added after the first schema shipped; older database files are upgraded in place.
+MIGRATION_COLUMNS = {
+    'isRecurringInstance': "INTEGER DEFAULT 0",
+    'originalTaskId': "INTEGER",
+    'occurrenceDate': "TEXT",
+}
+
+DATETIME_FIELDS = ('dueDate', 'snoozedUntil', 'deletedAt', 'completedAt', 'createdAt', 'occurrenceDate')
+
+PRIORITY_ORDER_SQL = ("CASE priority WHEN 'priority-high' THEN 3 "
+                      "WHEN 'priority-medium' THEN 2 WHEN 'priority-low' THEN 1 ELSE 0 END")
+
+ACTIVE_WHERE = "completed = 0 AND deletedAt IS NULL"
+
+# Matches the partial index idx_tasks_series (terms must appear verbatim for SQLite to use it)
+SERIES_WHERE = "repeatFrequency <> 'none' AND isRecurringInstance = 0"
+NOT_SERIES_WHERE = "(repeatFrequency IS NULL OR repeatFrequency = 'none' OR isRecurringInstance = 1)"
+
+# Keyset pagination: each paged list has a total order ending in the unique id, and the
+# cursor is the sort key of the last row returned (see sort_key / encode_cursor).
+ORDER_SQL = {
+    'due': ("dueDate, id", "(dueDate, id) > (?, ?)"),
+    'completed': ("completedAt DESC, id DESC", "(completedAt, id) < (?, ?)"),
+    'deleted': ("deletedAt DESC, id DESC", "(deletedAt, id) < (?, ?)"),
+}
+DESCENDING_ORDERS = ('completed', 'deleted')
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Opens a connection with Row access by column name (as ai_assistant expects)."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def create_tables(conn: sqlite3.Connection) -> None:
+    """Creates the tasks table and its indexes, upgrading older files if needed."""
+    conn.executescript(TABLE_SCHEMA)
+    existing = {r['name'] for r in conn.execute("PRAGMA table_info(tasks)")}
+    for column, decl in MIGRATION_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {decl}")
+    conn.execute("DROP INDEX IF EXISTS idx_tasks_completedAt")  # superseded by idx_tasks_completed
+    # Completed history is keyed on completedAt; rows from before it was recorded use their due date
+    conn.execute("UPDATE tasks SET completedAt = dueDate WHERE completed = 1 AND completedAt IS NULL")
+    conn.executescript(INDEX_SCHEMA)
+    _create_fts(conn)
+    conn.commit()
+
+
+def _create_fts(conn: sqlite3.Connection) -> None:
+    """Creates tasks_fts and its triggers, indexing existing rows; skipped without FTS5."""
+    if not has_fts(conn):
+        try:
+            conn.execute(FTS_TABLE)
+        except sqlite3.OperationalError:  # SQLite built without FTS5: search_tasks uses LIKE
+            return
+        conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+    conn.executescript(FTS_TRIGGERS)
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'").fetchone() is not None
+
+
+def search_terms(query: str) -> List[str]:
+    """Lowercased words of a search query without stopwords (kept if nothing else is left)."""
+    words = re.findall(r'\w+', query.lower())
+    return [w for w in words if w not in SEARCH_STOPWORDS] or words
+
+
+def to_db_value(value: Any) -> Any:
+    """Converts a Python value into what is stored in SQLite (ISO text for dates)."""
+    if isinstance(value, (_dt.datetime, _dt.date)):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def _parse_dt(value: Optional[str]) -> Optional[_dt.datetime]:
+    if not value:
+        return None
+    try:
+        return _dt.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def row_to_task(row: sqlite3.Row) -> Task:
+    """Converts a tasks row into a Task (datetimes as objects; bad legacy values get defaults)."""
+    task = dict(row)
+    for key in DATETIME_FIELDS:
+        if key in task:
+            task[key] = _parse_dt(task[key])
+    if task.get('repeatUntil'):
+        try:
+            task['repeatUntil'] = _dt.date.fromisoformat(task['repeatUntil'][:10])
+        except ValueError:
+            task['repeatUntil'] = None
+    raw_days = task.get('customRepeatDays')
+    try:
+        task['customRepeatDays'] = json.loads(raw_days) if raw_days else []
+    except ValueError:
+        task['customRepeatDays'] = []
+    task['priority'] = Priority.parse(task.get('priority'), Priority.MEDIUM)
+    if task.get('repeatFrequency') not in REPEAT_FREQUENCIES:
+        task['repeatFrequency'] = 'none'
+    return Task.from_dict(task)
+
+
+def get_priority_value(priority: Any) -> int:
+    """Numerical value for sorting priorities (mirrors PRIORITY_ORDER_SQL); 0 if unknown."""
+    try:
+        return Priority(priority).rank
+    except ValueError:
+        return 0
+
+
+def sort_key(order: str, task: Task) -> tuple:
+    """Keyset sort key of a task in one of the ORDER_SQL orders."""
+    if order == 'deleted':
+        return (task['deletedAt'], task['id'])
+    if order == 'completed':
+        return (task.get('completedAt') or task['dueDate'], task['id'])  # as backfilled by create_tables
+    return (task['dueDate'], task['id'])
+
+
+def encode_cursor(key: tuple) -> str:
+    """Opaque URL-safe token for a sort key."""
+    raw = json.dumps([v.isoformat() if isinstance(v, _dt.datetime) else v for v in key])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, order: str) -> tuple:
+    """Inverse of encode_cursor for a key in `order`; raises ValueError for malformed tokens."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(raw, list) or len(raw) != ORDER_SQL[order][1].count('?'):
+            raise ValueError("wrong key size")
+        return tuple(_dt.datetime.fromisoformat(v) if isinstance(v, str) else v for v in raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+def _range_where(column: str, since: Optional[_dt.datetime], until: Optional[_dt.datetime]):
+    clauses, params = [], []
+    if since is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(since.isoformat())
+    if until is not None:
+        clauses.append(f"{column} < ?")
+        params.append(until.isoformat())
+    return clauses, params
+
+
+def _in_range(value: Optional[_dt.datetime], since: Optional[_dt.datetime],
+              until: Optional[_dt.datetime]) -> bool:
+    return value is not None and (since is None or value >= since) and (until is None or value < until)
+
+
+def _imported(task: Union[Task, Dict[str, Any]], id_map: Dict[Any, int]) -> Task:
+    """Copy of a task for add_tasks with originalTaskId remapped into the batch (or dropped)."""
+    task = task.copy() if isinstance(task, Task) else Task.from_dict(task)
+    if task.originalTaskId is not None:
+        task.originalTaskId = id_map.get(task.originalTaskId)
+    if task.createdAt is None:
+        task.createdAt = _dt.datetime.now()
+    return task
+
+
+class BaseTaskStore(abc.ABC):
+    """Calendar helpers shared by the store backends; subclasses implement tasks_between."""
+
+    @abc.abstractmethod
+    def tasks_between(self, start: _dt.datetime, end: _dt.datetime, sort: str = 'time') -> List[Task]:
+        """Active tasks due in [start, end), ordered by `sort`."""
+
+    def tasks_for_day(self, day: _dt.date, sort: str = 'time') -> List[Task]:
+        start, end = day_bounds(day)
+        return self.tasks_between(start, end, sort)
+
+    def tasks_for_month(self, year: int, month: int) -> List[Task]:
+        start, end = month_bounds(year, month)
+        return self.tasks_between(start, end)
+
+
+class TaskStore(BaseTaskStore):
+    """Query and mutation API over the tasks table.
+
+    Wraps a single connection; callers own the connection lifecycle.
+    Every mutation commits immediately, unless it runs inside transaction().
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._tx_depth = 0
+        self._fts: Optional[bool] = None
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator['TaskStore']:
+        """Groups mutations into one commit; an exception rolls all of them back. Nests."""
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._tx_depth == 1:
+                self.conn.rollback()
+            raise
+        else:
+            if self._tx_depth == 1:
+                self.conn.commit()
+        finally:
+            self._tx_depth -= 1
+
+    def _commit(self) -> None:
+        if not self._tx_depth:
+            self.conn.commit()
+
+    # --- Reads ---
+
+    def _select(self, where: str, params: tuple = (), order: str = "dueDate",
+                limit: Optional[int] = None) -> List[Task]:
+        sql = f"SELECT * FROM tasks WHERE {where} ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = tuple(params) + (limit,)
+        return [row_to_task(r) for r in self.conn.execute(sql, params)]
+
+    def _page(self, order: str, clauses: List[str], params: List[Any], after: Optional[tuple],
+              limit: Optional[int]) -> List[Task]:
+        """Rows matching all `clauses` in ORDER_SQL[order], strictly after the keyset `after`."""
+        order_sql, after_sql = ORDER_SQL[order]
+        if after is not None:
+            clauses = clauses + [after_sql]
+            params = params + [to_db_value(v) for v in after]
+        return self._select(" AND ".join(clauses), tuple(params), order_sql, limit)
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        row = self.conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row_to_task(row) if row else None
+
+    def get_tasks(self, task_ids: List[int]) -> List[Task]:
+        """Tasks by primary key, in the order of `task_ids` (missing ids are skipped)."""
+        if not task_ids:
+            return []
+        placeholders = ", ".join("?" for _ in task_ids)
+        rows = self.conn.execute(f"SELECT * FROM tasks WHERE id IN ({placeholders})", tuple(task_ids))
+        by_id = {r['id']: row_to_task(r) for r in rows}
+        return [by_id[i] for i in task_ids if i in by_id]
+
+    def tasks_between(self, start: _dt.datetime, end: _dt.datetime, sort: str = 'time') -> List[Task]:
+        """Active tasks with start <= dueDate < end (index range scan)."""
+        order = f"{PRIORITY_ORDER_SQL} DESC, dueDate" if sort == 'priority' else "dueDate"
+        return self._select(f"{ACTIVE_WHERE} AND dueDate >= ? AND dueDate < ?",
+                            (start.isoformat(), end.isoformat()), order)
+
+    def due_dates_between(self, start: _dt.datetime, end: _dt.datetime) -> List[_dt.datetime]:
+        """dueDates of active tasks in [start, end), ascending (answered from the index alone)."""
+        rows = self.conn.execute(f"SELECT dueDate FROM tasks WHERE {ACTIVE_WHERE} AND dueDate >= ? "
+                                 "AND dueDate < ? ORDER BY dueDate", (start.isoformat(), end.isoformat()))
+        return [due for due in (_parse_dt(r[0]) for r in rows) if due is not None]
+
+    def active_tasks(self) -> List[Task]:
+        return self._select(ACTIVE_WHERE)
+
+    def upcoming_tasks(self, start: Optional[_dt.datetime] = None, end: Optional[_dt.datetime] = None,
+                       after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Task]:
+        """Active tasks other than recurring series rows, by (dueDate, id)."""
+        clauses, params = _range_where("dueDate", start, end)
+        return self._page('due', [ACTIVE_WHERE, NOT_SERIES_WHERE] + clauses, params, after, limit)
+
+    def search_tasks(self, query: str, limit: Optional[int] = 10, match_all: bool = True,
+                     include_completed: bool = False) -> List[Task]:
+        """
+        Non-deleted (and, by default, not completed) tasks whose description has a word
+        starting with each query word ('take pills' finds 'Take morning pills'), best
+        match first. match_all=False accepts any of the words, ranked by relevance.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        if self._fts is None:
+            self._fts = has_fts(self.conn)
+        where = ACTIVE_WHERE if not include_completed else "deletedAt IS NULL"
+        if self._fts:
+            expression = (' AND ' if match_all else ' OR ').join(f'"{term}"*' for term in terms)
+            sql = (f"SELECT tasks.* FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid "
+                   f"WHERE tasks_fts MATCH ? AND {where} ORDER BY tasks_fts.rank, dueDate")
+            params: List[Any] = [expression]
+        else:
+            likes = ["description LIKE ?"] * len(terms)
+            score = ' + '.join(f"({like})" for like in likes)
+            sql = (f"SELECT * FROM tasks WHERE ({(' AND ' if match_all else ' OR ').join(likes)}) "
+                   f"AND {where} ORDER BY {score} DESC, dueDate")
+            params = [f"%{term}%" for term in terms] * 2
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [row_to_task(r) for r in self.conn.execute(sql, params)]
+
+    def series_between(self, start: _dt.datetime, end: _dt.datetime) -> List[Task]:
+        """Active recurring series that may have occurrences in [start, end)."""
+        return self._select(f"{SERIES_WHERE} AND {ACTIVE_WHERE} AND dueDate < ? "
+                            "AND (repeatUntil IS NULL OR repeatUntil >= ?)",
+                            (end.isoformat(), start.date().isoformat()))
+
+    def instances_between(self, series_ids: List[int], start: _dt.datetime,
+                          end: _dt.datetime) -> List[Task]:
+        """Materialized instances (any state) of the given series with occurrenceDate in [start, end)."""
+        if not series_ids:
+            return []
+        placeholders = ", ".join("?" for _ in series_ids)
+        return self._select(f"originalTaskId IN ({placeholders}) AND occurrenceDate >= ? AND occurrenceDate < ?",
+                            tuple(series_ids) + (start.isoformat(), end.isoformat()), "occurrenceDate")
+
+    def instance_for(self, series_id: int, occurrence: _dt.datetime) -> Optional[Task]:
+        row = self.conn.execute("SELECT * FROM tasks WHERE originalTaskId = ? AND occurrenceDate = ?",
+                                (series_id, occurrence.isoformat())).fetchone()
+        return row_to_task(row) if row else None
+
+    def due_tasks(self, now: _dt.datetime) -> List[Task]:
+        """Active tasks due at or before `now`, highest priority first."""
+        return self._select(f"{ACTIVE_WHERE} AND dueDate <= ?", (now.isoformat(),),
+                            f"{PRIORITY_ORDER_SQL} DESC, dueDate")
+
+    def snoozed_tasks(self, now: _dt.datetime) -> List[Task]:
+        return self._select(f"{ACTIVE_WHERE} AND snoozedUntil >= ?", (now.isoformat(),), "snoozedUntil")
+
+    def completed_tasks(self, since: Optional[_dt.datetime] = None, until: Optional[_dt.datetime] = None,
+                        after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Task]:
+        """Completed, not deleted tasks (completedAt in [since, until)), most recently completed first."""
+        clauses, params = _range_where("completedAt", since, until)
+        return self._page('completed', ["completed = 1 AND deletedAt IS NULL"] + clauses, params, after, limit)
+
+    def deleted_tasks(self, since: Optional[_dt.datetime] = None, until: Optional[_dt.datetime] = None,
+                      after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Task]:
+        """Soft-deleted tasks (deletedAt in [since, until)), most recently deleted first."""
+        clauses, params = _range_where("deletedAt", since, until)
+        return self._page('deleted', ["deletedAt IS NOT NULL"] + clauses, params, after, limit)
+
+    # --- Mutations ---
+
+    def add_task(self, task: Union[Task, Dict[str, Any]]) -> Task:
+        """Inserts a task (its id is ignored) and returns the stored Task."""
+        if not isinstance(task, Task):
+            task = Task.from_dict(task)
+        if task.createdAt is None:
+            task = task.copy()
+            task.createdAt = _dt.datetime.now()
+        fields = {k: to_db_value(v) for k, v in task.items() if k != 'id'}
+        columns = ", ".join(fields)
+        placeholders = ", ".join("?" for _ in fields)
+        cur = self.conn.execute(f"INSERT INTO tasks ({columns}) VALUES ({placeholders})", tuple(fields.values()))
+        self._commit()
+        return self.get_task(cur.lastrowid)
+
+    def add_tasks(self, tasks: Iterable[Task]) -> List[int]:
+        """
+        Inserts many tasks in one transaction (all or nothing) and returns their new ids.
+        Tasks are consumed lazily, so a streamed import never holds every row at once.
+        A task's id is taken as its source id: a later originalTaskId naming it is rewritten
+        to the new id, and links to ids outside the batch are dropped.
+        """
+        columns = [k for k in FIELD_NAMES if k != 'id']
+        sql = f"INSERT INTO tasks ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        id_map: Dict[Any, int] = {}
+        new_ids = []
+        with self.transaction():  # rolls back if the iterable or an insert raises
+            for task in tasks:
+                task = _imported(task, id_map)
+                cur = self.conn.execute(sql, tuple(to_db_value(getattr(task, k)) for k in columns))
+                if task.id is not None:
+                    id_map[task.id] = cur.lastrowid
+                new_ids.append(cur.lastrowid)
+        return new_ids
+
+    def iter_tasks(self, batch: int = 500) -> Iterator[Task]:
+        """Every task (any state) by id, fetched in keyset batches so memory stays flat."""
+        last_id = 0
+        while True:
+            rows = self.conn.execute("SELECT * FROM tasks WHERE id > ? ORDER BY id LIMIT ?",
+                                     (last_id, batch)).fetchall()
+            for row in rows:
+                yield row_to_task(row)
+            if len(rows) < batch:
+                return
+            last_id = rows[-1]['id']
+
+    def update_task(self, task_id: int, **fields: Any) -> bool:
+        """Updates the given columns of one task. Returns False if no row matched."""
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        params = tuple(to_db_value(v) for v in fields.values()) + (task_id,)
+        cur = self.conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", params)
+        self._commit()
+        return cur.rowcount > 0
+
+    def reschedule_many(self, moves: Iterable[Tuple[int, _dt.datetime]]) -> int:
+        """Sets dueDate for many (task_id, dueDate) pairs in one statement; returns rows changed."""
+        cur = self.conn.executemany("UPDATE tasks SET dueDate = ? WHERE id = ?",
+                                    [(due.isoformat(), task_id) for task_id, due in moves])
+        self._commit()
+        return cur.rowcount
+
+    def delete_all_completed(self, when: _dt.datetime) -> int:
+        cur = self.conn.execute("UPDATE tasks SET deletedAt = ? WHERE completed = 1 AND deletedAt IS NULL",
+                                (when.isoformat(),))
+        self._commit()
+        return cur.rowcount
+
+    def restore_all(self) -> int:
+        cur = self.conn.execute("UPDATE tasks SET deletedAt = NULL, completed = 0, completedAt = NULL "
+                                "WHERE deletedAt IS NOT NULL")
+        self._commit()
+        return cur.rowcount
+
+    def purge(self, task_id: int) -> bool:
+        """Permanently deletes a soft-deleted task."""
+        cur = self.conn.execute("DELETE FROM tasks WHERE id = ? AND deletedAt IS NOT NULL", (task_id,))
+        self._commit()
+        return cur.rowcount > 0
+
+    def purge_all(self) -> int:
+        cur = self.conn.execute("DELETE FROM tasks WHERE deletedAt IS NOT NULL")
+        self._commit()
+        return cur.rowcount
+
+
+class MemoryTaskStore(BaseTaskStore):
+    """Database-free store with the TaskStore API (volatile, for RAM-only setups and benchmarks).
+
+    Active tasks are kept in a DueDateIndex, so day/month/range/due lookups are
+    O(log N + k) and already time-ordered. Every mutation keeps the index in sync.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[int, Task] = {}
+        self._ids = itertools.count(1)
+        self._index = DueDateIndex()
+        self._lock = threading.RLock()
+        self._undo: Optional[Dict[int, Optional[Task]]] = None  # prior state per id, inside transaction()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator['MemoryTaskStore']:
+        """Holds the store lock and undoes every mutation if the block raises. Nests."""
+        with self._lock:
+            if self._undo is not None:
+                yield self
+                return
+            self._undo = {}
+            try:
+                yield self
+            except BaseException:
+                for task_id, before in self._undo.items():
+                    if before is None:
+                        self._tasks.pop(task_id, None)
+                        self._index.discard(task_id)
+                    else:
+                        self._tasks[task_id] = before
+                        self._reindex(before)
+                raise
+            finally:
+                self._undo = None
+
+    def _remember(self, task_id: int) -> None:
+        """Records a task's state before its first change in the current transaction."""
+        if self._undo is not None and task_id not in self._undo:
+            task = self._tasks.get(task_id)
+            self._undo[task_id] = task.copy() if task else None
+
+    @staticmethod
+    def _is_active(task: Task) -> bool:
+        return not task.get('completed') and not task.get('deletedAt') and task.get('dueDate') is not None
+
+    def _reindex(self, task: Task) -> None:
+        if self._is_active(task):
+            self._index.add(task['id'], task['dueDate'])
+        else:
+            self._index.discard(task['id'])
+
+    def _get_many(self, ids: List[int]) -> List[Task]:
+        return [self._tasks[i].copy() for i in ids]
+
+    # --- Reads ---
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            return task.copy() if task else None
+
+    def get_tasks(self, task_ids: List[int]) -> List[Task]:
+        with self._lock:
+            return self._get_many([i for i in task_ids if i in self._tasks])
+
+    def tasks_between(self, start: _dt.datetime, end: _dt.datetime, sort: str = 'time') -> List[Task]:
+        with self._lock:
+            result = self._get_many(self._index.between(start, end))
+        if sort == 'priority':
+            # Stable sort keeps time order within each priority
+            result.sort(key=lambda t: -get_priority_value(t.get('priority')))
+        return result
+
+    def due_dates_between(self, start: _dt.datetime, end: _dt.datetime) -> List[_dt.datetime]:
+        with self._lock:
+            return [self._index.due_of(i) for i in self._index.between(start, end)]
+
+    def active_tasks(self) -> List[Task]:
+        with self._lock:
+            return self._get_many(self._index.all())
+
+    def search_tasks(self, query: str, limit: Optional[int] = 10, match_all: bool = True,
+                     include_completed: bool = False) -> List[Task]:
+        """Same matching as TaskStore.search_tasks, ranked by words matched, then dueDate."""
+        terms = search_terms(query)
+        scored = []
+        with self._lock:
+            for task in self._tasks.values():
+                if task.get('deletedAt') or (task.get('completed') and not include_completed):
+                    continue
+                words = re.findall(r'\w+', task['description'].lower())
+                hits = sum(any(w.startswith(term) for w in words) for term in terms)
+                if hits and (hits == len(terms) or not match_all):
+                    scored.append((-hits, task['dueDate'] or _dt.datetime.max, task['id']))
+            scored.sort()
+            return self._get_many([task_id for _, _, task_id in scored[:limit]])
+
+    @staticmethod
+    def _paged(tasks: List[Task], order: str, after: Optional[tuple],
+               limit: Optional[int]) -> List[Task]:
+        keyed = sorted(((sort_key(order, t), t) for t in tasks), key=lambda kt: kt[0],
+                       reverse=(order in DESCENDING_ORDERS))
+        if after is not None:
+            if order in DESCENDING_ORDERS:
+                keyed = [kt for kt in keyed if kt[0] < after]
+            else:
+                keyed = [kt for kt in keyed if kt[0] > after]
+        return [t for _, t in keyed[:limit]]
+
+    def upcoming_tasks(self, start: Optional[_dt.datetime] = None, end: Optional[_dt.datetime] = None,
+                       after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Task]:
+        lo = start if start is not None else _dt.datetime.min
+        hi = end if end is not None else _dt.datetime.max
+        if after is not None:
+            lo = max(lo, after[0])  # range scan starts at the cursor's dueDate
+        result = []
+        with self._lock:
+            for task_id in self._index.between(lo, hi):
+                task = self._tasks[task_id]
+                if task.get('repeatFrequency') not in (None, 'none') and not task.get('isRecurringInstance'):
+                    continue  # series rows are expanded by the caller
+                if after is not None and (task['dueDate'], task_id) <= after:
+                    continue
+                result.append(task.copy())
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def series_between(self, start: _dt.datetime, end: _dt.datetime) -> List[Task]:
+        with self._lock:
+            result = [t.copy() for t in self._tasks.values()
+                      if t.get('repeatFrequency', 'none') != 'none' and not t.get('isRecurringInstance')
+                      and self._is_active(t) and t['dueDate'] < end
+                      and (not t.get('repeatUntil') or t['repeatUntil'] >= start.date())]
+        result.sort(key=lambda t: t['dueDate'])
+        return result
+
+    def instances_between(self, series_ids: List[int], start: _dt.datetime,
+                          end: _dt.datetime) -> List[Task]:
+        wanted = set(series_ids)
+        with self._lock:
+            result = [t.copy() for t in self._tasks.values()
+                      if t.get('originalTaskId') in wanted and t.get('occurrenceDate')
+                      and start <= t['occurrenceDate'] < end]
+        result.sort(key=lambda t: t['occurrenceDate'])
+        return result
+
+    def instance_for(self, series_id: int, occurrence: _dt.datetime) -> Optional[Task]:
+        with self._lock:
+            for t in self._tasks.values():
+                if t.get('originalTaskId') == series_id and t.get('occurrenceDate') == occurrence:
+                    return t.copy()
+        return None
+
+    def due_tasks(self, now: _dt.datetime) -> List[Task]:
+        with self._lock:
+            result = self._get_many(self._index.up_to(now))
+        result.sort(key=lambda t: -get_priority_value(t.get('priority')))
+        return result
+
+    def snoozed_tasks(self, now: _dt.datetime) -> List[Task]:
+        with self._lock:
+            result = [t for t in self._get_many(self._index.all())
+                      if t.get('snoozedUntil') and t['snoozedUntil'] >= now]
+        result.sort(key=lambda t: t['snoozedUntil'])
+        return result
+
+    def completed_tasks(self, since: Optional[_dt.datetime] = None, until: Optional[_dt.datetime] = None,
+                        after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Task]:
+        with self._lock:
+            result = [t.copy() for t in self._tasks.values() if t.get('completed') and not t.get('deletedAt')
+                      and (since is None and until is None or _in_range(t.get('completedAt'), since, until))]
+        return self._paged(result, 'completed', after, limit)
+
+    def deleted_tasks(self, since: Optional[_dt.datetime] = None, until: Optional[_dt.datetime] = None,
+                      after: Optional[tuple] = None, limit: Optional[int] = None) -> List[Task]:
+        with self._lock:
+            result = [t.copy() for t in self._tasks.values() if t.get('deletedAt')
+                      and _in_range(t['deletedAt'], since, until)]
+        return self._paged(result, 'deleted', after, limit)
+
+    # --- Mutations ---
+
+    def add_task(self, task: Union[Task, Dict[str, Any]]) -> Task:
+        stored = task.copy() if isinstance(task, Task) else Task.from_dict(task)
+        if stored.createdAt is None:
+            stored.createdAt = _dt.datetime.now()
+        with self._lock:
+            stored.id = next(self._ids)
+            self._remember(stored.id)
+            self._tasks[stored.id] = stored
+            self._reindex(stored)
+        return stored.copy()
+
+    def add_tasks(self, tasks: Iterable[Task]) -> List[int]:
+        """All-or-nothing like TaskStore.add_tasks: nothing is stored if the iterable raises."""
+        id_map: Dict[Any, int] = {}
+        staged = []
+        for task in tasks:
+            task = _imported(task, id_map)
+            source_id, task.id = task.id, next(self._ids)
+            if source_id is not None:
+                id_map[source_id] = task.id
+            staged.append(task)
+        with self._lock:
+            for task in staged:
+                self._remember(task.id)
+                self._tasks[task.id] = task
+                self._reindex(task)
+        return [task.id for task in staged]
+
+    def iter_tasks(self, batch: int = 500) -> Iterator[Task]:
+        with self._lock:
+            ids = sorted(self._tasks)
+        for start in range(0, len(ids), batch):
+            yield from self.get_tasks(ids[start:start + batch])
+
+    def update_task(self, task_id: int, **fields: Any) -> bool:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            self._remember(task_id)
+            task.update(fields)
+            self._reindex(task)
+            return True
+
+    def reschedule_many(self, moves: Iterable[Tuple[int, _dt.datetime]]) -> int:
+        with self._lock:
+            return sum(self.update_task(task_id, dueDate=due) for task_id, due in moves)
+
+    def delete_all_completed(self, when: _dt.datetime) -> int:
+        with self._lock:
+            ids = [i for i, t in self._tasks.items() if t.get('completed') and not t.get('deletedAt')]
+            for task_id in ids:
+                self.update_task(task_id, deletedAt=when)
+            return len(ids)
+
+    def restore_all(self) -> int:
+        with self._lock:
+            ids = [i for i, t in self._tasks.items() if t.get('deletedAt')]
+            for task_id in ids:
+                self.update_task(task_id, deletedAt=None, completed=False, completedAt=None)
+            return len(ids)
+
+    def purge(self, task_id: int) -> bool:
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if not task or not task.get('deletedAt'):
+                return False
+            self._remember(task_id)
+            del self._tasks[task_id]
+            self._index.discard(task_id)
+            return True
+
+    def purge_all(self) -> int:
+        with self._lock:
+            ids = [i for i, t in self._tasks.items() if t.get('deletedAt')]
+            for task_id in ids:
+                self.purge(task_id)
+            return len(ids)
+
+
+__all__ = [
+    'connect', 'create_tables', 'has_fts', 'search_terms', 'row_to_task', 'get_priority_value',
+    'sort_key', 'encode_cursor', 'decode_cursor', 'TaskStore', 'MemoryTaskStore'
+]
@@ -0,0 +1,81 @@
+import datetime
+import pytest
+from ai_assistant import IntentClassifier, interpret_messages
+
+def _interpret(text):
+    return interpret_messages([{'role': 'user', 'content': text}])
+
+@pytest.mark.parametrize('text, intent', [
+    ('Add buy milk tomorrow', 'ADD_TASK'),
+    ('remind me to call mom', 'ADD_TASK'),
+    ('reschedule dentist to friday', 'ADD_TASK'),  # 'schedule' is an ADD keyword and wins, as before
+    ('complete pay rent', 'COMPLETE_TASK'),
+    ("what's due today?", 'LIST_TASKS'),
+    ('snooze pills by 10m', 'SNOOZE_TASK'),
+    ('move gym to tomorrow', 'RESCHEDULE_TASK'),
+    ('remove groceries', 'RESCHEDULE_TASK'),  # substring 'move' outranks 'remove', as before
+    ('delete groceries', 'DELETE_TASK'),
+    ('Free up my afternoon and show tasks', 'FREE_UP'),
+    ('thanks!', 'UNKNOWN'),
+])
+def test_intents_follow_keyword_precedence(text, intent):
+    assert _interpret(text)['intent'] == intent
+
+def test_entities_come_from_the_same_scan():
+    result = _interpret('snooze the weekly report by 2h')
+    assert result['entities'] == {'description': 'the weekly report', 'duration': '2h'}
+    result = _interpret('Add Water plants day after tomorrow low priority')
+    assert result['entities']['description'] == 'Water plants day after tomorrow low priority'
+    assert result['entities']['priority'] == 'priority-low'
+    # 'tomorrow' is checked before 'day after tomorrow', as in DATE_KEYWORDS
+    tomorrow = datetime.datetime.utcnow().date() + datetime.timedelta(days=1)
+    assert result['entities']['dueDate'].date() == tomorrow
+    assert _interpret('mark done with taxes')['entities'] == {'description': 'taxes'}
+    result = _interpret('move standup to 3pm friday')
+    assert result['entities']['description'] == 'standup' and result['entities']['newDate'].hour == 15
+
+def test_classifier_reports_spans():
+    lower = 'please remove old files tomorrow'
+    match = IntentClassifier().classify(lower)
+    assert match.intent == 'RESCHEDULE_TASK' and lower[slice(*match.spans['keyword'])] == 'move'
+    assert match.dates == [('tomorrow', 24, 32)]
+    assert IntentClassifier().classify('nothing here').spans == {}
+
+def test_apply_actions_finds_tasks_by_words(tmp_path):
+    import task_store
+    from ai_assistant import apply_actions
+    conn = task_store.connect(str(tmp_path / "assist.db"))
+    task_store.create_tables(conn)
+    store = task_store.TaskStore(conn)
+    for desc in ('Take morning pills', 'Buy pills', 'Call mom'):
+        store.add_task({'description': desc, 'dueDate': datetime.datetime(2099, 3, 4, 8, 0)})
+    outcome = apply_actions(_interpret('complete take pills'), conn)
+    assert outcome['message'] == "Completed 1 task(s) matching 'take pills'."
+    assert [t['description'] for t in store.completed_tasks()] == ['Take morning pills']
+    # Destructive intents need every word; a shared word alone touches nothing
+    assert apply_actions(_interpret('delete buy bread tickets'), conn)['message'] == 'Deleted 0 task(s).'
+    assert apply_actions(_interpret('complete call dad'), conn)['message'] == "Completed 0 task(s) matching 'call dad'."
+    assert store.get_task(2)['deletedAt'] is None and not store.get_task(3)['completed']
+    # Snooze falls back to the best partial match
+    assert apply_actions(_interpret('snooze mom phone call by 1h'), conn)['refresh']
+    assert store.get_task(3)['dueDate'] == datetime.datetime(2099, 3, 4, 9, 0)
+    assert apply_actions(_interpret('delete laundry'), conn)['message'] == 'Deleted 0 task(s).'
+    conn.close()
+
+def test_free_up_targets_a_period_and_moves_in_one_batch(tmp_path):
+    import task_store
+    from ai_assistant import apply_actions
+    result = _interpret('free up my afternoon tomorrow')
+    assert result['entities']['period'] == 'afternoon'
+    day = result['entities']['targetDate'].date()
+    conn = task_store.connect(str(tmp_path / "free.db"))
+    task_store.create_tables(conn)
+    store = task_store.TaskStore(conn)
+    at = lambda offset, hour: datetime.datetime.combine(day + datetime.timedelta(days=offset), datetime.time(hour))
+    store.add_task({'description': 'Nap', 'dueDate': at(0, 14), 'priority': 'priority-low'})
+    store.add_task({'description': 'Breakfast', 'dueDate': at(0, 8), 'priority': 'priority-low'})
+    store.add_task({'description': 'Bridge club', 'dueDate': at(1, 14)})
+    outcome = apply_actions(result, conn)
+    assert outcome['message'] == f"Freed time by moving 1 task(s): 'Nap' to {at(1, 14):%Y-%m-%d} 14:30"
+    assert store.get_task(2)['dueDate'] == at(0, 8)
+    conn.close()
@@ -1,8 +1,9 @@
+import datetime
 import json
 import os
 import tempfile
 import pytest
-from app import app, create_db_tables, get_db
+from app import app, create_db_tables, get_db, due_notifier
 
 @pytest.fixture
 def client(tmp_path, monkeypatch):
@@ -53,3 +54,204 @@ def test_ai_add_task(client):
     db = get_db(); cur = db.cursor()
     cur.execute("SELECT COUNT(*) as c FROM tasks")
     assert cur.fetchone()['c'] > 0
+
+def test_task_lifecycle_persists_in_db(client):
+    resp = client.post('/api/tasks', json={'description': 'Take pills', 'dueDate': '03/04/2099',
+                                           'dueTime': '9:00 AM', 'priority': 'priority-high'})
+    assert resp.status_code == 201
+    task_id = resp.get_json()['id']
+    day = client.get('/api/tasks?date=2099-03-04').get_json()
+    assert [t['id'] for t in day] == [task_id]
+    assert client.post(f'/api/tasks/{task_id}/complete').status_code == 200
+    assert [t['id'] for t in client.get('/api/completed_tasks').get_json()] == [task_id]
+    assert client.delete(f'/api/tasks/{task_id}').status_code == 200
+    assert [t['id'] for t in client.get('/api/deleted_tasks').get_json()] == [task_id]
+    assert client.post(f'/api/deleted_tasks/{task_id}/restore').status_code == 200
+    # Row survives outside the request (i.e. a server restart)
+    cur = get_db().execute("SELECT completed, deletedAt FROM tasks WHERE id = ?", (task_id,))
+    row = cur.fetchone()
+    assert row['completed'] == 0 and row['deletedAt'] is None
+
+def test_memory_backend_routes(client, monkeypatch):
+    monkeypatch.setattr('app.STORAGE_BACKEND', 'memory')
+    monkeypatch.setattr('app._memory_store', None)
+    for time in ('6:00 PM', '8:00 AM'):
+        client.post('/api/tasks', json={'description': f'at {time}', 'dueDate': '03/04/2099', 'dueTime': time})
+    day = client.get('/api/tasks?date=2099-03-04').get_json()
+    assert [t['description'] for t in day] == ['at 8:00 AM', 'at 6:00 PM']
+    client.post(f"/api/tasks/{day[0]['id']}/complete")
+    month = client.get('/api/tasks/month?year=2099&month=3').get_json()
+    assert [t['description'] for t in month] == ['at 6:00 PM']
+
+def test_due_tasks_uses_scheduler_and_reports_next_due(client):
+    past = datetime.datetime.now() - datetime.timedelta(hours=1)
+    for desc in ('overdue', 'later'):
+        resp = client.post('/api/tasks', json={'description': desc, 'dueDate': past.strftime('%m/%d/%Y'),
+                                               'dueTime': past.strftime('%H:%M')})
+        task_id = resp.get_json()['id']
+    client.post(f'/api/tasks/{task_id}/snooze', json={'duration': '1h'})
+    resp = client.get('/api/due_tasks')
+    assert [t['description'] for t in resp.get_json()] == ['overdue']
+    assert 'X-Next-Due-At' in resp.headers
+    nxt = client.get('/api/due_tasks/next').get_json()
+    assert 3500 < nxt['secondsUntilDue'] <= 3600
+
+def test_events_stream_pushes_task_changes(client):
+    resp = client.get('/api/events', buffered=False)
+    assert resp.mimetype == 'text/event-stream'
+    chunks = iter(resp.response)
+    assert next(chunks).startswith(b'retry:')
+    client.post('/api/tasks', json={'description': 'Call GP', 'dueDate': '03/04/2099', 'dueTime': '9:00 AM'})
+    message = next(chunks).decode()
+    assert 'event: task.added' in message and 'Call GP' in message
+    resp.close()
+    due_notifier.stop()
+
+def test_recurring_series_expands_and_completes_per_occurrence(client):
+    resp = client.post('/api/tasks', json={'description': 'Pills', 'dueDate': '03/03/2099', 'dueTime': '9:00 AM',
+                                           'repeatFrequency': 'daily'})
+    series_id = resp.get_json()['id']
+    month = client.get('/api/tasks/month?year=2099&month=3').get_json()
+    assert len(month) == 29
+    assert all(t['originalTaskId'] == series_id for t in month)
+    resp = client.post(f'/api/tasks/{series_id}/complete?occurrence=2099-03-04T09:00:00')
+    assert resp.status_code == 200 and resp.get_json()['occurrenceDate'] == '2099-03-04T09:00:00'
+    day = client.get('/api/tasks?date=2099-03-04').get_json()
+    assert day == []
+    assert len(client.get('/api/tasks?date=2099-03-05').get_json()) == 1
+    assert len(client.get('/api/completed_tasks').get_json()) == 1
+    # ?series=true on an occurrence ends the whole series
+    instance_id = resp.get_json()['id']
+    client.post(f'/api/tasks/{instance_id}/complete?series=true')
+    assert client.get('/api/tasks/month?year=2099&month=3').get_json() == []
+
+def test_list_endpoints_page_with_cursor_and_filter(client, monkeypatch):
+    monkeypatch.setattr('app.DEFAULT_PAGE_SIZE', 2)
+    ids = []
+    for day in range(1, 6):
+        resp = client.post('/api/tasks', json={'description': f'day {day}', 'dueDate': f'03/0{day}/2099',
+                                               'dueTime': '9:00 AM'})
+        ids.append(resp.get_json()['id'])
+    first = client.get('/api/tasks/all?limit=2')
+    assert [t['id'] for t in first.get_json()] == ids[:2]
+    second = client.get(f"/api/tasks/all?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert [t['id'] for t in second.get_json()] == ids[2:4]
+    ranged = client.get('/api/tasks/all?startDate=2099-03-02&endDate=2099-03-03').get_json()
+    assert [t['description'] for t in ranged] == ['day 2', 'day 3']
+    unpaged = client.get('/api/tasks/all')  # no limit or cursor: the whole list, as before paging
+    assert len(unpaged.get_json()) == 5 and 'X-Next-Cursor' not in unpaged.headers
+    assert len(client.get(f"/api/tasks/all?cursor={first.headers['X-Next-Cursor']}").get_json()) == 2
+    for task_id in ids:
+        client.post(f'/api/tasks/{task_id}/complete')
+    # Most recently completed first
+    assert [t['id'] for t in client.get('/api/completed_tasks?filter=last7').get_json()] == ids[::-1]
+    assert client.get('/api/completed_tasks?filter=last7&endDate=2000-01-01').get_json() == []
+    assert client.get('/api/completed_tasks?cursor=bogus').status_code == 400
+    assert client.get('/api/deleted_tasks?limit=0').status_code == 400
+
+def test_list_endpoints_answer_if_none_match_with_304(client):
+    client.post('/api/tasks', json={'description': 'Walk', 'dueDate': '03/04/2099', 'dueTime': '9:00 AM'})
+    first = client.get('/api/tasks?date=2099-03-04')
+    etag = first.headers['ETag']
+    again = client.get('/api/tasks?date=2099-03-04', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    # Another URL is another resource
+    assert client.get('/api/tasks?date=2099-03-05', headers={'If-None-Match': etag}).status_code == 200
+    client.post(f"/api/tasks/{first.get_json()[0]['id']}/complete")
+    changed = client.get('/api/tasks?date=2099-03-04', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.get_json() == []
+    deleted = client.get('/api/deleted_tasks')
+    assert client.get('/api/deleted_tasks', headers={'If-None-Match': deleted.headers['ETag']}).status_code == 304
+
+def test_bulk_import_and_streaming_export_round_trip(client):
+    rows = [
+        {'description': 'Breakfast', 'dueDate': '03/04/2099', 'dueTime': '8:00 AM'},
+        {'description': '', 'dueDate': '03/04/2099', 'dueTime': '9:00 AM'},
+        {'id': 5, 'description': 'Pills', 'dueDate': '2099-03-04T09:00:00', 'repeatFrequency': 'daily'},
+        {'id': 6, 'description': 'Pills', 'dueDate': '2099-03-05T09:00:00', 'isRecurringInstance': True,
+         'originalTaskId': 5, 'occurrenceDate': '2099-03-05T09:00:00', 'completed': True},
+    ]
+    body = '\n'.join(json.dumps(r) for r in rows) + '\nnot json\n'
+    resp = client.post('/api/tasks/bulk', data=body, content_type='application/x-ndjson')
+    assert resp.status_code == 201
+    result = resp.get_json()
+    assert result['inserted'] == 3 and [e['line'] for e in result['errors']] == [2, 5]
+    export = client.get('/api/tasks/export')
+    assert export.mimetype == 'application/x-ndjson'
+    exported = [json.loads(line) for line in export.data.splitlines()]
+    assert [t['id'] for t in exported] == result['ids']
+    assert exported[2]['originalTaskId'] == result['ids'][1]
+    # The completed occurrence is not expanded again
+    assert [t['description'] for t in client.get('/api/tasks?date=2099-03-05').get_json()] == []
+    strict = client.post('/api/tasks/bulk?strict=true', json=[rows[0], rows[1]])
+    assert strict.status_code == 400 and strict.get_json()['inserted'] == 0
+    assert len(client.get('/api/tasks/export').data.splitlines()) == 3
+
+def test_batch_applies_all_operations_or_none(client):
+    ids = [client.post('/api/tasks', json={'description': f'task {i}', 'dueDate': '03/04/2099',
+                                           'dueTime': f'{8 + i}:00 AM'}).get_json()['id'] for i in range(3)]
+    resp = client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'complete', 'id': ids[0]},
+        {'op': 'snooze', 'id': ids[1], 'duration': '1h'},
+        {'op': 'delete', 'id': 9999},
+    ]})
+    assert resp.status_code == 409
+    results = resp.get_json()['results']
+    assert [r['ok'] for r in results] == [True, True, False] and results[2]['status'] == 404
+    assert len(client.get('/api/tasks?date=2099-03-04').get_json()) == 3 # nothing applied
+    resp = client.post('/api/tasks/batch', json=[{'op': 'complete', 'id': ids[0]}, {'op': 'delete', 'id': ids[1]},
+                                                 {'op': 'restore', 'id': ids[1]}])
+    assert resp.status_code == 200 and resp.get_json()['applied']
+    assert [t['id'] for t in client.get('/api/tasks?date=2099-03-04').get_json()] == ids[1:]
+    assert client.post('/api/tasks/batch', json=[{'op': 'explode', 'id': ids[2]}]).status_code == 409
+
+def test_parse_datetime_uses_date_format_setting(client):
+    resp = client.post('/api/parse-datetime', json={'text': '03/04/2099 5:30 pm'})
+    assert resp.status_code == 200 and resp.get_json()['iso'] == '2099-04-03T17:30:00'
+    resp = client.post('/api/parse-datetime', json={'text': '03/04/2099 5:30 pm', 'dateFormat': 'MMDDYYYY'})
+    assert resp.get_json()['iso'] == '2099-03-04T17:30:00' and resp.get_json()['time_str_12'] == '5:30 PM'
+    assert client.post('/api/parse-datetime', json={'text': 'whenever'}).status_code == 400
+    # Task payloads carry the same setting
+    resp = client.post('/api/tasks', json={'description': 'dmy', 'dueDate': '03/04/2099', 'dueTime': '09:00',
+                                           'dateFormat': 'DDMMYYYY'})
+    assert resp.get_json()['dueDate'] == '2099-04-03T09:00:00'
+
+def test_ai_session_sends_only_new_turns(client):
+    resp = client.post('/api/ai/assist', json={'message': 'Add take morning pills'})
+    assert resp.status_code == 200
+    session_id = resp.get_json()['sessionId']
+    resp = client.post('/api/ai/assist', json={'sessionId': session_id, 'message': 'complete it'})
+    data = resp.get_json()
+    assert data['sessionId'] == session_id and data['intent'] == 'COMPLETE_TASK'
+    assert data['message'] == "Completed 1 task(s) matching 'take morning pills'."
+    assert client.post('/api/ai/assist', json={'message': '  '}).status_code == 400
+    assert client.delete(f'/api/ai/sessions/{session_id}').status_code == 200
+    # An ended (or expired) session id starts a new session
+    resp = client.post('/api/ai/assist', json={'sessionId': session_id, 'message': 'complete it'})
+    assert resp.get_json()['sessionId'] != session_id
+
+def test_receive_ble_data_reassembles_frames_into_tasks(client):
+    from ble_ingest import encode_frame
+    import time
+    pressed = time.time()
+    audio = b"add water the plants tomorrow at 9am"
+    chunks = [audio[i:i + 8] for i in range(0, len(audio), 8)]
+    frames = [encode_frame('A1', 1, seq, chunk, final=seq == len(chunks) - 1, pressed_at=pressed)
+              for seq, chunk in enumerate(chunks)]
+    frames.append(encode_frame('B2', 1, 0, b"add call mom", kind='command', final=True))
+    # The first request leaves a gap; the second fills it and completes the stream
+    first = client.post('/api/receive_ble_data', data=b''.join(frames[2:]),
+                        content_type='application/x-ndjson').get_json()
+    assert first['accepted'] == len(frames) - 2 and [r['transcript'] for r in first['results']] == ['add call mom']
+    resp = client.post('/api/receive_ble_data', data=b''.join(frames[:2]) + b'{"device": "A1"}\n',
+                       content_type='application/x-ndjson')
+    data = resp.get_json()
+    assert resp.status_code == 200 and data['accepted'] == 2 and data['errorCount'] == 1
+    (result,) = data['results']
+    assert result['device'] == 'A1' and result['transcript'] == audio.decode() and result['intent'] == 'ADD_TASK'
+    assert 0 <= result['latency']['total_ms'] < 10000
+    cur = get_db().execute("SELECT description FROM tasks ORDER BY id")
+    assert [row['description'] for row in cur.fetchall()][-2:] == ['call mom', 'water the plants tomorrow at 9am']
+    stats = client.get('/api/receive_ble_data').get_json()
+    assert stats['engine'] == 'stub' and stats['devices']['A1']['utterances'] == 1
+    assert stats['latency']['count'] >= 2
@@ -0,0 +1,79 @@
+import asyncio
+import random
+from ble_gateway import Backoff, BleGateway, FakeBleBackend, FakeWearable
+
+def _gateway(backend, received, **options):
+    options = dict(dict(scan_interval=0.01, backoff_base=0.01, backoff_max=0.04, connect_timeout=1), **options)
+    return BleGateway(lambda device, data: received.append((device.name, bytes(data))), backend=backend, **options)
+
+async def _run_for(gateway, seconds):
+    runner = asyncio.ensure_future(gateway.run())
+    await asyncio.sleep(seconds)
+    gateway.stop()
+    await runner
+
+def test_backoff_grows_with_jitter_and_resets():
+    backoff = Backoff(base=1, maximum=8, rng=random.Random(1))
+    delays = [backoff.next() for _ in range(6)]
+    for delay, ceiling in zip(delays, [1, 2, 4, 8, 8, 8]):
+        assert ceiling / 2 <= delay <= ceiling
+    backoff.reset()
+    assert backoff.next() <= 1
+
+def test_concurrent_devices_reconnect_after_drops():
+    backend = FakeBleBackend([
+        FakeWearable("TaskWearable-1", "A1", interval=0.005, drop_after=5),
+        FakeWearable("TaskWearable-2", "A2", interval=0.01),
+        FakeWearable("Headphones", "B1", interval=0.005),
+    ])
+    received = []
+    gateway = _gateway(backend, received)
+    asyncio.run(_run_for(gateway, 0.4))
+    assert set(gateway.devices) == {"A1", "A2"}  # name filter
+    names = {name for name, _ in received}
+    assert names == {"TaskWearable-1", "TaskWearable-2"}
+    dropping, steady = gateway.stats()["A1"], gateway.stats()["A2"]
+    assert dropping['disconnects'] >= 2 and dropping['connects'] - dropping['disconnects'] in (0, 1)
+    assert steady['connects'] == 1 and steady['disconnects'] == 0
+    assert steady['notifications'] == sum(1 for name, _ in received if name == "TaskWearable-2")
+    assert steady['bytes'] == sum(len(data) for name, data in received if name == "TaskWearable-2")
+    assert steady['notifications_per_second'] > 20 and not steady['connected']
+    assert 0 < steady['max_gap'] < 0.2 and steady['mean_handler_latency'] < 0.01
+
+def test_failing_devices_back_off_and_are_released_to_the_scanner():
+    flaky = FakeWearable("TaskWearable", "A1", interval=0.005, fail_connects=4)
+    backend = FakeBleBackend([flaky])
+    received = []
+    gateway = _gateway(backend, received, max_failures=3)
+    asyncio.run(_run_for(gateway, 0.5))
+    stats = gateway.stats()["A1"]
+    # Three failures release the device; the next scan supervises it again and it connects
+    assert stats['failed_connects'] == 4 and stats['connects'] == 1 and received
+    assert flaky.connect_attempts == 5
+
+def test_max_devices_limits_connections():
+    backend = FakeBleBackend([FakeWearable(f"TaskWearable-{i}", f"A{i}", interval=0.01) for i in range(4)])
+    gateway = _gateway(backend, [], max_devices=2)
+    asyncio.run(_run_for(gateway, 0.1))
+    assert len(gateway.devices) == 2
+
+def test_async_handlers_are_kept_logged_and_drained(caplog):
+    backend = FakeBleBackend([FakeWearable("TaskWearable-1", "A1", interval=0.01)])
+    calls, finished, cancelled = [], [], []
+
+    async def on_data(device, data):
+        count = len(calls)
+        calls.append(count)
+        if count == 0:
+            raise ValueError("bad frame")
+        try:
+            await asyncio.sleep(10 if count == 1 else 0.02)
+            finished.append(bytes(data))
+        except asyncio.CancelledError:
+            cancelled.append(bytes(data))
+            raise
+    gateway = BleGateway(on_data, backend=backend, scan_interval=0.01, connect_timeout=1, drain_timeout=0.2)
+    with caplog.at_level('ERROR', logger='ble_gateway'):
+        asyncio.run(_run_for(gateway, 0.1))
+    assert any('bad frame' in (r.exc_text or '') for r in caplog.records)
+    assert len(cancelled) == 1 and finished and not gateway._handler_tasks
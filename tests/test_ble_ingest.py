@@ -0,0 +1,111 @@
+import json
+import threading
+import pytest
+from ble_ingest import Frame, FrameError, IngestPipeline, SpeechEngine, SpeechStream, StubSpeechEngine, \
+    encode_frame, get_speech_engine
+
+def _frame(device, stream, seq, data, final=False, kind='audio', pressed_at=None):
+    return Frame.from_json(json.loads(encode_frame(device, stream, seq, data, kind, final, pressed_at)))
+
+class RecordingEngine(SpeechEngine):
+    """Stub engine that records every chunk it is fed."""
+    name = 'recording'
+
+    def __init__(self):
+        self.fed = []
+
+    def open_stream(self, sample_rate=16000):
+        engine, inner = self, StubSpeechEngine().open_stream()
+
+        class Stream(SpeechStream):
+            def feed(self, chunk):
+                engine.fed.append(chunk)
+                inner.feed(chunk)
+
+            def finish(self):
+                return inner.finish()
+        return Stream()
+
+def test_engines_and_streams_must_implement_the_interface():
+    class NoStreams(SpeechEngine):
+        name = 'none'
+
+    class NoFinish(SpeechStream):
+        def feed(self, chunk):
+            pass
+    for incomplete in (NoStreams, NoFinish):
+        with pytest.raises(TypeError):
+            incomplete()
+
+def test_frame_validation():
+    assert _frame('A1', 0, 3, b'\x00\x01', pressed_at=5).data == b'\x00\x01'
+    for bad in ({'stream': 0, 'seq': 0}, {'device': 'A', 'stream': -1, 'seq': 0},
+                {'device': 'A', 'stream': 0, 'seq': 0, 'kind': 'video'},
+                {'device': 'A', 'stream': 0, 'seq': 0, 'data': 'not base64!'}, []):
+        with pytest.raises(FrameError):
+            Frame.from_json(bad)
+
+def test_out_of_order_frames_are_fed_in_order_without_holding_the_stream():
+    engine = RecordingEngine()
+    pipeline = IngestPipeline(engine, workers=1)
+    assert pipeline.add(_frame('A1', 7, 1, b'world ')) is None
+    assert pipeline.add(_frame('A1', 7, 0, b'hello ')) is None
+    assert pipeline.add(_frame('A1', 7, 0, b'hello ')) is None  # duplicate
+    future = pipeline.add(_frame('A1', 7, 2, b'again', final=True, pressed_at=1.0))
+    utterance = future.result(timeout=2)
+    assert utterance.transcript == 'hello world again' and utterance.frames == 3 and utterance.pressed_at == 1.0
+    assert engine.fed == [b'hello ', b'world ', b'again']
+    assert pipeline.stats()['frames_duplicate'] == 1 and pipeline.stats()['open_streams'] == 0
+    pipeline.shutdown()
+
+def test_many_devices_concurrently():
+    pipeline = IngestPipeline(StubSpeechEngine(delay=0.01), workers=2)
+    futures = []
+    lock = threading.Lock()
+
+    def wearable(n):
+        for stream in range(3):
+            words = [f"dev{n}", f"note{stream}", "end"]
+            for seq in reversed(range(len(words))):
+                future = pipeline.add(_frame(f"D{n}", stream, seq, words[seq].encode() + b' ',
+                                             final=seq == len(words) - 1))
+                if future:
+                    with lock:
+                        futures.append(future)
+
+    threads = [threading.Thread(target=wearable, args=(n,)) for n in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    transcripts = sorted(f.result(timeout=5).transcript for f in futures)
+    assert len(transcripts) == 18 and 'dev3 note2 end' in transcripts
+    stats = pipeline.stats()
+    assert stats['utterances'] == 18 and stats['devices']['D0']['frames'] == 9
+    pipeline.shutdown()
+
+def test_limits_and_expiry():
+    now = [0.0]
+    pipeline = IngestPipeline(StubSpeechEngine(), max_open_streams=1, max_stream_bytes=10,
+                              stream_timeout=5, clock=lambda: now[0])
+    pipeline.add(_frame('A1', 0, 0, b'12345'))
+    with pytest.raises(FrameError):
+        pipeline.add(_frame('B1', 0, 0, b'x'))  # too many open streams
+    with pytest.raises(FrameError):
+        pipeline.add(_frame('A1', 0, 1, b'123456'))  # stream too large
+    pipeline.add(_frame('A1', 1, 0, b'abc'))
+    now[0] = 10
+    future = pipeline.add(_frame('B1', 0, 0, b'ok', final=True))  # A1/1 expired, B1 fits
+    assert future.result(timeout=2).transcript == 'ok'
+    stats = pipeline.stats()
+    assert stats['streams_expired'] == 1 and stats['streams_too_large'] == 1
+    pipeline.shutdown()
+
+def test_latency_and_engine_registry():
+    utterance_future = IngestPipeline(StubSpeechEngine(), clock=lambda: 100.0).add(
+        _frame('A1', 0, 0, b'hi', final=True, pressed_at=99.5))
+    utterance = utterance_future.result(timeout=2)
+    assert utterance.latency(101.0) == {'receive_ms': 500.0, 'stt_ms': 0.0, 'handle_ms': 1000.0, 'total_ms': 1500.0}
+    assert isinstance(get_speech_engine('stub'), StubSpeechEngine)
+    with pytest.raises(ValueError):
+        get_speech_engine('nope')
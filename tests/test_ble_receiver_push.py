@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+
+git = pytest.importorskip('git')
+from ble_receiver_push import BleLogPipeline, GitPublisher
+
+@pytest.fixture
+def clone(tmp_path):
+    """Working clone of a local bare repository (the push target)."""
+    bare = git.Repo.init(tmp_path / "remote.git", bare=True)
+    repo = git.Repo.clone_from(bare.working_dir, tmp_path / "work")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "ManageMe test")
+        config.set_value("user", "email", "test@example.com")
+    return repo, bare
+
+def test_packets_are_batched_into_few_commits_and_pushed(clone):
+    repo, bare = clone
+    log_file = str(repo.working_dir + "/ble_recordings.txt")
+
+    async def main():
+        pipeline = BleLogPipeline(log_file, GitPublisher(repo.working_dir, log_file), write_batch=20,
+                                  write_interval=0.01, commit_interval=60, commit_batch=100)
+        writer = asyncio.ensure_future(pipeline.run())
+        for i in range(250):
+            pipeline.handle_ble_data(None, bytearray(f"tap {i}\n".encode()))
+            if i % 10 == 9:
+                await asyncio.sleep(0)  # the wearable's notifications arrive between loop turns
+        await pipeline.stop()
+        await writer
+        pipeline.close()
+        return pipeline.metrics
+
+    metrics = asyncio.run(main())
+    with open(log_file, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 250 and lines[0].endswith("] tap 0") and lines[-1].endswith("] tap 249")
+    assert metrics.received == 250 and metrics.dropped == 0 and metrics.unpublished == 0
+    assert metrics.write_batches < 250 and 1 <= metrics.commits <= 3 and metrics.pushes == metrics.commits
+    pushed = list(bare.iter_commits("HEAD"))
+    assert len(pushed) == metrics.commits
+    assert bare.git.show("HEAD:ble_recordings.txt").count("\n") == 249
+
+def test_full_queue_drops_and_counts_instead_of_blocking(tmp_path):
+    async def main():
+        pipeline = BleLogPipeline(str(tmp_path / "log.txt"), queue_size=5)
+        for i in range(8):
+            pipeline.handle_ble_data(None, bytearray(b"x"))
+        writer = asyncio.ensure_future(pipeline.run())
+        await pipeline.stop()
+        await writer
+        pipeline.close()
+        return pipeline.metrics
+
+    metrics = asyncio.run(main())
+    assert (metrics.received, metrics.dropped, metrics.queue_high_water) == (5, 3, 5)
+    assert metrics.lines_written == 5 and metrics.commits == 0
+
+def test_push_failures_keep_the_local_commit(clone, tmp_path):
+    repo, _ = clone
+    repo.remote("origin").set_url(str(tmp_path / "missing.git"))
+    log_file = repo.working_dir + "/ble_recordings.txt"
+
+    async def main():
+        pipeline = BleLogPipeline(log_file, GitPublisher(repo.working_dir, log_file))
+        writer = asyncio.ensure_future(pipeline.run())
+        pipeline.handle_ble_data(None, bytearray(b"hello"))
+        await pipeline.stop()
+        await writer
+        pipeline.close()
+        return pipeline.metrics
+
+    metrics = asyncio.run(main())
+    assert metrics.commits == 1 and metrics.pushes == 0 and metrics.push_failures == 1
+    assert repo.head.commit.message.startswith("Add BLE log: 1 line(s)")
@@ -0,0 +1,124 @@
+import datetime
+import json
+import os
+import socket
+import threading
+import time
+import pytest
+from werkzeug.serving import make_server
+from app import app, create_db_tables, get_db
+from client_sync import ApiClient, ClientTask, TaskSync, task_from_api, task_path
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """app.py on a real local port, with a temporary database."""
+    monkeypatch.setattr('app.DATABASE', str(tmp_path / "sync.db"))
+    create_db_tables()
+    httpd = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def rows(sql):
+    with app.app_context():
+        return [tuple(row) for row in get_db().execute(sql).fetchall()]
+
+DUE = datetime.datetime(2099, 3, 4, 9, 30)
+
+def test_task_keys_and_paths():
+    task = task_from_api({'id': 7, 'description': 'pills', 'dueDate': '2099-03-04T09:00:00', 'repeatFrequency': 'daily',
+                          'isRecurringInstance': True, 'originalTaskId': 7, 'occurrenceDate': '2099-03-04T09:00:00'})
+    assert task == ClientTask(datetime.datetime(2099, 3, 4, 9), 'pills', 'Daily', '7@2099-03-04T09:00:00')
+    assert task_path(task.key, 'complete') == '/api/tasks/7/complete?occurrence=2099-03-04T09%3A00%3A00'
+    assert task_path('7') == '/api/tasks/7' and task_from_api({'id': 1, 'dueDate': None}) is None
+
+def test_changes_are_written_behind_and_shared_with_the_web_ui(server, tmp_path):
+    sync = TaskSync(ApiClient(server), state_file=str(tmp_path / "state.json"), poll_interval=0.05)
+    sync.start()
+    try:
+        local = sync.add(DUE, "water the plants")
+        assert local.is_local and sync.tasks() == [local]  # visible at once, before any I/O
+        wait_for(lambda: sync.pending == 0 and not sync.tasks()[0].is_local)
+        (stored,) = sync.tasks()
+        assert sync.changes() == [('remove', local), ('add', stored)]
+        assert rows("SELECT description, dueDate FROM tasks") == [("water the plants", "2099-03-04T09:30:00")]
+
+        # A task added on the web UI reaches the client on the next poll
+        ApiClient(server).request('POST', '/api/tasks', {'description': 'call mom', 'dueDate': '03/05/2099',
+                                                         'dueTime': '10:00', 'dateFormat': 'MMDDYYYY'})
+        wait_for(lambda: len(sync.tasks()) == 2)
+        assert [(event, task.name) for event, task in sync.changes()] == [('add', 'call mom')]
+
+        sync.complete(stored)
+        called = next(t for t in sync.tasks() if t.name == 'call mom')
+        sync.remove(called)
+        assert sync.tasks() == []
+        wait_for(lambda: sync.pending == 0)
+        assert rows("SELECT completed, deletedAt IS NOT NULL FROM tasks ORDER BY id") == [(1, 0), (0, 1)]
+        wait_for(lambda: [t.name for t in sync.completed()] == ['water the plants'])
+        assert sync.changes() == []  # the polls agree with the local cache
+    finally:
+        sync.stop()
+
+def test_offline_changes_survive_a_restart(server, tmp_path):
+    with socket.socket() as s:  # a port nothing listens on
+        s.bind(('127.0.0.1', 0))
+        dead = f"http://127.0.0.1:{s.getsockname()[1]}"
+    state = str(tmp_path / "state.json")
+    offline = TaskSync(ApiClient(dead, timeout=0.5), state_file=state, poll_interval=0.05)
+    offline.start()
+    added = offline.add(DUE, "buy milk")
+    dropped = offline.add(DUE, "never sent")
+    offline.remove(dropped)  # removed before it reached the server: nothing to send
+    time.sleep(0.1)
+    offline.stop()
+    assert offline.pending == 1 and not offline.online and offline.last_error
+
+    online = TaskSync(ApiClient(server), state_file=state, poll_interval=0.05)
+    assert online.pending == 0 and online.tasks() == []  # the state file is read by the sync thread
+    online.start()
+    try:
+        wait_for(lambda: online.pending == 0 and online.tasks() and not online.tasks()[0].is_local)
+        assert [t.name for t in online.tasks()] == ["buy milk"] and online.changes()[0] == ('add', added)
+        assert rows("SELECT description FROM tasks") == [("buy milk",)]
+    finally:
+        online.stop()
+
+def test_rejected_adds_are_dropped_and_reported(server, tmp_path):
+    sync = TaskSync(ApiClient(server), state_file=str(tmp_path / "state.json"), poll_interval=0.05)
+    sync.start()
+    try:
+        refused = sync.add(DUE, "x" * 151)
+        sync.complete(refused)
+        kept = sync.add(DUE, "water the plants")
+        wait_for(lambda: sync.pending == 0)
+        events = sync.changes()
+        assert events[0] == ('error', f"'{refused.name}' could not be saved: Task description exceeds 150 characters")
+        assert ('remove', kept) in events and refused not in sync.completed()
+        assert [t.name for t in sync.tasks()] == ["water the plants"]
+    finally:
+        sync.stop()
+
+def test_stop_saves_queued_changes_while_the_server_hangs(tmp_path):
+    with socket.socket() as hung:  # accepts connections, never answers
+        hung.bind(('127.0.0.1', 0))
+        hung.listen()
+        state = str(tmp_path / "state.json")
+        sync = TaskSync(ApiClient(f"http://127.0.0.1:{hung.getsockname()[1]}", timeout=5), state_file=state)
+        sync.start()
+        sync.add(DUE, "buy milk")
+        wait_for(lambda: os.path.exists(state))  # saved before the send that hangs
+        sync.add(DUE, "buy bread")  # queued while the thread waits on the server
+        started = time.monotonic()
+        sync.stop(timeout=0.1)
+        assert time.monotonic() - started < 1
+    with open(state, encoding='utf-8') as f:
+        pending = json.load(f)['pending']
+    assert [payload['description'] for _, _, payload in pending] == ["buy milk", "buy bread"]
@@ -0,0 +1,37 @@
+from conversations import ConversationStore
+
+def test_turns_are_a_ring_buffer():
+    store = ConversationStore(max_turns=3)
+    conversation = store.open()
+    for i in range(5):
+        conversation.add('user', f"turn {i}")
+    assert [m['content'] for m in conversation.messages()] == ['turn 2', 'turn 3', 'turn 4']
+    assert store.open(conversation.id) is conversation
+    assert store.open('unknown-id').id != conversation.id
+
+def test_idle_sessions_are_evicted():
+    now = [0.0]
+    store = ConversationStore(idle_seconds=60, max_sessions=2, clock=lambda: now[0])
+    a, b = store.open(), store.open()
+    now[0] = 50
+    assert store.get(a.id) is a  # touched: b is now the least recently used
+    now[0] = 55
+    c = store.open()
+    assert store.get(b.id) is None and len(store) == 2  # over max_sessions
+    now[0] = 112
+    assert store.get(a.id) is None and store.get(c.id) is c
+    assert store.evicted == 2
+    assert store.close(c.id) and not store.close(c.id)
+
+def test_references_resolve_to_the_remembered_task():
+    conversation = ConversationStore().open()
+    snooze = {'intent': 'SNOOZE_TASK', 'entities': {'description': 'it', 'duration': '10m'}}
+    assert conversation.resolve(dict(snooze))['entities']['description'] == 'it'  # nothing remembered yet
+    conversation.remember({'intent': 'ADD_TASK', 'entities': {'description': 'Take morning pills'}})
+    assert conversation.resolve(snooze)['entities'] == {'description': 'Take morning pills', 'duration': '10m'}
+    delete = {'intent': 'DELETE_TASK', 'entities': {'description': 'that task'}}
+    assert conversation.resolve(delete)['entities']['description'] == 'Take morning pills'
+    named = {'intent': 'COMPLETE_TASK', 'entities': {'description': 'pay rent'}}
+    assert conversation.resolve(named)['entities']['description'] == 'pay rent'
+    conversation.remember(named)
+    assert conversation.entities['description'] == 'pay rent'
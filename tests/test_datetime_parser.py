@@ -0,0 +1,92 @@
+import datetime
+import random
+import pytest
+from dateutil import parser as dateutil_parser
+from datetime_parser import UI_FORMATS, DateTimeParser
+
+TODAY = datetime.date(2026, 10, 18)
+MONTHS = ['jan', 'January', 'FEB', 'march', 'Sept', 'september', 'may', 'Dec']
+
+
+def _strptime_loop(date_str, time_str):
+    for fmt in UI_FORMATS:
+        try:
+            return datetime.datetime.strptime(f"{date_str} {time_str}", fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _dateutil(text, dayfirst):
+    default = datetime.datetime.combine(TODAY, datetime.time())
+    try:
+        return dateutil_parser.parse(text, dayfirst=dayfirst, fuzzy=False, default=default)
+    except ValueError:
+        return 'error'
+
+
+def test_ui_fast_path_matches_strptime():
+    rnd = random.Random(7)
+    parser = DateTimeParser()
+    for _ in range(3000):
+        a, b = rnd.randrange(0, 34), rnd.randrange(0, 34)
+        date_str = rnd.choice([f"{a}/{b}/2099", f"{a:02d}/{b:02d}/2025"])
+        hour, minute = rnd.randrange(0, 26), rnd.randrange(0, 62)
+        time_str = rnd.choice([f"{hour}:{minute:02d}", f"{hour}:{minute:02d} {rnd.choice(['AM', 'pm'])}",
+                               f"{hour}:{minute}", f"{hour}:{minute:02d}PM"])
+        assert parser.parse_ui(date_str, time_str) == _strptime_loop(date_str, time_str), (date_str, time_str)
+
+
+def test_text_fast_paths_match_dateutil():
+    rnd = random.Random(11)
+    parser = DateTimeParser()
+    for _ in range(3000):
+        a, b = rnd.randrange(0, 33), rnd.randrange(0, 33)
+        hour, minute = rnd.randrange(0, 25), rnd.randrange(0, 61)
+        date = rnd.choice([f"{a}/{b}/2025", f"{a}{rnd.choice(['', 'th', 'st'])} of {rnd.choice(MONTHS)}",
+                           f"{rnd.choice(MONTHS)} {a}, 2025", f"2025-{a:02d}-{b:02d}", ''])
+        clock = rnd.choice([f"{hour}:{minute:02d}", f"{hour}{rnd.choice(['am', ' PM'])}",
+                            f"{hour}:{minute:02d} pm", f"{hour}", ''])
+        text = (date + rnd.choice([' ', ' at ']) + clock).strip() if date and clock else date or clock
+        if not text:
+            continue
+        for dayfirst, profile in ((True, None), (False, 'MMDDYYYY')):
+            try:
+                result = parser.parse_text(text, profile, today=TODAY)
+            except ValueError:
+                result = 'error'
+            assert result == _dateutil(text, dayfirst), (text, dayfirst)
+
+
+def test_anonymous_order_is_fixed_but_profiles_adapt():
+    parser = DateTimeParser()
+    march = datetime.datetime(2099, 3, 4, 9, 0)
+    april = datetime.datetime(2099, 4, 3, 9, 0)
+    assert parser.parse_ui('13/04/2099', '9:00 AM') == datetime.datetime(2099, 4, 13, 9, 0)
+    assert parser.parse_ui('03/04/2099', '9:00 AM') == march  # no memory without a profile
+    # A client whose last date only parsed day-first gets day-first for ambiguous dates too
+    parser.parse_ui('13/04/2099', '9:00 AM', profile='client-1')
+    assert parser.format_order('client-1')[0] == '%d/%m/%Y %I:%M %p'
+    assert parser.parse_ui('03/04/2099', '9:00 AM', profile='client-1') == april
+    assert parser.parse_ui('03/04/2099', '9:00 AM', profile='client-2') == march
+    # The dateFormat setting puts its own order first
+    assert parser.parse_ui('03/04/2099', '09:00', profile='DDMMYYYY') == april
+    assert parser.parse_text('03/04/2099', 'MMDDYYYY') == datetime.datetime(2099, 3, 4)
+    assert parser.parse_text('03/04/2099') == datetime.datetime(2099, 4, 3)
+
+
+def test_results_and_failures_are_cached():
+    parser = DateTimeParser(max_entries=2)
+    parser.parse_text('9pm', today=TODAY)
+    assert parser.parse_text('9pm', today=TODAY) == datetime.datetime(2026, 10, 18, 21, 0)
+    assert (parser.hits, parser.misses) == (1, 1)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            parser.parse_text('next fortnight-ish', today=TODAY)
+    assert parser.hits == 2
+    parser.parse_ui('1/2/2025', '10:00')
+    assert parser.parse_text('9pm', today=TODAY) and parser.misses == 4  # evicted (LRU of 2)
+    # Time-only text depends on the day it was parsed
+    assert parser.parse_text('9pm', today=TODAY + datetime.timedelta(days=1)).day == 19
+    with pytest.raises(TypeError):
+        parser.parse_text(5)
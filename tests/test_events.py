@@ -0,0 +1,96 @@
+import datetime
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import pytest
+from events import EventBroker, DueNotifier, Subscription, format_sse
+
+def test_publish_fans_out_and_replays_after_last_event_id():
+    broker = EventBroker()
+    a, b = broker.subscribe(), broker.subscribe()
+    first = broker.publish('task.added', {'id': 1})
+    broker.publish('task.completed', {'id': 1})
+    assert [e['type'] for e in a.wait(0)] == ['task.added', 'task.completed']
+    assert len(b.wait(0)) == 2
+    late = broker.subscribe(last_event_id=first['id'])
+    assert [e['type'] for e in late.wait(0)] == ['task.completed']
+    broker.unsubscribe(a)
+    assert broker.subscriber_count == 2
+
+def test_slow_subscriber_drops_oldest():
+    sub = Subscription(max_queue=2)
+    for i in range(3):
+        sub.put({'id': i, 'type': 'x', 'data': {}})
+    assert [e['id'] for e in sub.wait(0)] == [1, 2]
+    assert sub.dropped == 1
+
+def test_due_notifier_announces_each_due_task_once():
+    broker = EventBroker()
+    sub = broker.subscribe()
+    due = {'ids': [1]}
+    notifier = DueNotifier(broker, lambda now: due['ids'], lambda: None,
+                           lambda ids: [{'id': i} for i in ids])
+    now = datetime.datetime(2025, 3, 4, 9, 0)
+    assert notifier.tick(now) == [1]
+    due['ids'] = [1, 2]
+    assert notifier.tick(now) == [2]
+    assert [e['data']['id'] for e in sub.wait(0)] == [1, 2]
+    assert format_sse(broker.publish('task.due', {'id': 3})).startswith('id: 3\nevent: task.due\ndata: ')
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _thread_count(pid):
+    with open(f"/proc/{pid}/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('Threads:'))
+
+def test_app_serves_many_idle_streams_without_a_thread_each(tmp_path):
+    pytest.importorskip('gevent')
+    if not os.path.exists('/proc/self/status'):
+        pytest.skip("needs /proc to count threads")
+    port = _free_port()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, MANAGEME_DB=str(tmp_path / "events.db"), MANAGEME_HOST='127.0.0.1',
+               MANAGEME_PORT=str(port), MANAGEME_SERVER='gevent')
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=root, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    streams = []
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                assert time.monotonic() < deadline and server.poll() is None, "server did not start"
+                time.sleep(0.05)
+        for _ in range(200):
+            stream = socket.create_connection(('127.0.0.1', port), timeout=10)
+            stream.sendall(b"GET /api/events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            streams.append(stream)
+        for stream in streams:
+            received = b""
+            while b"retry: 5000" not in received:
+                received += stream.recv(4096)
+        assert _thread_count(server.pid) < 20  # 200 open subscribers, a handful of threads
+
+        body = json.dumps({'description': 'stretch', 'dueDate': '03/04/2099', 'dueTime': '9:00 AM'}).encode()
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/api/tasks", data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            assert response.status == 201
+        for stream in streams:
+            received = b""
+            while b"event: task.added" not in received:
+                received += stream.recv(4096)
+    finally:
+        for stream in streams:
+            stream.close()
+        server.terminate()
+        server.wait(10)
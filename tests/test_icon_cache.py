@@ -0,0 +1,39 @@
+import os
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+from icon_cache import IconCache, IconLoader, icon_size_for_dpi
+
+@pytest.fixture
+def icons(tmp_path):
+    source = tmp_path / "icons"
+    source.mkdir()
+    for name, color in (("home", "red"), ("calendar", "blue")):
+        Image.new("RGBA", (256, 256), color).save(source / f"{name}.png")
+    return str(source), str(tmp_path / "cache")
+
+def test_resized_icons_are_cached_per_size_and_mtime(icons):
+    source, cache_dir = icons
+    cache = IconCache(source, cache_dir)
+    assert cache.load("home", 64).size == (64, 64) and cache.misses == 1
+    assert cache.load("home", 64).size == (64, 64) and cache.hits == 1
+    assert cache.load("home", 128).size == (128, 128) and cache.misses == 2  # sizes cached side by side
+    stat = os.stat(os.path.join(source, "home.png"))
+    os.utime(os.path.join(source, "home.png"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cache.load("home", 64)  # the source changed: resized again, the old copy replaced
+    assert cache.misses == 3
+    assert sorted(f.split("-")[1] for f in os.listdir(cache_dir)) == ["128", "64"]
+
+def test_loader_reads_in_the_background_and_reports_missing_icons(icons):
+    source, cache_dir = icons
+    loader = IconLoader(["home", "calendar", "missing"], size=48, cache=IconCache(source, cache_dir))
+    loader.wait()
+    assert loader.loaded_seconds is not None
+    assert loader._pending["home"].result().size == (48, 48)
+    assert loader._pending["missing"].result() is None
+    assert "calendar" in loader and loader.get("unknown") is None
+
+def test_icon_size_for_dpi():
+    assert icon_size_for_dpi(96) == 64
+    assert icon_size_for_dpi(144) == 96
+    assert icon_size_for_dpi(200) == 128
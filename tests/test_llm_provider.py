@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import pytest
+from llm_provider import (AssistantEngine, LLMProvider, ResponseCache, StubProvider, get_provider,
+                          normalize_utterance)
+
+COMPLETE_RENT = {'intent': 'COMPLETE_TASK', 'entities': {'description': 'rent'}, 'response': 'Done.'}
+
+def _user(text):
+    return [{'role': 'user', 'content': text}]
+
+class BlockingProvider(LLMProvider):
+    """Answers only once `release` is set."""
+    name = 'blocking'
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def interpret(self, messages):
+        self.release.wait(5)
+        return dict(COMPLETE_RENT)
+
+def test_providers_must_implement_interpret():
+    class Incomplete(LLMProvider):
+        name = 'incomplete'
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_provider_answers_are_cached_by_normalized_utterance():
+    stub = StubProvider({'I paid the rent': COMPLETE_RENT})
+    engine = AssistantEngine(stub, timeout=2)
+    first = engine.interpret(_user('I paid the rent'))
+    assert first['intent'] == 'COMPLETE_TASK' and first['source'] == 'provider'
+    first['entities']['description'] = 'changed by the caller'
+    again = engine.interpret(_user('  i PAID the   rent!'))
+    assert again['source'] == 'cache' and again['entities'] == {'description': 'rent'}
+    assert stub.calls == ['i paid the rent']
+    # Utterances without a canned answer get the rule engine's interpretation
+    assert engine.interpret(_user('delete groceries'))['intent'] == 'DELETE_TASK'
+    engine.shutdown()
+
+def test_follow_ups_are_cached_per_conversation_context():
+    move = {'intent': 'RESCHEDULE_TASK', 'entities': {}, 'response': 'Moved.'}
+    stub = StubProvider({'move it to friday': move})
+    engine = AssistantEngine(stub, timeout=2)
+
+    def follow_up(topic):
+        return [{'role': 'user', 'content': f'add {topic} tomorrow'},
+                {'role': 'assistant', 'content': f'Added {topic}.'},
+                {'role': 'user', 'content': 'move it to Friday'}]
+    assert engine.interpret(follow_up('dentist'))['source'] == 'provider'
+    assert engine.interpret(follow_up('gym'))['source'] == 'provider'  # same words, other task
+    assert engine.interpret(follow_up('dentist'))['source'] == 'cache'
+    assert engine.interpret(_user('move it to Friday'))['source'] == 'provider'
+    assert stub.calls == ['move it to friday'] * 3
+    engine.shutdown()
+
+def test_timeouts_fall_back_and_the_late_answer_fills_the_cache():
+    provider = BlockingProvider()
+    engine = AssistantEngine(provider, timeout=0.05, max_workers=1)
+    result = engine.interpret(_user('I paid the rent'))
+    assert result['source'] == 'fallback' and result['intent'] == 'UNKNOWN'
+    # The single slot is still held by the slow call: no queueing behind it
+    assert engine.interpret(_user('add call mom'))['source'] == 'fallback'
+    assert engine.counters['timeout'] == 1 and engine.counters['busy'] == 1
+    provider.release.set()
+    engine.shutdown(wait=True)
+    assert engine.interpret(_user('I paid the rent'))['source'] == 'cache'
+
+@pytest.mark.parametrize('stub', [
+    StubProvider(error=RuntimeError('model unavailable')),
+    StubProvider(default={'intent': 'LAUNCH_ROCKET', 'entities': {}}),
+])
+def test_failures_and_unusable_answers_fall_back_to_rules(stub):
+    engine = AssistantEngine(stub, timeout=2)
+    result = engine.interpret(_user('snooze pills by 10m'))
+    assert result['source'] == 'fallback' and result['intent'] == 'SNOOZE_TASK'
+    assert engine.counters['error'] == 1 and len(engine.cache) == 0
+    engine.shutdown()
+
+def test_rules_provider_runs_inline_and_empty_conversations_use_the_fallback():
+    engine = AssistantEngine(get_provider('rules'))
+    assert engine.interpret(_user('list tasks today'))['source'] == 'provider'
+    assert engine._executor is None
+    stub_engine = AssistantEngine(StubProvider(), timeout=2)
+    assert stub_engine.interpret([])['intent'] == 'UNKNOWN' and stub_engine.counters['no_message'] == 1
+    with pytest.raises(ValueError):
+        get_provider('no-such-model')
+
+def test_cache_entries_expire():
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('c', 3)  # evicts 'a'
+    assert cache.get('a') is None and cache.get('b') == 2
+    now[0] = 10.5
+    assert cache.get('c') is None and len(cache) == 1
+    assert normalize_utterance(' Call  Mom?! ') == 'call mom'
+
+def test_ainterpret_does_not_block_the_event_loop():
+    provider = BlockingProvider()
+    engine = AssistantEngine(provider, timeout=1)
+
+    async def main():
+        pending = asyncio.ensure_future(engine.ainterpret(_user('I paid the rent')))
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+        provider.release.set()
+        return await pending
+
+    assert asyncio.run(main())['source'] == 'provider'
+    engine.shutdown()
@@ -0,0 +1,53 @@
+import datetime
+from recurrence import RecurrenceEngine, current_occurrence, iter_occurrences
+
+ANCHOR = datetime.datetime(2025, 3, 3, 9, 0)  # a Monday
+
+def series(freq, **extra):
+    task = {'id': 1, 'dueDate': ANCHOR, 'repeatFrequency': freq}
+    task.update(extra)
+    return task
+
+def window(task, start, days):
+    return list(iter_occurrences(task, start, start + datetime.timedelta(days=days)))
+
+def test_daily_weekdays_and_custom():
+    start = datetime.datetime(2025, 3, 3)
+    assert len(window(series('daily'), start, 7)) == 7
+    assert [d.weekday() for d in window(series('weekdays'), start, 7)] == [0, 1, 2, 3, 4]
+    # customRepeatDays use 0 = Sunday, so 2 = Tuesday and 0 = Sunday
+    custom = window(series('custom', customRepeatDays=[2, 0]), start, 7)
+    assert [d.weekday() for d in custom] == [1, 6]
+    assert all(d.time() == ANCHOR.time() for d in custom)
+
+def test_monthly_skips_short_months_and_repeat_until_ends_series():
+    task = series('monthly', dueDate=datetime.datetime(2025, 1, 31, 8, 0))
+    occ = window(task, datetime.datetime(2025, 1, 1), 220)
+    assert [d.month for d in occ] == [1, 3, 5, 7]
+    limited = series('daily', repeatUntil=datetime.date(2025, 3, 5))
+    assert len(window(limited, ANCHOR, 30)) == 3
+
+def test_open_ended_series_far_from_anchor():
+    far = datetime.datetime(2125, 3, 3)
+    occ = window(series('weekly'), far, 14)
+    assert len(occ) == 2 and all(d.weekday() == 0 for d in occ)
+
+def test_current_occurrence_moves_on_once_handled():
+    task = series('daily')
+    now = datetime.datetime(2025, 3, 10, 12, 0)
+    assert current_occurrence(task, now, lambda occ: False) == datetime.datetime(2025, 3, 10, 9, 0)
+    assert current_occurrence(task, now, lambda occ: True) == datetime.datetime(2025, 3, 11, 9, 0)
+
+def test_engine_memoizes_and_invalidates():
+    engine = RecurrenceEngine()
+    task = series('daily')
+    start, end = datetime.datetime(2025, 3, 3), datetime.datetime(2025, 3, 10)
+    first = engine.expand(task, start, end)
+    engine.expand(task, start, end, handled={ANCHOR})
+    assert (engine.hits, engine.misses) == (1, 1)
+    assert first[0]['isRecurringInstance'] and first[0]['originalTaskId'] == 1
+    # An edited rule is never served from the memo, even without invalidate()
+    assert len(engine.expand(series('weekly'), start, end)) == 1
+    engine.invalidate(1)
+    engine.expand(task, start, end)
+    assert engine.misses == 3
@@ -0,0 +1,60 @@
+import datetime
+import pytest
+import task_store
+from schedule_optimizer import BusySlots, free_up, plan_free_up
+
+DAY = datetime.date(2099, 3, 4)
+
+def _at(day_offset, hour, minute=0):
+    return datetime.datetime.combine(DAY + datetime.timedelta(days=day_offset), datetime.time(hour, minute))
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield task_store.MemoryTaskStore()
+        return
+    conn = task_store.connect(str(tmp_path / "optimizer.db"))
+    task_store.create_tables(conn)
+    yield task_store.TaskStore(conn)
+    conn.close()
+
+def _add(store, desc, due, priority='priority-medium', **extra):
+    return store.add_task(dict(description=desc, dueDate=due, priority=priority, **extra)).id
+
+def test_busy_slots_find_the_nearest_gap():
+    slots = BusySlots([_at(1, 9), _at(1, 9, 30), _at(1, 10, 30)])
+    assert not slots.is_free(_at(1, 9, 15)) and slots.is_free(_at(1, 10))
+    assert slots.nearest_free(_at(1, 9), _at(1, 8), _at(1, 21)) == _at(1, 8, 30)
+    assert slots.nearest_free(_at(1, 10), _at(1, 8), _at(1, 21)) == _at(1, 10)
+    assert slots.nearest_free(_at(1, 9), _at(1, 9), _at(1, 9, 1)) is None
+
+def test_plan_moves_lowest_priority_latest_first_into_free_slots():
+    day_tasks = [
+        {'id': 1, 'description': 'urgent', 'dueDate': _at(0, 9), 'priority': 'priority-high'},
+        {'id': 2, 'description': 'walk', 'dueDate': _at(0, 10), 'priority': 'priority-low'},
+        {'id': 3, 'description': 'read', 'dueDate': _at(0, 16), 'priority': 'priority-low'},
+        {'id': 4, 'description': 'email', 'dueDate': _at(0, 11), 'priority': 'priority-medium'},
+    ]
+    busy = [_at(1, 16), _at(1, 10)]  # tomorrow at the same times is taken
+    moves = plan_free_up(day_tasks, busy, max_moves=2)
+    assert [(m.task_id, m.new) for m in moves] == [(3, _at(1, 16, 30)), (2, _at(1, 10, 30))]
+    # High priority tasks stay; a full next day pushes the move one more day
+    full_day = [_at(1, h, m) for h in range(8, 21) for m in (0, 30)]
+    moves = plan_free_up(day_tasks, full_day, max_moves=5)
+    assert [m.task_id for m in moves] == [3, 2, 4] and all(m.new.date() == _at(2, 0).date() for m in moves)
+    assert moves[0].new == _at(2, 16)
+
+def test_free_up_avoids_collisions_and_writes_all_moves(store):
+    pills = _add(store, 'Pills', _at(0, 14), 'priority-high')
+    walk = _add(store, 'Walk', _at(0, 15), 'priority-low')
+    call = _add(store, 'Call', _at(0, 13), 'priority-medium')
+    _add(store, 'Morning yoga', _at(0, 9), 'priority-low')
+    _add(store, 'Dentist', _at(1, 15))
+    _add(store, 'Daily standup', _at(-10, 13), repeatFrequency='daily')
+    plan = free_up(store, DAY, 'afternoon')
+    assert plan.considered == 3
+    assert [(m.task_id, m.new) for m in plan.moves] == [(walk, _at(1, 15, 30)), (call, _at(1, 13, 30))]
+    assert store.get_task(walk)['dueDate'] == _at(1, 15, 30)
+    assert store.get_task(call)['dueDate'] == _at(1, 13, 30)
+    assert store.get_task(pills)['dueDate'] == _at(0, 14)
+    assert free_up(store, DAY + datetime.timedelta(days=30)) == (0, [])
@@ -0,0 +1,39 @@
+import datetime
+from scheduler import DueScheduler
+
+T0 = datetime.datetime(2025, 3, 4, 9, 0)
+
+def at(minutes):
+    return T0 + datetime.timedelta(minutes=minutes)
+
+def test_due_ids_ordered_by_priority_then_time():
+    sched = DueScheduler()
+    sched.load([
+        {'id': 1, 'dueDate': at(0), 'priority': 'priority-low'},
+        {'id': 2, 'dueDate': at(5), 'priority': 'priority-high'},
+        {'id': 3, 'dueDate': at(1), 'priority': 'priority-high'},
+        {'id': 4, 'dueDate': at(60), 'priority': 'priority-high'},
+    ])
+    assert sched.due_ids(at(10)) == [3, 2, 1]
+    assert sched.next_due_at() == at(60)
+    # Already-due tasks stay due until completed
+    assert sched.due_ids(at(11)) == [3, 2, 1]
+
+def test_snooze_and_complete_invalidate_lazily():
+    sched = DueScheduler()
+    sched.load([{'id': 1, 'dueDate': at(0)}, {'id': 2, 'dueDate': at(30)}])
+    assert sched.due_ids(at(1)) == [1]
+    sched.schedule(1, at(40))  # snoozed: no longer due, old heap entry is stale
+    sched.cancel(2)            # completed
+    assert sched.due_ids(at(35)) == []
+    assert sched.next_due_at() == at(40)
+    assert sched.due_ids(at(40)) == [1]
+    assert sched.next_due_at() is None
+
+def test_repeated_snoozes_do_not_grow_heap():
+    sched = DueScheduler()
+    sched.load([{'id': 1, 'dueDate': at(0)}])
+    for i in range(1000):
+        sched.schedule(1, at(i))
+    assert len(sched._heap) < 200
+    assert sched.next_due_at() == at(999)
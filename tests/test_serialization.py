@@ -0,0 +1,44 @@
+import datetime
+import json
+import pytest
+from serialization import TaskSerializer, to_json_dict
+
+DUE = datetime.datetime(2025, 3, 4, 9, 0)
+
+def _task(task_id, due=DUE, **extra):
+    task = {'id': task_id, 'description': 'pills', 'dueDate': due, 'repeatUntil': datetime.date(2025, 4, 1),
+            'completed': False, 'customRepeatDays': [1, 3], 'deletedAt': None}
+    task.update(extra)
+    return task
+
+@pytest.mark.parametrize('encoder', ['json', 'auto'])
+def test_encode_list_matches_plain_json(encoder):
+    serializer = TaskSerializer(encoder=encoder)
+    tasks = [_task(1), _task(2, due=DUE.replace(microsecond=5))]
+    assert json.loads(serializer.encode_list(tasks)) == [to_json_dict(t) for t in tasks]
+    assert to_json_dict(tasks[0])['repeatUntil'] == '2025-04-01'
+    assert serializer.encode_list([]) == b'[]'
+
+def test_cache_hits_until_invalidated():
+    serializer = TaskSerializer(encoder='json')
+    serializer.encode(_task(1))
+    assert json.loads(serializer.encode(_task(1, completed=True)))['completed'] is False  # cached
+    serializer.invalidate(1)
+    assert json.loads(serializer.encode(_task(1, completed=True)))['completed'] is True
+    # A new dueDate (snooze, another occurrence) is a separate entry
+    moved = DUE + datetime.timedelta(days=1)
+    assert json.loads(serializer.encode(_task(1, due=moved)))['dueDate'] == moved.isoformat()
+    assert (serializer.hits, serializer.misses) == (1, 3)
+
+def test_lru_eviction_bounds_cache():
+    serializer = TaskSerializer(max_entries=2, encoder='json')
+    for task_id in (1, 2, 3):
+        serializer.encode(_task(task_id))
+    serializer.encode(_task(1))
+    assert serializer.misses == 4
+
+def test_orjson_matches_stdlib_encoding():
+    pytest.importorskip('orjson')
+    task = _task(1, due=DUE.replace(microsecond=120), createdAt=datetime.date(2025, 1, 1))
+    fast = json.loads(TaskSerializer(encoder='orjson').encode(task))
+    assert fast == json.loads(TaskSerializer(encoder='json').encode(task))
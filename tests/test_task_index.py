@@ -0,0 +1,40 @@
+import datetime
+from task_index import DueDateIndex
+
+def dt(day, hour):
+    return datetime.datetime(2025, 3, day, hour)
+
+def test_range_lookups_are_time_ordered():
+    index = DueDateIndex()
+    index.add(1, dt(4, 18))
+    index.add(2, dt(4, 8))
+    index.add(3, dt(5, 9))
+    index.add(4, datetime.datetime(2025, 4, 1))
+    assert index.for_day(datetime.date(2025, 3, 4)) == [2, 1]
+    assert index.for_month(2025, 3) == [2, 1, 3]
+    assert index.up_to(dt(4, 18)) == [2, 1]
+    assert index.between(dt(4, 9), dt(5, 10)) == [1, 3]
+
+def test_add_moves_and_discard_removes():
+    index = DueDateIndex()
+    index.add(1, dt(4, 8))
+    index.add(2, dt(4, 8))
+    index.add(1, dt(6, 8))  # e.g. snoozed a day
+    assert index.for_day(datetime.date(2025, 3, 4)) == [2]
+    assert index.due_of(1) == dt(6, 8)
+    index.discard(2)
+    index.discard(99)
+    assert index.all() == [1]
+    assert len(index) == 1 and 2 not in index
+
+def test_hourly_index_buckets_by_day_and_hour():
+    from task_index import HourlyIndex
+    walk, pills, call = (dt(4, 9).replace(minute=30), 'walk', 'Once'), (dt(4, 9), 'pills', 'Daily'), \
+        (dt(5, 14), 'call', 'Once')
+    index = HourlyIndex([walk, call])
+    assert index.add(pills) == (datetime.date(2025, 3, 4), 9)
+    assert index.hour(datetime.date(2025, 3, 4), 9) == [pills, walk]  # same hour, both kept in time order
+    assert index.hours(datetime.date(2025, 3, 5)) == {14: [call]}
+    assert index.for_day(datetime.date(2025, 3, 4)) == [pills, walk]
+    assert index.remove(call) == (datetime.date(2025, 3, 5), 14) and index.remove(call) is None
+    assert index.hours(datetime.date(2025, 3, 5)) == {} and len(index) == 2
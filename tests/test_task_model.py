@@ -0,0 +1,34 @@
+import datetime
+import pytest
+from task_model import Priority, Task
+
+DUE = datetime.datetime(2025, 3, 4, 9, 0)
+
+def test_priority_enum_matches_frontend_strings():
+    assert Priority.parse('priority-high') is Priority.HIGH
+    assert Priority.HIGH == 'priority-high' and str(Priority.LOW) == 'priority-low'
+    assert sorted(Priority, key=lambda p: p.rank) == [Priority.LOW, Priority.MEDIUM, Priority.HIGH]
+    assert Priority.parse('urgent', Priority.MEDIUM) is Priority.MEDIUM
+    with pytest.raises(ValueError):
+        Priority.parse('urgent')
+
+def test_task_validates_fields():
+    task = Task(description='pills', dueDate=DUE, priority='priority-low')
+    assert task.priority is Priority.LOW and task.repeatFrequency == 'none'
+    with pytest.raises(ValueError):
+        Task(description='pills', dueDate='2025-03-04')
+    with pytest.raises(ValueError):
+        Task(description='pills', dueDate=DUE, repeatFrequency='hourly')
+    assert not hasattr(task, '__dict__')
+
+def test_task_mapping_api():
+    task = Task.from_dict({'id': 3, 'description': 'pills', 'dueDate': DUE, 'unknown': 1})
+    assert task['id'] == 3 and task.get('deletedAt') is None and task.get('unknown', 'x') == 'x'
+    task.update({'priority': 'priority-high'}, completed=True)
+    assert task.priority is Priority.HIGH and task['completed']
+    clone = task.copy()
+    clone['description'] = 'other'
+    assert task.description == 'pills'
+    assert dict(task)['dueDate'] == DUE and 'occurrenceDate' in task
+    with pytest.raises(KeyError):
+        task['unknown']
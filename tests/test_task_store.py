@@ -0,0 +1,165 @@
+import datetime
+import pytest
+import task_store
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    conn = task_store.connect(str(tmp_path / "store.db"))
+    task_store.create_tables(conn)
+    yield task_store.TaskStore(conn)
+    conn.close()
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def store(request):
+    if request.param == 'memory':
+        return task_store.MemoryTaskStore()
+    return request.getfixturevalue('sqlite_store')
+
+def _task(desc, due, **extra):
+    task = {'description': desc, 'dueDate': due, 'priority': 'priority-medium',
+            'createdAt': datetime.datetime(2025, 1, 1)}
+    task.update(extra)
+    return task
+
+def test_day_and_month_queries_are_ordered_and_exclude_inactive(store):
+    store.add_task(_task('late', datetime.datetime(2025, 3, 4, 18, 0)))
+    store.add_task(_task('early', datetime.datetime(2025, 3, 4, 8, 0), priority='priority-low'))
+    store.add_task(_task('urgent', datetime.datetime(2025, 3, 4, 12, 0), priority='priority-high'))
+    store.add_task(_task('next day', datetime.datetime(2025, 3, 5, 9, 0)))
+    done = store.add_task(_task('done', datetime.datetime(2025, 3, 4, 10, 0)))
+    store.update_task(done['id'], completed=True, completedAt=datetime.datetime(2025, 3, 4, 10, 5))
+
+    day = store.tasks_for_day(datetime.date(2025, 3, 4))
+    assert [t['description'] for t in day] == ['early', 'urgent', 'late']
+    by_prio = store.tasks_for_day(datetime.date(2025, 3, 4), sort='priority')
+    assert [t['description'] for t in by_prio] == ['urgent', 'late', 'early']
+    assert len(store.tasks_for_month(2025, 3)) == 4
+    assert [t['description'] for t in store.completed_tasks()] == ['done']
+    assert [t['description'] for t in store.due_tasks(datetime.datetime(2025, 3, 4, 12, 0))] == ['urgent', 'early']
+
+def test_restore_and_purge(store):
+    task = store.add_task(_task('pills', datetime.datetime(2025, 3, 4, 8, 0)))
+    store.update_task(task['id'], deletedAt=datetime.datetime(2025, 3, 4, 9, 0))
+    assert store.tasks_for_day(datetime.date(2025, 3, 4)) == []
+    assert store.restore_all() == 1
+    assert [t['id'] for t in store.tasks_for_day(datetime.date(2025, 3, 4))] == [task['id']]
+    store.update_task(task['id'], deletedAt=datetime.datetime(2025, 3, 4, 9, 0))
+    assert store.purge(task['id'])
+    assert store.get_task(task['id']) is None
+
+def test_active_range_queries_use_index(sqlite_store):
+    plan = sqlite_store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE completed = 0 AND deletedAt IS NULL "
+        "AND dueDate >= ? AND dueDate < ? ORDER BY dueDate", ('2025-03-04', '2025-03-05')).fetchall()
+    detail = ' '.join(r['detail'] for r in plan)
+    assert 'idx_tasks_active_due' in detail
+    assert 'TEMP B-TREE' not in detail
+
+def test_create_tables_migrates_old_schema(tmp_path):
+    conn = task_store.connect(str(tmp_path / "old.db"))
+    conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, description TEXT NOT NULL, "
+                 "dueDate TEXT NOT NULL, priority TEXT, repeatFrequency TEXT, customRepeatDays TEXT, "
+                 "repeatUntil TEXT, completed INTEGER DEFAULT 0, snoozedUntil TEXT, snoozeDuration TEXT, "
+                 "deletedAt TEXT, completedAt TEXT, createdAt TEXT NOT NULL)")
+    conn.execute("INSERT INTO tasks (description, dueDate, completed, createdAt) "
+                 "VALUES ('old', '2025-03-04T09:00:00', 1, '2025-03-01T09:00:00')")
+    task_store.create_tables(conn)
+    columns = {r['name'] for r in conn.execute("PRAGMA table_info(tasks)")}
+    assert {'isRecurringInstance', 'originalTaskId', 'occurrenceDate'} <= columns
+    # completedAt is backfilled so the completed history's keyset order has no NULLs
+    assert conn.execute("SELECT completedAt FROM tasks").fetchone()[0] == '2025-03-04T09:00:00'
+    conn.close()
+
+def test_keyset_pages_cover_every_row_once(store):
+    base = datetime.datetime(2025, 3, 4, 9, 0)
+    for i in range(7):
+        task = store.add_task(_task(f't{i}', base + datetime.timedelta(hours=i // 2)))
+        store.update_task(task['id'], completed=True, completedAt=base + datetime.timedelta(days=i),
+                          deletedAt=base + datetime.timedelta(days=i) if i % 2 else None)
+    for order, fetch in (('completed', store.completed_tasks), ('deleted', store.deleted_tasks)):
+        seen, after = [], None
+        while True:
+            page = fetch(after=after, limit=2)
+            seen.extend(t['id'] for t in page)
+            if len(page) < 2:
+                break
+            after = task_store.decode_cursor(task_store.encode_cursor(task_store.sort_key(order, page[-1])), order)
+        assert seen == [t['id'] for t in fetch()]
+    recent = store.completed_tasks(since=base + datetime.timedelta(days=4))
+    assert [t['description'] for t in recent] == ['t6', 't4']  # most recently completed first
+    assert [t['description'] for t in store.deleted_tasks(until=base + datetime.timedelta(days=2))] == ['t1']
+
+def test_deleted_keyset_query_uses_index(sqlite_store):
+    plan = sqlite_store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE deletedAt IS NOT NULL AND (deletedAt, id) < (?, ?) "
+        "ORDER BY deletedAt DESC, id DESC LIMIT 10", ('2025-03-04', 5)).fetchall()
+    detail = ' '.join(r['detail'] for r in plan)
+    assert 'idx_tasks_deletedAt' in detail
+    assert 'TEMP B-TREE' not in detail
+
+def test_completed_keyset_query_uses_index(sqlite_store):
+    plan = sqlite_store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE completed = 1 AND deletedAt IS NULL "
+        "AND (completedAt, id) < (?, ?) ORDER BY completedAt DESC, id DESC LIMIT 10",
+        ('2025-03-04', 5)).fetchall()
+    detail = ' '.join(r['detail'] for r in plan)
+    assert 'idx_tasks_completed' in detail
+    assert 'TEMP B-TREE' not in detail
+
+def test_add_tasks_is_atomic_and_remaps_series_links(store):
+    series = _task('pills', datetime.datetime(2025, 3, 4, 8, 0), id=70, repeatFrequency='daily')
+    instance = _task('pills', datetime.datetime(2025, 3, 5, 8, 0), id=71, isRecurringInstance=True,
+                     originalTaskId=70, completed=True)
+    orphan = _task('orphan', datetime.datetime(2025, 3, 6, 8, 0), originalTaskId=999)
+    ids = store.add_tasks(iter([series, instance, orphan]))
+    assert store.get_task(ids[1])['originalTaskId'] == ids[0]
+    assert store.get_task(ids[2])['originalTaskId'] is None
+
+    def failing():
+        yield _task('kept?', datetime.datetime(2025, 3, 7, 8, 0))
+        raise ValueError("bad row")
+    with pytest.raises(ValueError):
+        store.add_tasks(failing())
+    assert [t['id'] for t in store.iter_tasks(batch=2)] == ids
+
+def test_transaction_rolls_back_every_change(store):
+    kept = store.add_task(_task('kept', datetime.datetime(2025, 3, 4, 8, 0)))
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.update_task(kept['id'], completed=True)
+            store.add_task(_task('added', datetime.datetime(2025, 3, 4, 9, 0)))
+            raise RuntimeError("abort")
+    assert [t['description'] for t in store.tasks_for_day(datetime.date(2025, 3, 4))] == ['kept']
+    with store.transaction():
+        store.update_task(kept['id'], completed=True)
+    assert store.get_task(kept['id'])['completed']
+
+def test_search_tasks_ranks_word_prefix_matches(store):
+    due = datetime.datetime(2025, 3, 4, 8, 0)
+    pills = store.add_task(_task('Take morning pills', due))
+    store.add_task(_task('Buy pills', due + datetime.timedelta(hours=1)))
+    store.add_task(_task('Take out the trash', due + datetime.timedelta(hours=2)))
+    done = store.add_task(_task('Take evening pills', due))
+    store.update_task(done['id'], completed=True)
+    assert [t['id'] for t in store.search_tasks('take the pill')] == [pills['id']]
+    assert len(store.search_tasks('take pills', include_completed=True)) == 2
+    assert store.search_tasks('take medicine pills') == []
+    fuzzy = store.search_tasks('take medicine pills', match_all=False)
+    assert fuzzy[0]['id'] == pills['id'] and len(fuzzy) == 3  # both words before one word
+    # A query of only stopwords still searches for them
+    assert [t['description'] for t in store.search_tasks('the')] == ['Take out the trash']
+    assert store.search_tasks('') == []
+
+def test_search_index_follows_edits_and_existing_rows(tmp_path):
+    conn = task_store.connect(str(tmp_path / "fts.db"))
+    conn.executescript(task_store.TABLE_SCHEMA)
+    conn.execute("INSERT INTO tasks (description, dueDate, createdAt) VALUES ('water plants', '2025-03-04', '2025-01-01')")
+    task_store.create_tables(conn)  # indexes rows written before the FTS table existed
+    store = task_store.TaskStore(conn)
+    assert [t['description'] for t in store.search_tasks('plants')] == ['water plants']
+    store.update_task(1, description='water the garden')
+    assert store.search_tasks('plants') == [] and len(store.search_tasks('garden')) == 1
+    store.update_task(1, deletedAt=datetime.datetime(2025, 3, 5))
+    store.purge(1)
+    assert conn.execute("SELECT count(*) FROM tasks_fts WHERE tasks_fts MATCH 'garden'").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,37 @@
+from view_manager import ViewManager
+
+class FakeFrame:
+    def __init__(self, name):
+        self.name = name
+        self.packed = False
+        self.destroyed = False
+
+    def pack(self, **options):
+        self.packed = True
+
+    def pack_forget(self):
+        self.packed = False
+
+    def destroy(self):
+        self.destroyed = True
+
+def test_screens_are_built_once_and_swapped():
+    views = ViewManager(parent=None)
+    refreshed = []
+    views.register("home", lambda parent: FakeFrame("home"), lambda: refreshed.append("home"))
+    views.register("day", lambda parent: FakeFrame("day"), lambda day: refreshed.append(day))
+    home = views.show("home")
+    day = views.show("day", "2025-03-04")
+    assert not home.packed and day.packed and views.current == "day"
+    assert views.show("home") is home and home.packed and not day.packed
+    views.show("day", "2025-03-05")
+    assert views.builds == 2 and refreshed == ["home", "2025-03-04", "home", "2025-03-05"]
+    assert views.last_switch_seconds >= 0
+
+def test_invalidate_rebuilds_on_next_show():
+    views = ViewManager(parent=None)
+    views.register("history", lambda parent: FakeFrame("history"))
+    first = views.show("history")
+    views.invalidate("history")
+    assert first.destroyed and not views.is_built("history") and views.current is None
+    assert views.show("history") is not first and views.builds == 2
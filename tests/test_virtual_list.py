@@ -0,0 +1,34 @@
+import tkinter as tk
+import pytest
+from virtual_list import VirtualList, visible_range
+
+def test_visible_range_covers_the_window_plus_overscan():
+    assert visible_range(0, 100, 32, 1000) == (0, 6)  # rows 0-3 visible, 2 overscan
+    assert visible_range(3200, 100, 32, 1000, overscan=0) == (100, 104)
+    assert visible_range(31990, 100, 32, 1000) == (997, 1000)  # clamped at the end
+    assert visible_range(0, 100, 32, 0) == (0, 0)
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    root.geometry("300x200")
+    yield root
+    root.destroy()
+
+def test_only_visible_rows_are_materialized_and_recycled(root):
+    rows = VirtualList(root, [f"task {i}" for i in range(5000)], row_height=20)
+    rows.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    pool = len(rows._slots)
+    assert 0 < pool < 20
+    shown = {slot[1].cget("text") for slot in rows._slots if slot[2] is not None}
+    assert "task 0" in shown and "task 100" not in shown
+    rows.see(2500)
+    root.update()
+    assert len(rows._slots) == pool  # same Labels, moved and retexted
+    assert "task 2500" in {slot[1].cget("text") for slot in rows._slots if slot[2] is not None}
+    rows.update_item(2501, "changed")
+    assert "changed" in {slot[1].cget("text") for slot in rows._slots}
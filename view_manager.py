@@ -0,0 +1,67 @@
+"""view_manager.py
+Screen cache for the Tkinter client.
+
+Each screen is built once, the first time it is shown, and kept. Switching screens
+pack_forget()s the current frame and re-packs the cached one, then calls the
+screen's refresh function so only its data-bound parts (titles, lists, form
+defaults) are updated. Nothing is destroyed or rebuilt on navigation, and no
+geometry queries are needed to find out what belongs to the main area.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class ViewManager:
+    """Named screens inside one parent frame; `build(parent)` must return the screen's frame."""
+
+    def __init__(self, parent: Any, **pack_options):
+        self.parent = parent
+        self.pack_options = pack_options or {'fill': 'both', 'expand': True}
+        self.current: Optional[str] = None
+        self.builds = 0                  # screens built so far (each at most once until invalidated)
+        self.last_switch_seconds = 0.0   # time spent in the latest show()
+        self._builders: Dict[str, Callable[[Any], Any]] = {}
+        self._refreshers: Dict[str, Optional[Callable[..., None]]] = {}
+        self._frames: Dict[str, Any] = {}
+
+    def register(self, name: str, build: Callable[[Any], Any], refresh: Optional[Callable[..., None]] = None) -> None:
+        self._builders[name] = build
+        self._refreshers[name] = refresh
+
+    def is_built(self, name: str) -> bool:
+        return name in self._frames
+
+    def frame(self, name: str) -> Any:
+        return self._frames.get(name)
+
+    def show(self, name: str, *args, **kwargs) -> Any:
+        """Switches to `name`, building it on first use; arguments go to its refresh function."""
+        started = time.perf_counter()
+        frame = self._frames.get(name)
+        if frame is None:
+            frame = self._frames[name] = self._builders[name](self.parent)
+            self.builds += 1
+        if self.current != name:
+            if self.current is not None:
+                self._frames[self.current].pack_forget()
+            frame.pack(**self.pack_options)
+            self.current = name
+        refresh = self._refreshers[name]
+        if refresh is not None:
+            refresh(*args, **kwargs)
+        self.last_switch_seconds = time.perf_counter() - started
+        return frame
+
+    def invalidate(self, name: str) -> None:
+        """Destroys a cached screen; the next show() builds it again."""
+        frame = self._frames.pop(name, None)
+        if frame is not None:
+            frame.destroy()
+        if self.current == name:
+            self.current = None
+
+
+__all__ = [
+    'ViewManager'
+]
@@ -0,0 +1,157 @@
+"""virtual_list.py
+Windowed (virtualized) list widget for the Tkinter client.
+
+Only the rows inside the visible window (plus a few rows of overscan) have widgets.
+They are fixed-height Labels placed on a Canvas whose scroll region is sized for every
+item, so the scrollbar behaves as if all rows existed. When the view moves, the same
+Labels are moved to the newly visible positions and given the new rows' text; a
+Label is reconfigured only when its text actually changes. A day of thousands of tasks
+costs the same handful of widgets as a day of ten.
+"""
+from __future__ import annotations
+import tkinter as tk
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+ROW_HEIGHT = 32
+OVERSCAN = 2  # rows materialized above and below the window, so scrolling never shows a gap
+
+
+def visible_range(top: float, height: float, row_height: int, count: int,
+                  overscan: int = OVERSCAN) -> Tuple[int, int]:
+    """Half-open [first, last) item range to materialize for a window at `top` pixels."""
+    if count <= 0 or row_height <= 0:
+        return 0, 0
+    first = max(0, int(top // row_height) - overscan)
+    last = min(count, int((top + max(height, 0)) // row_height) + 1 + overscan)
+    return first, max(first, last)
+
+
+class VirtualList(tk.Frame):
+    """
+    Scrollable list of `items` drawn with a recycled pool of row Labels.
+    `format_item(item)` gives a row's text; `on_select(index, item)` runs when a row is clicked.
+    """
+
+    def __init__(self, parent, items: Sequence[Any] = (), format_item: Callable[[Any], str] = str,
+                 on_select: Optional[Callable[[int, Any], None]] = None, empty_text: str = "",
+                 row_height: int = ROW_HEIGHT, font=("Arial", 12), bg="#f4f4f4", select_bg="#cce0ff", **kwargs):
+        super().__init__(parent, bg=bg, **kwargs)
+        self.format_item = format_item
+        self.on_select = on_select
+        self.empty_text = empty_text
+        self.row_height = row_height
+        self.font = font
+        self.bg = bg
+        self.select_bg = select_bg
+        self.selection: Optional[int] = None
+        self._items: List[Any] = []
+        self._slots: List[list] = []  # [canvas window id, label, item index, shown text, shown bg]
+        self._width = 0
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, yscrollincrement=row_height)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill="y")
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Every view change (scrollbar, wheel, resize) comes through here
+        self.canvas.configure(yscrollcommand=self._on_view_change)
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(sequence, self._on_wheel)
+        self.empty_label = tk.Label(self.canvas, text=empty_text, font=font, bg=bg)
+        self._empty_id = self.canvas.create_window((10, 5), window=self.empty_label, anchor="nw", state="hidden")
+        self.set_items(items)
+
+    # --- data ---
+
+    @property
+    def items(self) -> List[Any]:
+        return self._items
+
+    def set_items(self, items: Sequence[Any]) -> None:
+        """Replaces the rows (and clears the selection); the view keeps its scroll position where possible."""
+        self._items = list(items)
+        self.selection = None
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self._items) * self.row_height))
+        self.canvas.itemconfigure(self._empty_id, state="hidden" if self._items else "normal")
+        self.render()
+
+    def update_item(self, index: int, item: Any) -> None:
+        """Replaces one row; only redrawn if it is materialized."""
+        self._items[index] = item
+        for slot in self._slots:
+            if slot[2] == index:
+                self._show(slot, index)
+
+    def selected_item(self) -> Any:
+        return None if self.selection is None else self._items[self.selection]
+
+    def see(self, index: int) -> None:
+        """Scrolls so that row `index` is at the top of the window."""
+        if self._items:
+            self.canvas.yview_moveto(index / len(self._items))
+
+    # --- drawing ---
+
+    def render(self) -> None:
+        """Materializes the visible rows, recycling the pool's Labels."""
+        first, last = visible_range(self.canvas.canvasy(0), self.canvas.winfo_height(),
+                                    self.row_height, len(self._items))
+        while len(self._slots) < last - first:
+            label = tk.Label(self.canvas, font=self.font, bg=self.bg, anchor="w")
+            slot = [self.canvas.create_window((0, 0), window=label, anchor="nw"), label, None, None, self.bg]
+            label.bind("<Button-1>", lambda event, slot=slot: self._click(slot))
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                label.bind(sequence, self._on_wheel)
+            self._slots.append(slot)
+        width = max(self.canvas.winfo_width(), 1)
+        resized, self._width = width != self._width, width
+        for n, slot in enumerate(self._slots):
+            index = first + n
+            if index < last:
+                if slot[2] is None or resized:
+                    self.canvas.itemconfigure(slot[0], state="normal", width=width, height=self.row_height)
+                if slot[2] != index:
+                    self.canvas.coords(slot[0], 0, index * self.row_height)
+                self._show(slot, index)
+            elif slot[2] is not None:
+                self.canvas.itemconfigure(slot[0], state="hidden")
+                slot[2] = None
+
+    def _show(self, slot: list, index: int) -> None:
+        slot[2] = index
+        text = self.format_item(self._items[index])
+        if text != slot[3]:
+            slot[1].config(text=text)
+            slot[3] = text
+        self._highlight(slot)
+
+    def _highlight(self, slot: list) -> None:
+        bg = self.select_bg if slot[2] is not None and slot[2] == self.selection else self.bg
+        if bg != slot[4]:
+            slot[1].config(bg=bg)
+            slot[4] = bg
+
+    def _on_view_change(self, first: str, last: str) -> None:
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def _on_wheel(self, event) -> None:
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self.canvas.yview_scroll(-1, "units")
+        else:
+            self.canvas.yview_scroll(1, "units")
+
+    def _click(self, slot: list) -> None:
+        index = slot[2]
+        if index is None:
+            return
+        self.selection = index
+        for other in self._slots:
+            self._highlight(other)
+        if self.on_select:
+            self.on_select(index, self._items[index])
+
+
+__all__ = [
+    'ROW_HEIGHT', 'OVERSCAN', 'visible_range', 'VirtualList'
+]